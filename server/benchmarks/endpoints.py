@@ -0,0 +1,326 @@
+"""Latency, query count and memory of the hot endpoints at several dataset sizes.
+
+For each size (a target number of payment rows) the tables are dropped and
+recreated and a synthetic portfolio is generated with src.database.synthetic,
+then every scenario below is requested through the ASGI app in-process:
+
+- p50 and p95 latency over --requests timed requests, after --warmup untimed ones
+- the number of statements run, read from the Server-Timing header the access
+  log middleware adds
+- peak memory allocated while serving one more request, from tracemalloc
+
+Cached endpoints have the response cache cleared before every request, so the
+figures are for building the response. Validator scenarios send writes that
+the route rejects after its checks, so they time the validation queries
+without changing the data.
+
+Results are written as JSON with --save and compared with a saved baseline
+with --baseline. A scenario regresses when its p50 or p95 grows by more than
+--threshold (and by at least --min-delta-ms), its peak memory by more than
+--memory-threshold, or its query count by more than --query-threshold; the run
+then exits with status 1.
+
+The tables of the benchmark database are dropped, so it is passed separately
+from DATABASE_URL and must be a scratch database. Generating 1M payments takes
+a few minutes.
+
+    cd server && python -m benchmarks.endpoints --database-url postgresql://localhost/propbench \\
+        --sizes 1000,100000,1000000 --save benchmarks/endpoints_baseline.json
+    cd server && python -m benchmarks.endpoints --database-url postgresql://localhost/propbench \\
+        --baseline benchmarks/endpoints_baseline.json
+"""
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+# Payments generated per user with the dataset shape below, on average
+PAYMENTS_PER_USER = 285
+PROPERTIES_PER_USER = 10
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+# Row-level views the migrations create on top of the tables from create_all()
+VIEWS_MIGRATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "src", "database", "migrations", "versions", "*_acquisition_cost_summary_tables.py",
+)
+VIEWS = {
+    "acquisition_cost_details": "ACQUISITION_COST_DETAILS_VIEW",
+    "loan_repayment_details": "LOAN_REPAYMENT_DETAILS_VIEW",
+}
+
+
+def scenarios(ids: Dict[str, int]) -> Dict[str, dict]:
+    """Requests to benchmark, keyed by name, with the status each should return."""
+    too_much = "1000000000000"
+    return {
+        "payments.list": {"method": "GET", "url": "/payments/"},
+        "payments.page": {"method": "GET", "url": "/payments/", "params": {"limit": 100}},
+        "payments.by_purchase": {"method": "GET", "url": "/payments/", "params": {"purchase_id": ids["purchase"]}},
+        "invoices.list": {"method": "GET", "url": "/invoices/"},
+        "invoices.by_purchase": {"method": "GET", "url": "/invoices/", "params": {"purchase_id": ids["purchase"]}},
+        "loans.list": {"method": "GET", "url": "/loans/"},
+        "repayments.list": {"method": "GET", "url": "/repayments/"},
+        "repayments.by_loan": {"method": "GET", "url": "/repayments/", "params": {"loan_id": ids["loan"]}},
+        "acquisition_cost.summary": {"method": "GET", "url": "/acquisition-cost/summary/"},
+        "acquisition_cost.details": {"method": "GET", "url": "/acquisition-cost/details/"},
+        "acquisition_cost.details_by_purchase": {
+            "method": "GET",
+            "url": "/acquisition-cost/details/",
+            "params": {"purchase_id": ids["purchase"]},
+        },
+        "loans.summary_enhanced": {"method": "GET", "url": "/loans/summary/enhanced/"},
+        "validate.create_payment": {
+            "method": "POST",
+            "url": "/payments/",
+            "json": {
+                "invoice_id": ids["invoice"],
+                "payment_date": "2025-01-01",
+                "amount": too_much,
+                "source_id": ids["source"],
+                "payment_mode": "online",
+            },
+            "status": 400,
+        },
+        "validate.update_payment": {
+            "method": "PUT",
+            "url": f"/payments/{ids['payment']}/",
+            "json": {"amount": too_much},
+            "status": 400,
+        },
+        "validate.create_invoice": {
+            "method": "POST",
+            "url": "/invoices/",
+            "json": {
+                "purchase_id": ids["purchase"],
+                "invoice_number": "BENCH-1",
+                "invoice_date": "2025-01-01",
+                "amount": too_much,
+            },
+            "status": 400,
+        },
+        "validate.update_invoice": {
+            "method": "PUT",
+            "url": f"/invoices/{ids['invoice']}",
+            "json": {"amount": too_much},
+            "status": 400,
+        },
+        "validate.create_repayment": {
+            "method": "POST",
+            "url": "/repayments/",
+            "json": {
+                "loan_id": ids["loan"],
+                "payment_date": "2025-01-01",
+                "principal_amount": too_much,
+                "interest_amount": "0",
+                "source_id": ids["source"],
+                "payment_mode": "online",
+            },
+            "status": 400,
+        },
+    }
+
+
+def prepare(size: int, seed: int) -> Dict[str, int]:
+    """Recreate the tables and generate about `size` payments; returns the row counts."""
+    from sqlalchemy import text
+
+    from src.database import Base, SessionLocal, engine, synthetic
+
+    spec = importlib.util.spec_from_file_location("views_migration", glob.glob(VIEWS_MIGRATION)[0])
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as connection:
+        for view in VIEWS:
+            connection.execute(text(f"DROP VIEW IF EXISTS {view}"))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for constant in VIEWS.values():
+            connection.execute(text(getattr(migration, constant)))
+    db = SessionLocal()
+    try:
+        users = max(1, round(size / PAYMENTS_PER_USER))
+        counts = synthetic.generate(db, users, PROPERTIES_PER_USER, seed=seed)
+        db.commit()
+        return counts
+    finally:
+        db.close()
+
+
+def targets() -> Dict[str, int]:
+    """Ids the detail and validator scenarios refer to: a purchase that has a loan and its rows."""
+    from sqlalchemy import select
+
+    from src.database import SessionLocal, models
+
+    db = SessionLocal()
+    try:
+        loan = db.execute(
+            select(models.Loan.id, models.Loan.purchase_id)
+            .where(models.Loan.disbursed_to_date > 0)
+            .order_by(models.Loan.id)
+            .limit(1)
+        ).one()
+        payment = db.execute(
+            select(models.Payment.id, models.Payment.invoice_id, models.Payment.source_id)
+            .where(models.Payment.purchase_id == loan.purchase_id)
+            .order_by(models.Payment.id)
+            .limit(1)
+        ).one()
+        return {
+            "purchase": loan.purchase_id,
+            "loan": loan.id,
+            "invoice": payment.invoice_id,
+            "payment": payment.id,
+            "source": payment.source_id,
+        }
+    finally:
+        db.close()
+
+
+def measure(client, request: dict, requests: int, warmup: int) -> dict:
+    from src.cache import response_cache
+
+    expected = request.get("status", 200)
+    spec = {key: value for key, value in request.items() if key != "status"}
+
+    def send():
+        response_cache.clear()
+        started = time.perf_counter()
+        response = client.request(**spec)
+        elapsed = time.perf_counter() - started
+        if response.status_code != expected:
+            raise RuntimeError(
+                f"{spec['method']} {spec['url']} returned {response.status_code}, expected {expected}: "
+                f"{response.text[:200]}"
+            )
+        return response, elapsed
+
+    for _ in range(warmup):
+        send()
+    latencies = []
+    queries = 0
+    for _ in range(requests):
+        response, elapsed = send()
+        latencies.append(elapsed * 1000)
+        match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        queries = int(match.group(1)) if match else 0
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        send()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "queries": queries,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def compare(
+    baseline: dict,
+    results: dict,
+    threshold: float,
+    min_delta_ms: float,
+    memory_threshold: float,
+    query_threshold: int,
+) -> List[str]:
+    """Regressions of `results` against `baseline`, one message each, for the sizes and scenarios both have."""
+    regressions = []
+    for size, current in results["sizes"].items():
+        before = baseline.get("sizes", {}).get(size, {}).get("scenarios", {})
+        for name, figures in current["scenarios"].items():
+            if name not in before:
+                continue
+            old = before[name]
+            for metric in ("p50_ms", "p95_ms"):
+                if figures[metric] > old[metric] * (1 + threshold) and figures[metric] - old[metric] >= min_delta_ms:
+                    regressions.append(f"{size} {name}: {metric} {old[metric]} -> {figures[metric]}")
+            if figures["peak_kib"] > old["peak_kib"] * (1 + memory_threshold):
+                regressions.append(f"{size} {name}: peak_kib {old['peak_kib']} -> {figures['peak_kib']}")
+            if figures["queries"] > old["queries"] + query_threshold:
+                regressions.append(f"{size} {name}: queries {old['queries']} -> {figures['queries']}")
+    return regressions
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True, help="Scratch database; its tables are dropped")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Payment counts to generate, comma separated")
+    parser.add_argument("--only", help="Run only the scenarios whose name starts with this prefix")
+    parser.add_argument("--requests", type=int, default=20, help="Timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated data")
+    parser.add_argument("--save", help="Write the results as a JSON baseline to this path")
+    parser.add_argument("--baseline", help="Compare with the JSON baseline at this path")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative p50/p95 growth")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Latency growth always allowed, in ms")
+    parser.add_argument("--memory-threshold", type=float, default=0.2, help="Allowed relative peak memory growth")
+    parser.add_argument("--query-threshold", type=int, default=0, help="Allowed extra queries per request")
+    args = parser.parse_args(argv)
+
+    # src.database connects to DATABASE_URL on import, so point it at the scratch
+    # database first; replicas would serve reads from a different database
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["DATABASE_REPLICA_URLS"] = ""
+    from fastapi.testclient import TestClient
+
+    from src.main import app
+
+    results = {"requests": args.requests, "sizes": {}}
+    for size in (int(size) for size in args.sizes.split(",")):
+        started = time.perf_counter()
+        counts = prepare(size, args.seed)
+        print(f"{counts['payments']} payments generated in {time.perf_counter() - started:.1f}s")
+        figures = {}
+        with TestClient(app) as client:
+            for name, request in scenarios(targets()).items():
+                if args.only and not name.startswith(args.only):
+                    continue
+                figures[name] = measure(client, request, args.requests, args.warmup)
+                print(
+                    f"  {name:<38} p50 {figures[name]['p50_ms']:9.2f} ms  p95 {figures[name]['p95_ms']:9.2f} ms"
+                    f"  {figures[name]['queries']:3d} queries  {figures[name]['peak_kib']:10.1f} KiB"
+                )
+        results["sizes"][str(size)] = {"rows": counts, "scenarios": figures}
+
+    if args.save:
+        with open(args.save, "w") as stream:
+            json.dump(results, stream, indent=2)
+            stream.write("\n")
+    if args.baseline:
+        with open(args.baseline) as stream:
+            baseline = json.load(stream)
+        regressions = compare(
+            baseline,
+            results,
+            args.threshold,
+            args.min_delta_ms,
+            args.memory_threshold,
+            args.query_threshold,
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Concurrent-user load test of a running backend with mixed read/write traffic.
+
+Virtual users are asyncio tasks sharing one httpx.AsyncClient. Each repeatedly
+picks an action at random, weighted by the chosen profile, performs it and
+waits an exponentially distributed think time (--think-ms on average):
+
+- dashboard: GET /dashboard/ across all purchases, like the other list routes
+- payments: GET /payments/?limit=50 and follows X-Next-Cursor for up to
+  --pages pages, recording each page as a request
+- invoices: GET /invoices/ for one purchase
+- loans: GET /loans/
+- create_payment: POST /payments/ of 1.00 against an unpaid invoice
+- create_repayment: POST /repayments/ of 1.00 principal against a disbursed loan
+
+The test runs one stage per --users count, each for --duration seconds, and
+reports throughput, p50/p95/p99 latency and the error rate (non-2xx responses
+and failed connections) per route and in total. The last line names the
+largest stage whose p95 stayed within --slo-ms and whose error rate stayed
+within --max-error-rate.
+
+It needs nothing beyond the server's own dependencies and no network access
+other than to the server. To measure one backend container within the limits
+in compose.yaml, fill the local Postgres with synthetic data, then run the
+load generator in a container of its own on the compose network (the backend
+port isn't published, and running it inside the backend container would take
+CPU from the server under test):
+
+    docker compose up -d
+    docker compose exec backend /server/.venv/bin/python -m src.database generate --users 100 --properties 10
+    docker compose run --rm --no-deps backend /server/.venv/bin/python -m benchmarks.load \\
+        --url http://backend:8000 --profile mixed --users 10,25,50,100 --duration 30
+
+Writes go to the database under test, so run it against a scratch database.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+# Action weights per traffic mix
+PROFILES = {
+    "read": {"dashboard": 35, "payments": 35, "invoices": 15, "loans": 15},
+    "mixed": {"dashboard": 25, "payments": 30, "invoices": 10, "loans": 5, "create_payment": 20, "create_repayment": 10},
+    "write": {"dashboard": 10, "payments": 20, "create_payment": 45, "create_repayment": 25},
+}
+
+TODAY = time.strftime("%Y-%m-%d")
+
+
+class Recorder:
+    """Latencies and errors per route for one stage."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, started: float, ok: bool) -> None:
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        if not ok:
+            self.errors[route] += 1
+
+    def report(self, duration: float) -> dict:
+        routes = {}
+        for route in sorted(self.latencies):
+            routes[route] = _summary(self.latencies[route], self.errors[route], duration)
+        everything = [latency for latencies in self.latencies.values() for latency in latencies]
+        return {"routes": routes, "total": _summary(everything, sum(self.errors.values()), duration)}
+
+
+def _summary(latencies: List[float], errors: int, duration: float) -> dict:
+    if not latencies:
+        return {"requests": 0, "rps": 0.0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "error_rate": 0.0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "error_rate": round(errors / len(latencies), 4),
+    }
+
+
+async def _request(client: httpx.AsyncClient, recorder: Recorder, route: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        recorder.record(route, started, ok=False)
+        return None
+    recorder.record(route, started, ok=response.is_success)
+    return response
+
+
+async def load_fixtures(client: httpx.AsyncClient) -> dict:
+    """Ids the actions pick from, read through the API itself."""
+    invoices = []
+    for status in ("pending", "partially_paid"):
+        response = await client.get("/invoices/", params={"status": status, "fields": "id,purchase_id"})
+        response.raise_for_status()
+        invoices.extend(response.json())
+    response = await client.get("/payment-sources/")
+    response.raise_for_status()
+    sources = [source for source in response.json() if source["source_type"] != "loan"]
+    if not sources:
+        # New payments and repayments are made by user 1, who may own no bank account yet
+        response = await client.post(
+            "/payment-sources/", json={"name": "Load test account", "source_type": "bank_account"}
+        )
+        response.raise_for_status()
+        sources = [response.json()]
+    response = await client.get("/loans/", params={"is_active": True})
+    response.raise_for_status()
+    loans = response.json()
+    fixtures = {
+        "invoices": [invoice["id"] for invoice in invoices],
+        "purchases": sorted({invoice["purchase_id"] for invoice in invoices}),
+        "sources": [source["id"] for source in sources],
+        "loans": [loan["id"] for loan in loans if float(loan["total_disbursed_amount"]) > 0],
+    }
+    missing = [name for name, ids in fixtures.items() if not ids]
+    if missing:
+        raise SystemExit(
+            f"No {', '.join(missing)} to work with; generate data first (python -m src.database generate)"
+        )
+    return fixtures
+
+
+async def act(action: str, client: httpx.AsyncClient, recorder: Recorder, fixtures: dict, pages: int) -> None:
+    if action == "dashboard":
+        await _request(client, recorder, "GET /dashboard/", "GET", "/dashboard/")
+    elif action == "payments":
+        params = {"limit": 50}
+        for _ in range(pages):
+            response = await _request(client, recorder, "GET /payments/?limit", "GET", "/payments/", params=params)
+            cursor = response.headers.get("x-next-cursor") if response is not None else None
+            if not cursor:
+                break
+            params = {"limit": 50, "after": cursor}
+    elif action == "invoices":
+        params = {"purchase_id": random.choice(fixtures["purchases"])}
+        await _request(client, recorder, "GET /invoices/?purchase_id", "GET", "/invoices/", params=params)
+    elif action == "loans":
+        await _request(client, recorder, "GET /loans/", "GET", "/loans/")
+    elif action == "create_payment":
+        payment = {
+            "invoice_id": random.choice(fixtures["invoices"]),
+            "payment_date": TODAY,
+            "amount": "1.00",
+            "source_id": random.choice(fixtures["sources"]),
+            "payment_mode": "online",
+            "notes": "load test",
+        }
+        await _request(client, recorder, "POST /payments/", "POST", "/payments/", json=payment)
+    elif action == "create_repayment":
+        repayment = {
+            "loan_id": random.choice(fixtures["loans"]),
+            "payment_date": TODAY,
+            "principal_amount": "1.00",
+            "interest_amount": "0",
+            "source_id": random.choice(fixtures["sources"]),
+            "payment_mode": "online",
+            "notes": "load test",
+        }
+        await _request(client, recorder, "POST /repayments/", "POST", "/repayments/", json=repayment)
+    else:
+        raise ValueError(f"Unknown action: {action}")
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    fixtures: dict,
+    profile: Dict[str, int],
+    deadline: float,
+    think_ms: float,
+    pages: int,
+) -> None:
+    actions, weights = list(profile), list(profile.values())
+    # Spread the users' first requests over one think time
+    await asyncio.sleep(random.uniform(0, think_ms / 1000))
+    while time.perf_counter() < deadline:
+        await act(random.choices(actions, weights)[0], client, recorder, fixtures, pages)
+        if think_ms:
+            await asyncio.sleep(random.expovariate(1000 / think_ms))
+
+
+async def run_stage(
+    url: str, users: int, duration: float, fixtures: dict, profile: Dict[str, int], think_ms: float, pages: int, timeout: float
+) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(virtual_user(client, recorder, fixtures, profile, deadline, think_ms, pages) for _ in range(users))
+        )
+        elapsed = time.perf_counter() - started
+    return recorder.report(elapsed)
+
+
+def _print_stage(users: int, report: dict) -> None:
+    print(f"\n{users} users")
+    print(f"  {'route':<28} {'requests':>8} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for route, figures in [*report["routes"].items(), ("total", report["total"])]:
+        if not figures["requests"]:
+            continue
+        print(
+            f"  {route:<28} {figures['requests']:>8} {figures['rps']:>8.1f} {figures['p50_ms']:>9.1f} "
+            f"{figures['p95_ms']:>9.1f} {figures['p99_ms']:>9.1f} {figures['error_rate']:>7.2%}"
+        )
+
+
+async def run(args) -> dict:
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        fixtures = await load_fixtures(client)
+    profile = PROFILES[args.profile]
+    results = {"url": args.url, "profile": args.profile, "duration": args.duration, "stages": {}}
+    capacity: Optional[int] = None
+    for users in (int(users) for users in args.users.split(",")):
+        report = await run_stage(
+            args.url, users, args.duration, fixtures, profile, args.think_ms, args.pages, args.timeout
+        )
+        results["stages"][str(users)] = report
+        _print_stage(users, report)
+        total = report["total"]
+        if total["requests"] and total["p95_ms"] <= args.slo_ms and total["error_rate"] <= args.max_error_rate:
+            capacity = users
+    results["capacity"] = capacity
+    if capacity is None:
+        print(f"\nNo stage kept p95 within {args.slo_ms} ms and errors within {args.max_error_rate:.1%}.")
+    else:
+        print(f"\nUp to {capacity} users kept p95 within {args.slo_ms} ms and errors within {args.max_error_rate:.1%}.")
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://backend:8000", help="Base URL of the backend")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed", help="Traffic mix")
+    parser.add_argument("--users", default="10,25,50,100", help="Concurrent users per stage, comma separated")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per stage")
+    parser.add_argument("--think-ms", type=float, default=500, help="Mean pause between a user's actions")
+    parser.add_argument("--pages", type=int, default=3, help="Payment list pages a user reads per visit")
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout in seconds; a timeout counts as an error")
+    parser.add_argument("--slo-ms", type=float, default=500, help="p95 latency a stage must stay within")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate a stage must stay within")
+    parser.add_argument("--seed", type=int, help="Seed for the users' choices")
+    parser.add_argument("--json", help="Also write the results to this path")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as stream:
+            json.dump(results, stream, indent=2)
+            stream.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Per-request cost of logging, before and after the queued pipeline.
+
+Replays what one request logs through two setups, writing to a temporary
+directory:
+
+- before: logging.basicConfig's FileHandler written from the request thread,
+  log_requests' two print() calls, and f-string messages, which are formatted
+  even for debug lines that are then dropped
+- after: src.logging_config's QueueHandler, one structured access record
+  formatted on the listener thread, and the routes' per-request chatter at
+  debug level with %-style arguments, so it costs a level check and nothing
+  else unless LOG_LEVEL=DEBUG
+
+Reported times are what the request thread pays. The "after" setup also
+reports the time it takes to drain the queue, which the listener thread does
+in the background.
+
+    cd server && python -m benchmarks.request_logging --requests 20000 --repeat 5
+"""
+import argparse
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+
+from src import logging_config
+
+# What a typical route logs per request: a few info lines and a debug line
+FILTERS = {"purchase_id": 12, "invoice_id": None, "source_id": 3, "from_date": "2024-01-01"}
+
+
+def before(logger: logging.Logger, stdout, i: int) -> None:
+    print(f"Request: GET http://localhost:5000/payments/?purchase_id={i}", file=stdout)
+    logger.info("Fetching payments with filters")
+    logger.debug(f"Filters: {FILTERS}")
+    logger.info(f"Found {i % 50} payments matching the criteria")
+    print("Response: 200", file=stdout)
+
+
+def after(logger: logging.Logger, access: logging.Logger, i: int) -> None:
+    logger.debug("Fetching payments with filters")
+    logger.debug("Filters: %s", FILTERS)
+    logger.debug("Found %s payments matching the criteria", i % 50)
+    access.info(
+        "%s %s %s %sms db_queries=%s db_time_ms=%s",
+        "GET", "/payments/", 200, 1.234, 2, 0.456,
+        extra={
+            "method": "GET", "path": "/payments/", "status": 200, "duration_ms": 1.234,
+            "db_queries": 2, "db_time_ms": 0.456, "client": "127.0.0.1",
+        },
+    )
+
+
+def _logger(name: str, *handlers) -> logging.Logger:
+    logger = logging.getLogger(f"benchmarks.request_logging.{name}")
+    logger.handlers[:] = list(handlers)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def measure(run, requests: int, repeat: int) -> float:
+    """Best wall time per request over `repeat` rounds, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for i in range(requests):
+            run(i)
+        best = min(best, (time.perf_counter() - started) / requests)
+    return best
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000, help="Requests replayed per round")
+    parser.add_argument("--repeat", type=int, default=5, help="Rounds per setup; the best is reported")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as stdout:
+        file_handler = logging.FileHandler(os.path.join(directory, "before.log"))
+        file_handler.setFormatter(logging.Formatter(logging_config.APP_FORMAT))
+        sync_logger = _logger("before", file_handler)
+        per_request_before = measure(lambda i: before(sync_logger, stdout, i), args.requests, args.repeat)
+        file_handler.close()
+
+        app_handler = logging.FileHandler(os.path.join(directory, "app.log"))
+        app_handler.setFormatter(logging.Formatter(logging_config.APP_FORMAT))
+        access_handler = logging.FileHandler(os.path.join(directory, "access.log"))
+        access_handler.setFormatter(logging_config.AccessFormatter())
+        app_handler.addFilter(lambda record: not record.name.endswith(".access"))
+        access_handler.addFilter(lambda record: record.name.endswith(".access"))
+        records = queue.SimpleQueue()
+        queue_handler = logging_config.DeferredQueueHandler(records)
+        queue_handler.addFilter(logging_config.DebugSampler(logging_config.DEBUG_SAMPLE_RATE))
+        app_logger = _logger("after", queue_handler)
+        access_logger = _logger("access", queue_handler)
+        listener = QueueListener(records, app_handler, access_handler)
+        listener.start()
+        per_request_after = measure(lambda i: after(app_logger, access_logger, i), args.requests, args.repeat)
+        started = time.perf_counter()
+        # stop() waits for the listener to write out everything still queued
+        listener.stop()
+        drain = time.perf_counter() - started
+        app_handler.close()
+        access_handler.close()
+
+    print(f"{args.requests} requests, best of {args.repeat}")
+    print(f"  {'before (sync file + print + f-strings)':<45} {per_request_before * 1e6:8.2f} µs/request")
+    print(
+        f"  {'after (queue + lazy args + access log)':<45} {per_request_after * 1e6:8.2f} µs/request"
+        f"  {per_request_before / per_request_after:5.1f}x"
+    )
+    print(f"  {'listener drain after the last round':<45} {drain * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Per-row cost of encoding list responses.
+
+Compares FastAPI's default response_model path with the two paths in
+src.serialization, on synthetic payment list rows:
+
+    cd server && python -m benchmarks.serialization --rows 5000 --repeat 20
+"""
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from src import schemas, serialization
+
+
+def make_rows(count: int) -> List[dict]:
+    """Rows shaped like the payment list query's output."""
+    start = date(2020, 1, 1)
+    return [
+        {
+            "id": i,
+            "payment_date": start + timedelta(days=i % 2000),
+            "amount": Decimal(f"{100000 + i * 37 % 900000}.{i % 100:02d}"),
+            "source_name": f"Source {i % 12}",
+            "payment_mode": ("online", "cheque", "cash")[i % 3],
+            "property_name": f"Property {i % 40}",
+            "invoice_number": f"INV-{i:07d}",
+        }
+        for i in range(count)
+    ]
+
+
+def fastapi_default(rows: List[dict], adapter: TypeAdapter) -> bytes:
+    # What FastAPI does for `response_model=List[...]` with a JSONResponse:
+    # validate, dump to JSON-compatible objects, run jsonable_encoder, json.dumps
+    content = jsonable_encoder(adapter.dump_python(adapter.validate_python(rows), mode="json"))
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def measure(encode, repeat: int) -> float:
+    """Best wall time of `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000, help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per path; the best is reported")
+    args = parser.parse_args(argv)
+
+    schema = schemas.PaymentPublic
+    rows = make_rows(args.rows)
+    adapter = TypeAdapter(List[schema])
+
+    paths = {
+        "fastapi default (validate + jsonable_encoder + json)": lambda: fastapi_default(rows, adapter),
+        "json_response(validate=True)": lambda: serialization.encode_items(rows, schema, validate=True),
+        "json_response(validate=False)": lambda: serialization.encode_items(rows, schema, validate=False),
+    }
+
+    # Every path has to produce the same document for the comparison to mean anything
+    outputs = {name: json.loads(encode()) for name, encode in paths.items()}
+    reference = next(iter(outputs.values()))
+    for name, output in outputs.items():
+        if output != reference:
+            raise SystemExit(f"{name} produced different JSON")
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    baseline = None
+    for name, encode in paths.items():
+        per_row = measure(encode, args.repeat) / args.rows * 1e6
+        baseline = baseline or per_row
+        print(f"  {name:<55} {per_row:8.2f} µs/row  {baseline / per_row:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,5 +3,13 @@
 # Run database migrations
 /server/.venv/bin/alembic -c src/database/alembic.ini upgrade head
 
-# Start the FastAPI application
-/server/.venv/bin/uvicorn src.main:app --host 0.0.0.0 --port 8000
+# Start the FastAPI application. exec replaces this shell so the server gets
+# docker's SIGTERM and drains open requests before exiting.
+if [ "${WEB_SERVER:-gunicorn}" = "uvicorn" ]; then
+    # Single process, e.g. for debugging
+    exec /server/.venv/bin/uvicorn src.main:app --host 0.0.0.0 --port 8000
+fi
+# Worker processes managed by gunicorn, configured in gunicorn.conf.py. With more
+# than one worker the per-process memory cache is off, so set CACHE_BACKEND=redis
+# (as compose.yaml does) to keep dashboard responses cached
+exec /server/.venv/bin/gunicorn src.main:app
@@ -0,0 +1,36 @@
+"""Production server settings, loaded by `gunicorn src.main:app` from this directory.
+
+Every setting can be overridden with the environment variable next to it.
+"""
+import os
+
+from src import server
+
+bind = os.getenv("BIND") or "0.0.0.0:8000"
+worker_class = "src.server.Worker"
+# One worker per CPU of the container's quota (cpus: in compose.yaml)
+workers = int(os.getenv("WEB_CONCURRENCY") or server.default_workers())
+# Tells the app how many processes share the work, e.g. to turn off per-process caches
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# Import the app once in the master and fork the workers from it
+preload_app = True
+
+# Replace a worker after it has served this many requests, plus up to the
+# jitter so the workers don't all restart at once; bounds slow memory growth
+max_requests = int(os.getenv("MAX_REQUESTS") or 10000)
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER") or 1000)
+
+# Seconds a stopping worker gets to finish its open requests
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT") or 30)
+# Seconds a worker may go silent before the master restarts it
+timeout = int(os.getenv("WORKER_TIMEOUT") or 60)
+keepalive = int(os.getenv("KEEPALIVE") or 5)
+
+accesslog = None
+errorlog = "-"
+loglevel = (os.getenv("LOG_LEVEL") or "info").lower()
+
+
+def post_fork(arbiter, worker):
+    server.after_fork()
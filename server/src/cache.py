@@ -0,0 +1,331 @@
+"""Response cache for the dashboard summary endpoints.
+
+Cached responses are stored as encoded JSON, keyed by endpoint and filter
+parameters. Rather than deleting entries on writes, each key also embeds a
+generation number for the data it was built from: the topic as a whole, or one
+purchase/loan when the request filters on it. Commits that change summary data
+bump the generations of the purchases and loans they touched (see
+database.summaries.on_change), so affected entries are never read again and age
+out of the LRU, while entries for other purchases and loans stay warm.
+
+The default backend is an in-process LRU. Set CACHE_BACKEND=redis and CACHE_URL
+to share entries and generations between worker processes (needs the `redis`
+package), or CACHE_BACKEND=none to turn caching off. An in-process LRU can't see
+the invalidations of writes served by another worker, so it is turned off when
+the server runs more than one (WEB_CONCURRENCY > 1).
+"""
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlencode
+
+from dotenv import load_dotenv
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from src.database import summaries
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+CACHE_URL = os.getenv("CACHE_URL")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES") or 1024)
+# Upper bound on an entry's age, as a safety net for writes made outside the app
+CACHE_TTL = int(os.getenv("CACHE_TTL") or 300)
+# Worker processes serving the app; gunicorn.conf.py sets it to the actual count
+WORKERS = int(os.getenv("WEB_CONCURRENCY") or 1)
+
+# Topics and the summary ids that scope them
+ACQUISITION_COST = "acquisition_cost"  # keyed by purchase_id
+LOANS = "loans"  # keyed by loan_id
+
+
+class MemoryBackend:
+    """Thread-safe LRU of encoded responses, plus generation counters."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, expires = entry
+            if expires and expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def set(self, key: str, body: bytes) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._entries[key] = (body, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, tag: str) -> int:
+        with self._lock:
+            return self._generations.get(tag, 0)
+
+    def bump(self, *tags: str) -> None:
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Entries and generations kept in Redis, so every worker sees the same invalidations."""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: int = CACHE_TTL, prefix: str = "proppulse:cache:"):
+        import redis  # optional dependency
+
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, body: bytes) -> None:
+        # Redis evicts by its own maxmemory policy; the TTL bounds staleness
+        self._client.set(self.prefix + key, body, ex=self.ttl or None)
+
+    def generation(self, tag: str) -> int:
+        return int(self._client.get(f"{self.prefix}gen:{tag}") or 0)
+
+    def bump(self, *tags: str) -> None:
+        pipeline = self._client.pipeline()
+        for tag in tags:
+            pipeline.incr(f"{self.prefix}gen:{tag}")
+        pipeline.execute()
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def size(self) -> int:
+        generations = f"{self.prefix}gen:".encode()
+        return sum(
+            1
+            for key in self._client.scan_iter(match=self.prefix + "*")
+            if not key.startswith(generations)
+        )
+
+
+class ResponseCache:
+    """Caches endpoint responses and counts hits and misses per endpoint."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {"hits": 0, "misses": 0, "errors": 0})
+            counters[outcome] += 1
+
+    def _key(self, topic: str, endpoint: str, scope: Optional[str], params: dict) -> str:
+        value = params.get(scope) if scope else None
+        tag = f"{topic}:{scope}={value}" if value is not None else topic
+        generation = self.backend.generation(tag)
+        return f"{endpoint}?{urlencode(sorted(params.items()))}#{tag}@{generation}"
+
+    def lookup(self, topic: str, endpoint: str, scope: Optional[str], params: dict):
+        """Return (key, cached body or None); a backend failure is treated as a miss."""
+        try:
+            key = self._key(topic, endpoint, scope, params)
+            body = self.backend.get(key)
+        except Exception as e:
+            logger.warning("Cache lookup failed for %s: %s", endpoint, e)
+            self._count(endpoint, "errors")
+            return None, None
+        self._count(endpoint, "hits" if body is not None else "misses")
+        return key, body
+
+    def store(self, key: Optional[str], body: bytes) -> None:
+        if key is None:
+            return
+        try:
+            self.backend.set(key, body)
+        except Exception as e:
+            logger.warning("Cache store failed for %s: %s", key, e)
+
+    def invalidate(self, purchase_ids=(), loan_ids=()) -> None:
+        """Retire cached responses built from these purchases and loans."""
+        if not self.enabled:
+            return
+        tags = []
+        if purchase_ids:
+            tags.append(ACQUISITION_COST)
+            tags.extend(f"{ACQUISITION_COST}:purchase_id={i}" for i in purchase_ids)
+        if loan_ids:
+            tags.append(LOANS)
+            tags.extend(f"{LOANS}:loan_id={i}" for i in loan_ids)
+        if not tags:
+            return
+        try:
+            self.backend.bump(*tags)
+        except Exception as e:
+            # Entries still expire after CACHE_TTL
+            logger.error("Cache invalidation failed: %s", e)
+
+    def clear(self) -> None:
+        if self.enabled:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters per endpoint and in total, for the diagnostics endpoint."""
+        with self._lock:
+            endpoints = {name: dict(counters) for name, counters in self._counters.items()}
+        hits = sum(c["hits"] for c in endpoints.values())
+        misses = sum(c["misses"] for c in endpoints.values())
+        stats = {
+            "backend": self.backend.name if self.enabled else None,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "endpoints": endpoints,
+        }
+        if self.enabled:
+            try:
+                stats["entries"] = self.backend.size()
+            except Exception:
+                stats["entries"] = None
+        return stats
+
+    def cached(
+        self,
+        topic: str,
+        response_type: Any,
+        scope: Optional[str] = None,
+        defaults: Optional[Dict[str, Callable[[], Any]]] = None,
+    ) -> Callable:
+        """
+        Decorate an endpoint to cache its JSON response.
+        The key covers the endpoint's scalar parameters; `scope` names the parameter
+        (purchase_id or loan_id) that narrows which writes invalidate the entry.
+        `defaults` maps a parameter whose omitted value depends on when it is asked
+        (e.g. today's date) to a function resolving it; the resolved value is passed
+        to the endpoint and is part of the key.
+        `response_type` must match the route's response_model, since cached bodies
+        are returned as-is. The endpoint must read from the primary (get_db or
+        get_async_db): a replica may not have replayed the writes the current
+        generation already accounts for, and its result would be cached as current.
+        """
+        adapter = TypeAdapter(response_type)
+
+        def resolve(kwargs: dict) -> dict:
+            for name, default in (defaults or {}).items():
+                if kwargs.get(name) is None:
+                    kwargs[name] = default()
+            return kwargs
+
+        def params_of(kwargs: dict) -> dict:
+            # Query parameters only; injected sessions and requests aren't part of the key
+            return {
+                name: value
+                for name, value in kwargs.items()
+                if value is not None and isinstance(value, (str, int, float, bool))
+            }
+
+        def respond(body: bytes, outcome: str) -> Response:
+            return Response(
+                content=body, media_type="application/json", headers={"X-Cache": outcome}
+            )
+
+        def encode(result) -> bytes:
+            return adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+
+        def decorator(func: Callable) -> Callable:
+            endpoint = func.__name__
+
+            if asyncio.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    kwargs = resolve(kwargs)
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    key, body = self.lookup(topic, endpoint, scope, params_of(kwargs))
+                    if body is not None:
+                        return respond(body, "HIT")
+                    body = encode(await func(*args, **kwargs))
+                    self.store(key, body)
+                    return respond(body, "MISS")
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                kwargs = resolve(kwargs)
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                key, body = self.lookup(topic, endpoint, scope, params_of(kwargs))
+                if body is not None:
+                    return respond(body, "HIT")
+                body = encode(func(*args, **kwargs))
+                self.store(key, body)
+                return respond(body, "MISS")
+
+            return wrapper
+
+        return decorator
+
+
+def create_backend(kind: str = CACHE_BACKEND, url: Optional[str] = CACHE_URL, workers: int = WORKERS):
+    """Backend selected by CACHE_BACKEND; None disables caching."""
+    if kind in ("none", "off", "disabled"):
+        return None
+    if kind == "redis":
+        if not url:
+            raise ValueError("CACHE_URL must be set when CACHE_BACKEND=redis")
+        return RedisBackend(url)
+    if kind != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND: {kind}")
+    if workers > 1:
+        logger.warning(
+            "Response cache is off: CACHE_BACKEND=memory isn't shared by %d worker processes, "
+            "set CACHE_BACKEND=redis to cache",
+            workers,
+        )
+        return None
+    return MemoryBackend()
+
+
+response_cache = ResponseCache(create_backend())
+
+
+@summaries.on_change
+def _invalidate_summaries(purchase_ids: set, loan_ids: set) -> None:
+    response_cache.invalidate(purchase_ids, loan_ids)
@@ -1,8 +1,11 @@
+import time
 import click
-from .base import engine, get_db
-from .scripts import init_construction_status, init_example_user, init_views
-# from .views import *
+from .base import engine, async_engine, SessionLocal, get_db, get_async_db
+from .pool import pool_stats, warm_up, warm_up_async
+from .replicas import get_read_db, get_async_read_db
+from .scripts import init_construction_status, init_example_user
 from .models import *
+from . import views, summaries, balances, imports, statements, versions, replicas, synthetic
 
 
 def init():
@@ -13,7 +16,6 @@ def init():
     print("Initializing example data...")
     init_example_user()
     init_construction_status()
-    # init_views()
     print("Example data initialized successfully!")
 
 
@@ -27,9 +29,145 @@ def initialise():
     """Initialize the database with tables and example data"""
     init()
 
+
+@cli.command(name="refresh-summaries")
+def refresh_summaries():
+    """Rebuild the acquisition cost and loan repayment summary tables"""
+    db = SessionLocal()
+    try:
+        summaries.refresh_all(db)
+        db.commit()
+        print("Summary tables refreshed successfully!")
+    finally:
+        db.close()
+
+
+@cli.command(name="reconcile-totals")
+def reconcile_totals():
+    """Rebuild stored invoice and loan totals from the payment and repayment rows"""
+    db = SessionLocal()
+    try:
+        invoices = balances.refresh_invoice_paid_amounts(db)
+        loans = balances.refresh_loan_totals(db)
+        db.commit()
+        print(f"Reconciled totals: {invoices} invoice(s) and {loans} loan(s) corrected.")
+    finally:
+        db.close()
+
+@cli.command(name="import-payments")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(imports.FORMATS), help="File format; guessed from the extension if omitted")
+@click.option("--user-id", default=1, show_default=True, help="Owner of the imported payments")
+@click.option("--batch-size", default=imports.BATCH_SIZE, show_default=True, help="Rows validated and written per round trip")
+@click.option("--dry-run", is_flag=True, help="Validate the file without writing anything")
+def import_payments(path, fmt, user_id, batch_size, dry_run):
+    """Bulk import payments from a CSV or JSON file"""
+    fmt = fmt or imports.detect_format(filename=path)
+    db = SessionLocal()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            result = imports.import_payments(
+                db,
+                imports.iter_records(stream, fmt),
+                user_id=user_id,
+                batch_size=batch_size,
+                dry_run=dry_run,
+            )
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        for error in result["errors"]:
+            print(f"Row {error['row']}: {error['error']}")
+        verb = "Validated" if dry_run else "Imported"
+        print(f"{verb} {result['imported']} payment(s), {len(result['errors'])} row(s) rejected.")
+    finally:
+        db.close()
+
+@cli.command(name="import-statement")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--loan-id", type=int, required=True, help="Loan the repayments are made against")
+@click.option("--source-id", type=int, required=True, help="Payment source (bank account) the EMIs are debited from")
+@click.option("--match", help="Only import lines whose narration contains this text, e.g. the loan account number")
+@click.option("--payment-mode", default="online", show_default=True)
+@click.option("--batch-size", default=imports.BATCH_SIZE, show_default=True, help="Rows checked and written per round trip")
+@click.option("--dry-run", is_flag=True, help="Validate the statement without writing anything")
+def import_statement(path, loan_id, source_id, match, payment_mode, batch_size, dry_run):
+    """Create loan repayments from a bank statement CSV export"""
+    db = SessionLocal()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            result = statements.import_statement(
+                db,
+                statements.iter_statement(stream),
+                loan_id,
+                source_id,
+                match=match,
+                payment_mode=payment_mode,
+                batch_size=batch_size,
+                dry_run=dry_run,
+            )
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        for error in result["errors"]:
+            print(f"Row {error['row']}: {error['error']}")
+        verb = "Validated" if dry_run else "Imported"
+        print(
+            f"{verb} {result['imported']} repayment(s), {result['skipped']} already imported, "
+            f"{len(result['errors'])} row(s) rejected."
+        )
+    finally:
+        db.close()
+
+@cli.command(name="generate")
+@click.option("--users", default=10, show_default=True, help="Users to create")
+@click.option("--properties", default=5, show_default=True, help="Properties (and purchases) per user")
+@click.option("--invoices", default=10, show_default=True, help="Invoices in each purchase's payment plan")
+@click.option("--payments-per-invoice", default=3, show_default=True, help="Payments made against each invoice that has been paid")
+@click.option("--seed", default=0, show_default=True, help="Random seed; the same seed produces the same data")
+@click.option("--batch-size", default=synthetic.BATCH_SIZE, show_default=True, help="Payments buffered per write")
+def generate(users, properties, invoices, payments_per_invoice, seed, batch_size):
+    """Fill the database with a seeded synthetic portfolio for scale testing"""
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counts = synthetic.generate(
+            db,
+            users,
+            properties,
+            invoices=invoices,
+            payments_per_invoice=payments_per_invoice,
+            seed=seed,
+            batch_size=batch_size,
+        )
+        db.commit()
+        elapsed = time.perf_counter() - started
+        for table, count in counts.items():
+            print(f"{table}: {count}")
+        print(f"Generated {sum(counts.values())} row(s) in {elapsed:.1f}s.")
+    finally:
+        db.close()
+
 __all__ = [
     "engine",
+    "async_engine",
     "get_db",
+    "get_async_db",
+    "get_read_db",
+    "get_async_read_db",
+    "pool_stats",
+    "warm_up",
+    "warm_up_async",
     "models",
+    "views",
+    "summaries",
+    "balances",
+    "imports",
+    "statements",
+    "versions",
+    "replicas",
+    "synthetic",
     "init",
 ]
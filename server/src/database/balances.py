@@ -0,0 +1,146 @@
+"""Running totals stored on parent rows and kept current by the write paths.
+
+Each helper issues a single UPDATE so the new total is computed by the database
+inside the caller's transaction, rather than re-summing child rows in Python.
+"""
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from . import versions
+from .models import Invoice, Loan, LoanRepayment, Payment, PaymentSource
+
+# Statuses that are set by hand and never derived from payments
+MANUAL_INVOICE_STATUSES = ("cancelled",)
+
+
+def invoice_status(current: Optional[str], paid_amount, amount) -> str:
+    """Status implied by an invoice's paid amount."""
+    if current in MANUAL_INVOICE_STATUSES:
+        return current
+    paid_amount = paid_amount or Decimal("0")
+    if amount is not None and paid_amount >= amount:
+        return "paid"
+    if paid_amount > 0:
+        return "partially_paid"
+    return "pending"
+
+
+def _invoice_status_expr(paid_amount):
+    return case(
+        (Invoice.status.in_(MANUAL_INVOICE_STATUSES), Invoice.status),
+        (paid_amount >= Invoice.amount, "paid"),
+        (paid_amount > 0, "partially_paid"),
+        else_="pending",
+    )
+
+
+def apply_invoice_payment(db: Session, invoice_id: Optional[int], delta) -> None:
+    """Add `delta` to an invoice's paid amount and re-derive its status."""
+    if invoice_id is None or not delta:
+        return
+    paid_amount = func.coalesce(Invoice.paid_amount, 0) + delta
+    versions.mark(db, Invoice.__tablename__)
+    db.execute(
+        update(Invoice)
+        .where(Invoice.id == invoice_id)
+        .values(paid_amount=paid_amount, status=_invoice_status_expr(paid_amount))
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+def refresh_invoice_paid_amounts(
+    db: Session, invoice_ids: Optional[Iterable[int]] = None
+) -> int:
+    """Recompute paid amounts from the payments table; all invoices when ids is None.
+
+    Returns the number of invoices whose stored paid amount or status was out of date.
+    """
+    paid_amount = func.coalesce(
+        select(func.sum(Payment.amount))
+        .where(Payment.invoice_id == Invoice.id)
+        .scalar_subquery(),
+        0,
+    )
+    status = _invoice_status_expr(paid_amount)
+    stmt = (
+        update(Invoice)
+        .where(
+            Invoice.paid_amount.is_distinct_from(paid_amount)
+            | Invoice.status.is_distinct_from(status)
+        )
+        .values(paid_amount=paid_amount, status=status)
+    )
+    if invoice_ids is not None:
+        stmt = stmt.where(Invoice.id.in_(set(invoice_ids)))
+    versions.mark(db, Invoice.__tablename__)
+    return db.execute(stmt.execution_options(synchronize_session="fetch")).rowcount
+
+
+def apply_loan_disbursement(db: Session, source_id: Optional[int], delta) -> None:
+    """Add `delta` to the disbursed total of the loan behind a payment source, if any."""
+    if source_id is None or not delta:
+        return
+    loan_id = (
+        select(PaymentSource.loan_id)
+        .where(PaymentSource.id == source_id)
+        .scalar_subquery()
+    )
+    versions.mark(db, Loan.__tablename__)
+    db.execute(
+        update(Loan)
+        .where(Loan.id == loan_id)
+        .values(disbursed_to_date=func.coalesce(Loan.disbursed_to_date, 0) + delta)
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+def apply_loan_repayment(db: Session, loan_id: Optional[int], delta) -> None:
+    """Add `delta` to a loan's repaid principal."""
+    if loan_id is None or not delta:
+        return
+    versions.mark(db, Loan.__tablename__)
+    db.execute(
+        update(Loan)
+        .where(Loan.id == loan_id)
+        .values(principal_repaid=func.coalesce(Loan.principal_repaid, 0) + delta)
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+def refresh_loan_totals(db: Session, loan_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute disbursed and repaid totals from the raw rows; all loans when ids is None.
+
+    Returns the number of loans whose stored totals were out of date.
+    """
+    disbursed = func.coalesce(
+        select(func.sum(Payment.amount))
+        .join(PaymentSource, Payment.source_id == PaymentSource.id)
+        .where(PaymentSource.loan_id == Loan.id)
+        .scalar_subquery(),
+        0,
+    )
+    repaid = func.coalesce(
+        select(func.sum(LoanRepayment.principal_amount))
+        .where(LoanRepayment.loan_id == Loan.id)
+        .scalar_subquery(),
+        0,
+    )
+    stmt = (
+        update(Loan)
+        .where(
+            Loan.disbursed_to_date.is_distinct_from(disbursed)
+            | Loan.principal_repaid.is_distinct_from(repaid)
+        )
+        .values(disbursed_to_date=disbursed, principal_repaid=repaid)
+    )
+    if loan_ids is not None:
+        loan_ids = set(loan_ids)
+        stmt = stmt.where(Loan.id.in_(loan_ids))
+        # The UPDATE locks rows in whatever order it visits them; take the locks in id
+        # order first so batches touching the same loans can't deadlock
+        db.execute(select(Loan.id).where(Loan.id.in_(loan_ids)).order_by(Loan.id).with_for_update())
+    versions.mark(db, Loan.__tablename__)
+    return db.execute(stmt.execution_options(synchronize_session="fetch")).rowcount
@@ -0,0 +1,284 @@
+"""Bulk import of payments from CSV or JSON files.
+
+Rows are parsed lazily from the file and handled in batches: each batch looks up
+its invoices and payment sources with one query apiece, validates every row
+against them, and writes the valid rows with a single COPY (PostgreSQL) or
+executemany INSERT. Stored invoice/loan totals and the summary tables are brought
+up to date once per batch, and the whole import runs in the caller's transaction.
+"""
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from . import balances, summaries, versions
+from .models import Invoice, Payment, PaymentSource
+
+# Rows validated and written per round trip
+BATCH_SIZE = 1000
+
+FORMATS = ("csv", "json")
+
+PAYMENT_COLUMNS = [
+    "user_id",
+    "purchase_id",
+    "invoice_id",
+    "source_id",
+    "payment_date",
+    "amount",
+    "payment_mode",
+    "transaction_reference",
+    "receipt_date",
+    "receipt_number",
+    "notes",
+]
+
+REQUIRED_FIELDS = ("invoice_id", "payment_date", "amount", "source_id", "payment_mode")
+
+
+class RowError(ValueError):
+    """A row that can't be imported; the message ends up in the import report."""
+
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    """Guess the file format from a file name or content type, defaulting to CSV."""
+    hint = f"{filename or ''} {content_type or ''}".lower()
+    return "json" if "json" in hint else "csv"
+
+
+def iter_records(stream: IO[str], fmt: str) -> Iterator[dict]:
+    """Yield one dict per record of a CSV file, JSON array or JSON Lines file."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "json":
+        yield from _iter_json(stream)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _iter_json(stream: IO[str], chunk_size: int = 64 * 1024) -> Iterator[dict]:
+    """Decode top-level objects one at a time, whether wrapped in an array or one per line."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+    while True:
+        # Skip whitespace and the array punctuation between objects
+        position = 0
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            position += 1
+        buffer = buffer[position:]
+        try:
+            record, end = decoder.raw_decode(buffer) if buffer else (None, 0)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            record, end = None, 0
+        if end:
+            yield record
+            buffer = buffer[end:]
+            continue
+        if eof:
+            return
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _int(record: dict, field: str) -> Optional[int]:
+    value = record.get(field)
+    if _blank(value):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{field} must be an integer")
+
+
+def _decimal(record: dict, field: str) -> Optional[Decimal]:
+    value = record.get(field)
+    if _blank(value):
+        return None
+    try:
+        # str() keeps JSON floats from picking up binary rounding noise
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise RowError(f"{field} must be a number")
+    if not number.is_finite():
+        raise RowError(f"{field} must be a number")
+    return number
+
+
+def _date(record: dict, field: str) -> Optional[date]:
+    value = record.get(field)
+    if _blank(value):
+        return None
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise RowError(f"{field} must be a date in YYYY-MM-DD format")
+
+
+def _str(record: dict, field: str) -> Optional[str]:
+    value = record.get(field)
+    return None if _blank(value) else str(value).strip()
+
+
+def parse_payment(record: dict) -> dict:
+    """Convert a raw record into payment column values, raising RowError if invalid."""
+    if not isinstance(record, dict):
+        raise RowError("Record must be an object")
+    missing = [field for field in REQUIRED_FIELDS if _blank(record.get(field))]
+    if missing:
+        raise RowError(f"Missing required field(s): {', '.join(missing)}")
+    payment = {
+        "invoice_id": _int(record, "invoice_id"),
+        "source_id": _int(record, "source_id"),
+        "payment_date": _date(record, "payment_date"),
+        "amount": _decimal(record, "amount"),
+        "payment_mode": _str(record, "payment_mode"),
+        "transaction_reference": _str(record, "transaction_reference"),
+        "receipt_date": _date(record, "receipt_date"),
+        "receipt_number": _str(record, "receipt_number"),
+        "notes": _str(record, "notes"),
+    }
+    if payment["amount"] <= 0:
+        raise RowError("Payment amount must be greater than 0")
+    return payment
+
+
+def batched(records: Iterable, size: int) -> Iterator[List[Tuple[int, object]]]:
+    """Group records into lists of (row number, record), numbering rows from 1."""
+    batch = []
+    for row_number, record in enumerate(records, start=1):
+        batch.append((row_number, record))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_payments(
+    db: Session,
+    records: Iterable[dict],
+    user_id: int = 1,
+    batch_size: int = BATCH_SIZE,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Validate and insert payments from an iterable of raw records.
+    Valid rows are written even when others fail; the caller commits or rolls back.
+    Returns {"imported": count, "errors": [{"row": n, "error": message}, ...]}.
+    """
+    imported = 0
+    errors = []
+    # Remaining balance per invoice, carried across batches so repeated
+    # payments against one invoice are checked against each other
+    remaining = {}
+
+    for batch in batched(records, batch_size):
+        parsed = []
+        for row_number, record in batch:
+            try:
+                parsed.append((row_number, parse_payment(record)))
+            except RowError as e:
+                errors.append({"row": row_number, "error": str(e)})
+
+        invoice_ids = {payment["invoice_id"] for _, payment in parsed}
+        source_ids = {payment["source_id"] for _, payment in parsed}
+        # Lock the invoices so concurrent payment writes see the imported amounts,
+        # in id order so two imports sharing invoices can't deadlock
+        invoices = {
+            row.id: row
+            for row in db.execute(
+                select(Invoice.id, Invoice.purchase_id, Invoice.amount, Invoice.paid_amount)
+                .where(Invoice.id.in_(invoice_ids))
+                .order_by(Invoice.id)
+                .with_for_update()
+            )
+        }
+        sources = {
+            row.id: row
+            for row in db.execute(
+                select(PaymentSource.id, PaymentSource.loan_id).where(
+                    PaymentSource.id.in_(source_ids)
+                )
+            )
+        }
+
+        rows = []
+        for row_number, payment in parsed:
+            invoice = invoices.get(payment["invoice_id"])
+            if invoice is None:
+                errors.append({"row": row_number, "error": "Invoice not found"})
+                continue
+            if payment["source_id"] not in sources:
+                errors.append({"row": row_number, "error": "Payment source not found"})
+                continue
+            balance = remaining.setdefault(
+                invoice.id, invoice.amount - (invoice.paid_amount or 0)
+            )
+            if payment["amount"] > balance:
+                errors.append(
+                    {"row": row_number, "error": "Payment amount exceeds invoice's balance amount"}
+                )
+                continue
+            remaining[invoice.id] = balance - payment["amount"]
+            rows.append(dict(payment, user_id=user_id, purchase_id=invoice.purchase_id))
+
+        imported += len(rows)
+        if not rows or dry_run:
+            continue
+
+        _write_payments(db, rows)
+        versions.mark(db, Payment.__tablename__)
+
+        balances.refresh_invoice_paid_amounts(db, {row["invoice_id"] for row in rows})
+        loan_ids = {
+            sources[row["source_id"]].loan_id
+            for row in rows
+            if sources[row["source_id"]].loan_id is not None
+        }
+        if loan_ids:
+            balances.refresh_loan_totals(db, loan_ids)
+        summaries.mark_purchases(db, {row["purchase_id"] for row in rows})
+
+    return {"imported": imported, "errors": errors}
+
+
+def _write_payments(db: Session, rows: List[dict]) -> None:
+    """Insert payment rows with COPY where the driver supports it, else executemany."""
+    write_rows(db, Payment, PAYMENT_COLUMNS, [[row[column] for column in PAYMENT_COLUMNS] for row in rows])
+
+
+def write_rows(db: Session, model, columns: List[str], rows: List[list]) -> None:
+    """Insert rows of values (in `columns` order) with COPY on psycopg2, else executemany."""
+    if not rows:
+        return
+    connection = db.connection()
+    if connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            ["\\N" if value is None else value for value in row] for row in rows
+        )
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {model.__tablename__} ({', '.join(columns)}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        finally:
+            cursor.close()
+    else:
+        db.execute(insert(model), [dict(zip(columns, row)) for row in rows])
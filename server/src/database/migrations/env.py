@@ -28,7 +28,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 # add your model's MetaData object here
 # for 'autogenerate' support
 from database.base import Base
-from database.models import User, Property, Purchase, Loan, Invoice, Payment, Document, PaymentSource, LoanRepayment, ConstructionStatus
+from database.models import User, Property, Purchase, Loan, Invoice, Payment, Document, PaymentSource, LoanRepayment, ConstructionStatus, CollectionVersion, CollectionChange
+from database.views import AcquisitionCostSummary, LoanRepaymentSummary
 
 # Set the target metadata to the Base metadata for autogenerate support
 target_metadata = Base.metadata
@@ -0,0 +1,70 @@
+"""Add foreign key and date indexes
+
+Revision ID: ba5943aaaf84
+Revises: afc7858f2028
+Create Date: 2026-10-17 09:30:12.418236
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ba5943aaaf84'
+down_revision: Union[str, None] = 'afc7858f2028'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) -- kept in sync with __table_args__/index=True in models.py
+INDEXES = [
+    # Foreign keys
+    ('ix_purchases_property_id', 'purchases', ['property_id']),
+    ('ix_purchases_user_id', 'purchases', ['user_id']),
+    ('ix_loans_purchase_id', 'loans', ['purchase_id']),
+    ('ix_loans_user_id', 'loans', ['user_id']),
+    ('ix_payments_user_id', 'payments', ['user_id']),
+    ('ix_payments_source_id', 'payments', ['source_id']),
+    ('ix_payments_invoice_id', 'payments', ['invoice_id']),
+    ('ix_documents_property_id', 'documents', ['property_id']),
+    ('ix_documents_purchase_id', 'documents', ['purchase_id']),
+    ('ix_payment_sources_user_id', 'payment_sources', ['user_id']),
+    ('ix_payment_sources_loan_id', 'payment_sources', ['loan_id']),
+    ('ix_loan_repayments_source_id', 'loan_repayments', ['source_id']),
+    # Foreign key + date range filters
+    ('ix_payments_purchase_id_payment_date', 'payments', ['purchase_id', 'payment_date']),
+    ('ix_invoices_purchase_id_invoice_date', 'invoices', ['purchase_id', 'invoice_date']),
+    ('ix_loan_repayments_loan_id_payment_date', 'loan_repayments', ['loan_id', 'payment_date']),
+    # Default list ordering
+    ('ix_purchases_purchase_date', 'purchases', ['purchase_date']),
+    ('ix_payments_payment_date_id', 'payments', [sa.text('payment_date DESC'), sa.text('id DESC')]),
+    ('ix_invoices_invoice_date_id', 'invoices', [sa.text('invoice_date DESC'), sa.text('id DESC')]),
+    ('ix_loan_repayments_payment_date_id', 'loan_repayments', [sa.text('payment_date DESC'), sa.text('id DESC')]),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, and
+    # avoids locking the tables against writes while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,238 @@
+"""Acquisition cost and loan repayment summary tables
+
+Revision ID: f2b00ec49a7b
+Revises: ba5943aaaf84
+Create Date: 2026-10-17 10:15:47.902115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b00ec49a7b'
+down_revision: Union[str, None] = 'ba5943aaaf84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Views previously created by scripts.init_views()
+LEGACY_VIEWS = [
+    'purchase_payment_details',
+    'purchase_summary',
+    'loan_repayment_summary',
+    'loan_repayment_details',
+    'acquisition_cost_summary',
+    'acquisition_cost_details',
+]
+
+ACQUISITION_COST_DETAILS_VIEW = """
+CREATE VIEW acquisition_cost_details AS
+-- Loan repayments made towards the purchase
+SELECT
+    l.user_id,
+    l.purchase_id,
+    'Loan Repayment' AS type,
+    r.id AS entry_id,
+    r.payment_date,
+    r.principal_amount AS principal,
+    r.interest_amount AS interest,
+    r.total_payment - (r.principal_amount + r.interest_amount) AS others,
+    r.total_payment AS payment,
+    s.name AS source,
+    r.payment_mode AS mode,
+    r.transaction_reference AS reference
+FROM loan_repayments AS r
+JOIN loans AS l ON r.loan_id = l.id
+JOIN payment_sources AS s ON r.source_id = s.id
+UNION ALL
+-- Direct (non-loan) payments to the developer
+SELECT
+    p.user_id,
+    p.purchase_id,
+    'Direct Payment' AS type,
+    p.id AS entry_id,
+    p.payment_date,
+    p.amount AS principal,
+    0 AS interest,
+    0 AS others,
+    p.amount AS payment,
+    s.name AS source,
+    p.payment_mode AS mode,
+    p.transaction_reference AS reference
+FROM payments AS p
+JOIN payment_sources AS s ON p.source_id = s.id
+WHERE s.source_type <> 'loan'
+"""
+
+LOAN_REPAYMENT_DETAILS_VIEW = """
+CREATE VIEW loan_repayment_details AS
+SELECT
+    l.user_id,
+    l.id AS loan_id,
+    r.id AS repayment_id,
+    l.name AS loan_name,
+    l.sanction_amount AS loan_sanctioned_amount,
+    l.total_disbursed_amount AS loan_disbursed_amount,
+    l.sanction_amount - l.total_disbursed_amount AS loan_outstanding_amount,
+    r.payment_date,
+    r.principal_amount,
+    r.interest_amount,
+    r.other_fees,
+    r.penalties,
+    r.total_payment AS amount,
+    SUM(r.principal_amount) OVER w AS total_principal_paid,
+    SUM(r.total_payment) OVER w AS total_paid,
+    l.total_disbursed_amount - SUM(r.principal_amount) OVER w AS principal_balance
+FROM loan_repayments AS r
+JOIN loans AS l ON r.loan_id = l.id
+WINDOW w AS (PARTITION BY l.id ORDER BY r.payment_date, r.id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+"""
+
+BACKFILL_ACQUISITION_COST_SUMMARY = """
+INSERT INTO acquisition_cost_summary (
+    purchase_id, user_id, property_name,
+    total_loan_principal, total_loan_interest, total_loan_others, total_loan_payment,
+    total_builder_principal, total_builder_payment,
+    total_principal_payment, total_payment, total_sale_cost, remaining_balance
+)
+WITH loan_totals AS (
+    SELECT
+        l.purchase_id,
+        SUM(r.principal_amount) AS principal,
+        SUM(r.interest_amount) AS interest,
+        SUM(r.total_payment - r.principal_amount - r.interest_amount) AS others,
+        SUM(r.total_payment) AS payment
+    FROM loan_repayments AS r
+    JOIN loans AS l ON r.loan_id = l.id
+    GROUP BY l.purchase_id
+), builder_totals AS (
+    SELECT p.purchase_id, SUM(p.amount) AS payment
+    FROM payments AS p
+    JOIN payment_sources AS s ON p.source_id = s.id
+    WHERE s.source_type <> 'loan'
+    GROUP BY p.purchase_id
+)
+SELECT
+    pu.id,
+    pu.user_id,
+    pr.name,
+    COALESCE(lt.principal, 0),
+    COALESCE(lt.interest, 0),
+    COALESCE(lt.others, 0),
+    COALESCE(lt.payment, 0),
+    COALESCE(bt.payment, 0),
+    COALESCE(bt.payment, 0),
+    COALESCE(lt.principal, 0) + COALESCE(bt.payment, 0),
+    COALESCE(lt.payment, 0) + COALESCE(bt.payment, 0),
+    pu.total_sale_cost,
+    pu.total_sale_cost - COALESCE(bt.payment, 0) - COALESCE(lt.principal, 0)
+FROM purchases AS pu
+LEFT JOIN properties AS pr ON pu.property_id = pr.id
+LEFT JOIN loan_totals AS lt ON lt.purchase_id = pu.id
+LEFT JOIN builder_totals AS bt ON bt.purchase_id = pu.id
+"""
+
+BACKFILL_LOAN_REPAYMENT_SUMMARY = """
+INSERT INTO loan_repayment_summary (
+    loan_id, user_id, loan_name, property_name,
+    loan_sanctioned_amount, loan_disbursed_amount,
+    total_principal_paid, total_interest_paid, total_other_fees, total_penalties,
+    total_amount_paid, total_payments, last_repayment_date, principal_balance
+)
+WITH repayment_totals AS (
+    SELECT
+        loan_id,
+        SUM(principal_amount) AS principal,
+        SUM(interest_amount) AS interest,
+        SUM(other_fees) AS other_fees,
+        SUM(penalties) AS penalties,
+        SUM(total_payment) AS total,
+        COUNT(id) AS payments,
+        MAX(payment_date) AS last_date
+    FROM loan_repayments
+    GROUP BY loan_id
+)
+SELECT
+    l.id,
+    l.user_id,
+    l.name,
+    pr.name,
+    l.sanction_amount,
+    l.total_disbursed_amount,
+    COALESCE(rt.principal, 0),
+    COALESCE(rt.interest, 0),
+    COALESCE(rt.other_fees, 0),
+    COALESCE(rt.penalties, 0),
+    COALESCE(rt.total, 0),
+    COALESCE(rt.payments, 0),
+    rt.last_date,
+    COALESCE(l.total_disbursed_amount, 0) - COALESCE(rt.principal, 0)
+FROM loans AS l
+LEFT JOIN purchases AS pu ON l.purchase_id = pu.id
+LEFT JOIN properties AS pr ON pu.property_id = pr.id
+LEFT JOIN repayment_totals AS rt ON rt.loan_id = l.id
+"""
+
+
+def upgrade() -> None:
+    for view in LEGACY_VIEWS:
+        op.execute(f"DROP VIEW IF EXISTS {view}")
+
+    op.create_table('acquisition_cost_summary',
+    sa.Column('purchase_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('property_name', sa.String(), nullable=True),
+    sa.Column('total_loan_principal', sa.Numeric(), nullable=False),
+    sa.Column('total_loan_interest', sa.Numeric(), nullable=False),
+    sa.Column('total_loan_others', sa.Numeric(), nullable=False),
+    sa.Column('total_loan_payment', sa.Numeric(), nullable=False),
+    sa.Column('total_builder_principal', sa.Numeric(), nullable=False),
+    sa.Column('total_builder_payment', sa.Numeric(), nullable=False),
+    sa.Column('total_principal_payment', sa.Numeric(), nullable=False),
+    sa.Column('total_payment', sa.Numeric(), nullable=False),
+    sa.Column('total_sale_cost', sa.Numeric(), nullable=True),
+    sa.Column('remaining_balance', sa.Numeric(), nullable=True),
+    sa.ForeignKeyConstraint(['purchase_id'], ['purchases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('purchase_id')
+    )
+    op.create_index('ix_acquisition_cost_summary_user_id', 'acquisition_cost_summary', ['user_id'])
+
+    op.create_table('loan_repayment_summary',
+    sa.Column('loan_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('loan_name', sa.String(), nullable=True),
+    sa.Column('property_name', sa.String(), nullable=True),
+    sa.Column('loan_sanctioned_amount', sa.Numeric(), nullable=True),
+    sa.Column('loan_disbursed_amount', sa.Numeric(), nullable=True),
+    sa.Column('total_principal_paid', sa.Numeric(), nullable=False),
+    sa.Column('total_interest_paid', sa.Numeric(), nullable=False),
+    sa.Column('total_other_fees', sa.Numeric(), nullable=False),
+    sa.Column('total_penalties', sa.Numeric(), nullable=False),
+    sa.Column('total_amount_paid', sa.Numeric(), nullable=False),
+    sa.Column('total_payments', sa.Integer(), nullable=False),
+    sa.Column('last_repayment_date', sa.Date(), nullable=True),
+    sa.Column('principal_balance', sa.Numeric(), nullable=True),
+    sa.ForeignKeyConstraint(['loan_id'], ['loans.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('loan_id')
+    )
+    op.create_index('ix_loan_repayment_summary_user_id', 'loan_repayment_summary', ['user_id'])
+
+    # Row-level views stay plain views: filters on purchase/loan are pushed into
+    # each UNION ALL branch and served by the foreign key indexes
+    op.execute(ACQUISITION_COST_DETAILS_VIEW)
+    op.execute(LOAN_REPAYMENT_DETAILS_VIEW)
+
+    op.execute(BACKFILL_ACQUISITION_COST_SUMMARY)
+    op.execute(BACKFILL_LOAN_REPAYMENT_SUMMARY)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS loan_repayment_details")
+    op.execute("DROP VIEW IF EXISTS acquisition_cost_details")
+    op.drop_index('ix_loan_repayment_summary_user_id', table_name='loan_repayment_summary')
+    op.drop_table('loan_repayment_summary')
+    op.drop_index('ix_acquisition_cost_summary_user_id', table_name='acquisition_cost_summary')
+    op.drop_table('acquisition_cost_summary')
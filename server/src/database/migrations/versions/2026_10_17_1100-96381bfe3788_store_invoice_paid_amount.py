@@ -0,0 +1,50 @@
+"""Store invoice paid amount
+
+Revision ID: 96381bfe3788
+Revises: f2b00ec49a7b
+Create Date: 2026-10-17 11:00:36.571204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '96381bfe3788'
+down_revision: Union[str, None] = 'f2b00ec49a7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Backfill from the payments table; cancelled invoices keep their status
+    op.execute("""
+        UPDATE invoices AS i
+        SET paid_amount = COALESCE(p.total, 0),
+            status = CASE
+                WHEN i.status = 'cancelled' THEN i.status
+                WHEN COALESCE(p.total, 0) >= i.amount THEN 'paid'
+                WHEN COALESCE(p.total, 0) > 0 THEN 'partially_paid'
+                ELSE 'pending'
+            END
+        FROM invoices AS inv
+        LEFT JOIN (
+            SELECT invoice_id, SUM(amount) AS total
+            FROM payments
+            GROUP BY invoice_id
+        ) AS p ON p.invoice_id = inv.id
+        WHERE inv.id = i.id
+    """)
+    op.alter_column('invoices', 'paid_amount',
+               existing_type=sa.NUMERIC(),
+               nullable=False,
+               server_default='0')
+
+
+def downgrade() -> None:
+    op.alter_column('invoices', 'paid_amount',
+               existing_type=sa.NUMERIC(),
+               nullable=True,
+               server_default=None)
@@ -0,0 +1,44 @@
+"""Store loan disbursed and repaid totals
+
+Revision ID: b93921203022
+Revises: 96381bfe3788
+Create Date: 2026-10-17 11:40:09.214573
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b93921203022'
+down_revision: Union[str, None] = '96381bfe3788'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('loans', sa.Column('disbursed_to_date', sa.Numeric(precision=15, scale=2), server_default='0', nullable=False))
+    op.add_column('loans', sa.Column('principal_repaid', sa.Numeric(precision=15, scale=2), server_default='0', nullable=False))
+
+    # Backfill from the payment and repayment rows
+    op.execute("""
+        UPDATE loans AS l
+        SET disbursed_to_date = COALESCE((
+                SELECT SUM(p.amount)
+                FROM payments AS p
+                JOIN payment_sources AS s ON p.source_id = s.id
+                WHERE s.loan_id = l.id
+            ), 0),
+            principal_repaid = COALESCE((
+                SELECT SUM(r.principal_amount)
+                FROM loan_repayments AS r
+                WHERE r.loan_id = l.id
+            ), 0)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('loans', 'principal_repaid')
+    op.drop_column('loans', 'disbursed_to_date')
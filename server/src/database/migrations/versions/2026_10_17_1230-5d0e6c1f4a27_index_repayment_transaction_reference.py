@@ -0,0 +1,39 @@
+"""Index loan repayment transaction reference
+
+Revision ID: 5d0e6c1f4a27
+Revises: b93921203022
+Create Date: 2026-10-17 12:30:41.637102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0e6c1f4a27'
+down_revision: Union[str, None] = 'b93921203022'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Statement imports look up already-imported references in one IN (...) query
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_loan_repayments_transaction_reference',
+            'loan_repayments',
+            ['transaction_reference'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_loan_repayments_transaction_reference',
+            table_name='loan_repayments',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,47 @@
+"""Collection versions for conditional GETs
+
+Revision ID: e1a4b7c93d58
+Revises: 5d0e6c1f4a27
+Create Date: 2026-10-17 13:20:18.550634
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a4b7c93d58'
+down_revision: Union[str, None] = '5d0e6c1f4a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Seeded up front so concurrent first writes never race to insert the same row
+TABLES = [
+    'users',
+    'construction_status',
+    'properties',
+    'purchases',
+    'loans',
+    'invoices',
+    'payments',
+    'documents',
+    'payment_sources',
+    'loan_repayments',
+]
+
+
+def upgrade() -> None:
+    collection_versions = op.create_table('collection_versions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(collection_versions, [{'name': name, 'version': 0} for name in TABLES])
+
+
+def downgrade() -> None:
+    op.drop_table('collection_versions')
@@ -0,0 +1,33 @@
+"""Record collection changes as rows instead of locking the counters
+
+Revision ID: 7c2e9a41d6b3
+Revises: e1a4b7c93d58
+Create Date: 2026-10-17 14:00:12.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9a41d6b3'
+down_revision: Union[str, None] = 'e1a4b7c93d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('collection_changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_collection_changes_name'), 'collection_changes', ['name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_collection_changes_name'), table_name='collection_changes')
+    op.drop_table('collection_changes')
@@ -10,6 +10,7 @@ from sqlalchemy import (
     ARRAY,
     Boolean,
     Computed,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -89,8 +90,8 @@ class Purchase(Base):
     __tablename__ = "purchases"
 
     id = Column(Integer, primary_key=True, index=True)
-    property_id = Column(Integer, ForeignKey("properties.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    property_id = Column(Integer, ForeignKey("properties.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
     carpet_area = Column(Numeric)
     exclusive_area = Column(Numeric)
@@ -114,7 +115,7 @@ class Purchase(Base):
     total_cost = Column(Numeric,Computed("base_cost + other_charges + gst"), nullable=False)
     total_sale_cost = Column(Numeric, Computed("base_cost+ other_charges + ifms + lease_rent + amc + gst"), nullable=False)
 
-    purchase_date = Column(Date, nullable=False)
+    purchase_date = Column(Date, nullable=False, index=True)
     registration_date = Column(Date)
     possession_date = Column(Date)
 
@@ -137,8 +138,8 @@ class Loan(Base):
     __tablename__ = "loans"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    purchase_id = Column(Integer, ForeignKey("purchases.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    purchase_id = Column(Integer, ForeignKey("purchases.id"), nullable=False, index=True)
 
     # Basic loan information
     name = Column(String, nullable=False)  # TODO: This has to be changed to loan number
@@ -162,6 +163,15 @@ class Loan(Base):
     is_active = Column(Boolean, default=True) #TODO: Make this this computed, to be active if disbured amount is less than sanction amount
     total_disbursed_amount = Column(Numeric(precision=15, scale=2), default=0)
 
+    # Running totals maintained by the payment and repayment write routes:
+    # payments made from the loan's payment sources, and principal repaid
+    disbursed_to_date = Column(
+        Numeric(precision=15, scale=2), nullable=False, default=0, server_default="0"
+    )
+    principal_repaid = Column(
+        Numeric(precision=15, scale=2), nullable=False, default=0, server_default="0"
+    )
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -196,9 +206,16 @@ class Invoice(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    # Computed fields
-    paid_amount = Column(Numeric, default=0)
+    # Running total of linked payments, maintained by the payment write routes
+    paid_amount = Column(Numeric, nullable=False, default=0, server_default="0")
     
+    __table_args__ = (
+        # Default list order
+        Index("ix_invoices_invoice_date_id", invoice_date.desc(), id.desc()),
+        # Per-purchase listing and the balance check in create_invoice
+        Index("ix_invoices_purchase_id_invoice_date", purchase_id, invoice_date),
+    )
+
     # Relationships
     purchase = relationship("Purchase", back_populates="invoices")
     payments = relationship("Payment", back_populates="invoice")
@@ -208,10 +225,10 @@ class Payment(Base):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     purchase_id = Column(Integer, ForeignKey("purchases.id"), nullable=False)
-    source_id = Column(Integer, ForeignKey("payment_sources.id"), nullable=False)
-    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=True)
+    source_id = Column(Integer, ForeignKey("payment_sources.id"), nullable=False, index=True)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=True, index=True)
 
     # Basic payment details
     payment_date = Column(Date, nullable=False)
@@ -229,6 +246,13 @@ class Payment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Default list order and keyset pagination
+        Index("ix_payments_payment_date_id", payment_date.desc(), id.desc()),
+        # Per-purchase listing filtered by date range
+        Index("ix_payments_purchase_id_payment_date", purchase_id, payment_date),
+    )
+
     # Relationships
     purchase = relationship("Purchase", back_populates="payments")
     user = relationship("User", back_populates="payments")
@@ -248,8 +272,8 @@ class Document(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Add polymorphic relationships
-    property_id = Column(Integer, ForeignKey("properties.id"))
-    purchase_id = Column(Integer, ForeignKey("purchases.id"))
+    property_id = Column(Integer, ForeignKey("properties.id"), index=True)
+    purchase_id = Column(Integer, ForeignKey("purchases.id"), index=True)
 
     # Relationships
     property = relationship("Property", back_populates="documents")
@@ -260,7 +284,7 @@ class PaymentSource(Base):
     __tablename__ = "payment_sources"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(
         String, nullable=False
     )  # Descriptive name (e.g., "HDFC Savings", "Home Loan")
@@ -279,7 +303,7 @@ class PaymentSource(Base):
     branch = Column(String)
 
     # Loan specific
-    loan_id = Column(Integer, ForeignKey("loans.id"), nullable=True)
+    loan_id = Column(Integer, ForeignKey("loans.id"), nullable=True, index=True)
     lender = Column(String)  # Bank or individual name
 
     # Credit card specific
@@ -315,13 +339,40 @@ class LoanRepayment(Base):
         Computed("principal_amount + interest_amount + other_fees + penalties"),
         nullable=False,
     )
-    source_id = Column(Integer, ForeignKey("payment_sources.id"), nullable=False)
+    source_id = Column(Integer, ForeignKey("payment_sources.id"), nullable=False, index=True)
     payment_mode = Column(String, nullable=False)  # cash, online, cheque, etc.
-    transaction_reference = Column(String)
+    transaction_reference = Column(String, index=True)  # Duplicate check on statement import
     notes = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Default list order
+        Index("ix_loan_repayments_payment_date_id", payment_date.desc(), id.desc()),
+        # Per-loan listing and repayment totals
+        Index("ix_loan_repayments_loan_id_payment_date", loan_id, payment_date),
+    )
+
     # Relationships
     loan = relationship("Loan", back_populates="repayments")
     payment_source = relationship("PaymentSource", back_populates="loan_repayments")
+
+
+class CollectionVersion(Base):
+    """Change counter per table, bumped by every transaction that writes to it (see database.versions)."""
+
+    __tablename__ = "collection_versions"
+
+    name = Column(String, primary_key=True)  # Table name
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class CollectionChange(Base):
+    """A committed write to a table, not yet folded into its CollectionVersion (see database.versions)."""
+
+    __tablename__ = "collection_changes"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, index=True)  # Table name
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
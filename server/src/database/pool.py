@@ -0,0 +1,152 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import AsyncExitStack
+from dotenv import load_dotenv
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Pool settings, read once at import time
+POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+POOL_WARMUP = _env_int("DB_POOL_WARMUP", 0)
+
+
+class PoolMetricsMixin:
+    """Records how long callers wait to check a connection out of the pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+
+    def recreate(self):
+        # Keep counters across pool recreation (e.g. after engine.dispose())
+        pool = super().recreate()
+        pool.checkouts = self.checkouts
+        pool.timeouts = self.timeouts
+        pool.wait_time_total = self.wait_time_total
+        pool.wait_time_max = self.wait_time_max
+        return pool
+
+
+class InstrumentedQueuePool(PoolMetricsMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(PoolMetricsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine()/create_async_engine().
+
+    SQLite keeps SQLAlchemy's default pool since its connections are local
+    files and the queue pool settings do not apply.
+    """
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def pool_stats(pool: Pool) -> dict:
+    """Snapshot of live pool counters for the diagnostics endpoint."""
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        )
+    if isinstance(pool, PoolMetricsMixin):
+        checkouts = pool.checkouts
+        stats.update(
+            {
+                "checkouts": checkouts,
+                "timeouts": pool.timeouts,
+                "wait_time_total_ms": round(pool.wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(pool.wait_time_total * 1000 / checkouts, 3)
+                if checkouts
+                else 0.0,
+                "wait_time_max_ms": round(pool.wait_time_max * 1000, 3),
+            }
+        )
+    return stats
+
+
+def _warmup_count(pool: Pool, connections: int) -> int:
+    if isinstance(pool, QueuePool):
+        return min(connections, pool.size())
+    return 0
+
+
+def warm_up(engine, connections: int = POOL_WARMUP) -> int:
+    """Open up to `connections` connections at once and return them to the pool."""
+    count = _warmup_count(engine.pool, connections)
+    opened = []
+    try:
+        for _ in range(count):
+            opened.append(engine.connect())
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
+async def warm_up_async(async_engine, connections: int = POOL_WARMUP) -> int:
+    """Async counterpart of warm_up() for the AsyncEngine pool."""
+    count = _warmup_count(async_engine.sync_engine.pool, connections)
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(
+            *(stack.enter_async_context(async_engine.connect()) for _ in range(count))
+        )
+    return len(conns)
@@ -0,0 +1,238 @@
+"""Read replicas for GET routes and reports.
+
+DATABASE_REPLICA_URLS lists replica URLs, comma separated. Read-only routes take
+their session from get_read_db()/get_async_read_db(), which hand out a session
+on a replica (round robin, one per request) and fall back to the primary when no replica is
+usable or none is configured. Writes always go through get_db()/get_async_db().
+
+A replica is usable while it lags no more than DB_REPLICA_MAX_LAG seconds behind
+the primary and, for a client that just wrote something, once it has replayed
+that write. A response to a request that committed a write carries the commit
+time in an X-Last-Write header and a short-lived cookie; a later request that
+sends either back is served from the primary until a replica has replayed up to
+that time, while other clients' reads stay on the replicas. Code reading outside
+a request (reports, scripts) waits instead for the latest commit made by any
+worker process, kept in shared memory that workers forked from the process
+importing this module (gunicorn's preload_app) all update.
+
+A check reads the primary's WAL position and asks the replica whether it has
+replayed up to it; if so, everything committed before the check is visible
+there. Lag is measured at most every DB_REPLICA_CHECK_INTERVAL seconds per
+replica, and a replica that can't be reached counts as unusable until a later
+check succeeds. Times are wall-clock, so they compare across processes and hosts.
+"""
+import asyncio
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .base import AsyncSessionLocal, SessionLocal, engine, to_async_url
+from .pool import engine_options, pool_stats
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG") or 5)
+CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL") or 1)
+
+# WAL position up to which the primary has written; every commit so far is before it
+PRIMARY_LSN = text("SELECT pg_current_wal_lsn()")
+# Seconds a PostgreSQL standby is behind; 0 once it has replayed the primary's position
+POSTGRES_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn) THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+_WROTE = "replicas.wrote"
+
+# Where a client gets back the time of its latest write, and sends it with later reads
+WRITE_HEADER = "X-Last-Write"
+WRITE_COOKIE = "last_write"
+
+# time.time() of the latest commit that wrote anything, in any worker process
+_last_write = multiprocessing.RawValue("d", 0.0)
+# Commit times of the writes made while serving the current request
+_request_writes: ContextVar[Optional[list]] = ContextVar("replicas.request_writes", default=None)
+
+
+class Replica:
+    """Engines and sessions for one replica, and how far behind the primary it was last seen."""
+
+    def __init__(self, url: str):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine(url, **engine_options(url))
+        async_url = to_async_url(url)
+        self.async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(
+            bind=self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        self.lag: Optional[float] = None
+        # time.monotonic() of the last check, to space them out, and time.time() to compare with writes
+        self.checked_at = float("-inf")
+        self.checked_wall = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def replayed_through(self) -> Optional[float]:
+        """Wall-clock time up to which the replica is known to have replayed the primary."""
+        return None if self.lag is None else self.checked_wall - self.lag
+
+    def check(self) -> None:
+        # One caller measures at a time; the others go on with the last measurement
+        if not self._lock.acquire(blocking=False):
+            return
+        started = time.monotonic()
+        started_wall = time.time()
+        try:
+            if self.engine.dialect.name == "postgresql":
+                with engine.connect() as conn:
+                    lsn = conn.execute(PRIMARY_LSN).scalar()
+                with self.engine.connect() as conn:
+                    self.lag = float(conn.execute(POSTGRES_LAG, {"lsn": lsn}).scalar() or 0)
+            else:
+                self.lag = 0.0
+        except Exception as e:
+            logger.warning("Replica %s is unavailable: %s", self.name, e)
+            self.lag = None
+        finally:
+            # Measured from before the query went out, so the estimate errs on the stale side
+            self.checked_at = started
+            self.checked_wall = started_wall
+            self._lock.release()
+
+    def usable(self, now: float, since: float = 0.0) -> bool:
+        """Whether reads at `now` may use the replica, given a write at `since` they must see."""
+        replayed = self.replayed_through
+        return replayed is not None and replayed >= since and now - replayed <= MAX_LAG
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "lag_seconds": self.lag,
+            "usable": self.usable(time.time()),
+            "sync": pool_stats(self.engine.pool),
+            "async": pool_stats(self.async_engine.sync_engine.pool),
+        }
+
+
+replicas: List[Replica] = [Replica(url) for url in REPLICA_URLS]
+_next = itertools.count()
+
+
+def choose(since: Optional[float] = None) -> Optional[Replica]:
+    """
+    The next usable replica, round robin, or None to read from the primary.
+    `since` is the time of a write the reads must see; by default the latest
+    commit made by any worker process.
+    """
+    if not replicas:
+        return None
+    if since is None:
+        since = _last_write.value
+    now = time.time()
+    start = next(_next)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        if not replica.usable(now, since) and time.monotonic() - replica.checked_at >= CHECK_INTERVAL:
+            replica.check()
+            now = time.time()
+        if replica.usable(now, since):
+            return replica
+    return None
+
+
+def written_since(request: Request) -> float:
+    """Time of the client's latest write, from the header or cookie it sends back; 0 if none."""
+    value = request.headers.get(WRITE_HEADER) or request.cookies.get(WRITE_COOKIE)
+    try:
+        since = float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+    return since if math.isfinite(since) else 0.0
+
+
+def track_writes() -> list:
+    """Start collecting the commit times of the current request's writes."""
+    written = []
+    _request_writes.set(written)
+    return written
+
+
+def remember_write(response: Response, written_at: float) -> None:
+    """Hand the client the time of its write, to send back with the reads that follow."""
+    value = f"{written_at:.6f}"
+    response.headers[WRITE_HEADER] = value
+    # Past MAX_LAG any usable replica has replayed the write anyway
+    response.set_cookie(WRITE_COOKIE, value, max_age=math.ceil(MAX_LAG) + 1, httponly=True, samesite="lax")
+
+
+def stats() -> List[dict]:
+    """Lag and pool counters of each replica, for the diagnostics endpoint."""
+    return [replica.stats() for replica in replicas]
+
+
+@event.listens_for(Session, "after_flush")
+def _note_write(session: Session, flush_context) -> None:
+    session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement_write(state) -> None:
+    # Core INSERT/UPDATE/DELETE run through the session (bulk imports, running totals)
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session: Session) -> None:
+    if session.info.pop(_WROTE, False):
+        written_at = time.time()
+        _last_write.value = written_at
+        written = _request_writes.get()
+        if written is not None:
+            written.append(written_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_write(session: Session) -> None:
+    session.info.pop(_WROTE, None)
+
+
+# Dependency for read-only routes
+def get_read_db(request: Request):
+    # Every read of a request (e.g. an ETag check and the handler) uses the same
+    # replica, so they never see two different points in the primary's history
+    if not hasattr(request.state, "replica"):
+        request.state.replica = choose(written_since(request))
+    replica = request.state.replica
+    db = replica.SessionLocal() if replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Async dependency for read-only routes
+async def get_async_read_db(request: Request):
+    if not hasattr(request.state, "replica"):
+        # A due lag check talks to the replica, so it runs off the event loop
+        request.state.replica = await asyncio.to_thread(choose, written_since(request)) if replicas else None
+    replica = request.state.replica
+    async with (replica.AsyncSessionLocal if replica else AsyncSessionLocal)() as db:
+        yield db
@@ -0,0 +1,224 @@
+"""Import of loan repayments (EMIs) from bank statement exports.
+
+A statement is read row by row as CSV. Debit lines, optionally narrowed down to
+those whose narration mentions the loan, become LoanRepayment rows. Banks name
+their columns differently, so headers are matched against a list of common
+aliases. When the statement carries no principal/interest breakdown, each
+payment is split using the loan's interest rate on the outstanding principal,
+the same way a reducing-balance EMI is.
+
+The matching debits of the whole statement are parsed first and sorted by date,
+since the reducing-balance split needs them in order and banks often export
+newest first. They are then written in batches: one query finds the batch's
+transaction references that were already imported, the new rows are inserted
+with one executemany, and the loan's stored totals and repayment summary are
+refreshed once per batch.
+"""
+import csv
+import re
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import IO, Iterable, Iterator, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from . import balances, summaries, versions
+from .imports import BATCH_SIZE, RowError
+from .models import Loan, LoanRepayment, PaymentSource
+
+# Normalised header names recognised for each field, in order of preference
+COLUMN_ALIASES = {
+    "payment_date": ["date", "txn date", "transaction date", "value date", "value dt", "posting date"],
+    "description": ["narration", "description", "particulars", "remarks", "details"],
+    "reference": [
+        "transaction reference", "reference", "ref no", "chq/ref no", "ref no/cheque no",
+        "chq/ref number", "chq/refno", "cheque no", "utr", "utr no",
+    ],
+    "amount": ["debit", "withdrawal amt", "withdrawal amount", "withdrawal", "debit amount", "amount", "emi"],
+    "principal": ["principal", "principal amount", "principal component"],
+    "interest": ["interest", "interest amount", "interest component"],
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y", "%d-%b-%Y", "%d %b %Y", "%d-%b-%y")
+
+CENT = Decimal("0.01")
+
+
+def _normalise(header: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z/ ]", "", (header or "").lower())).strip()
+
+
+def map_columns(headers: Iterable[str]) -> dict:
+    """Map each known field to the statement header that holds it."""
+    normalised = {_normalise(header): header for header in headers if header}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalised:
+                columns[field] = normalised[alias]
+                break
+    missing = [field for field in ("payment_date", "reference", "amount") if field not in columns]
+    if missing:
+        raise ValueError(f"Statement has no column for: {', '.join(missing)}")
+    return columns
+
+
+def iter_statement(stream: IO[str]) -> Iterator[dict]:
+    """Yield statement lines as dicts keyed by field name rather than the bank's headers."""
+    reader = csv.DictReader(stream)
+    columns = map_columns(reader.fieldnames or [])
+    for line in reader:
+        yield {field: line.get(header) for field, header in columns.items()}
+
+
+def _parse_date(value: Optional[str]) -> date:
+    value = (value or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise RowError(f"Unrecognised date: {value!r}")
+
+
+def _parse_amount(value: Optional[str]) -> Optional[Decimal]:
+    """Parse amounts like '25,000.00', '₹ 25000' or '25000.00 Dr'; blank is None."""
+    cleaned = re.sub(r"[^0-9.\-]", "", value or "")
+    if not cleaned:
+        return None
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise RowError(f"Unrecognised amount: {value!r}")
+    if not amount.is_finite():
+        raise RowError(f"Unrecognised amount: {value!r}")
+    return amount
+
+
+def split_emi(amount: Decimal, outstanding: Decimal, annual_rate: Decimal) -> tuple:
+    """Split a payment into (principal, interest) for one month on a reducing balance."""
+    interest = (max(outstanding, Decimal("0")) * annual_rate / 1200).quantize(CENT, ROUND_HALF_UP)
+    interest = min(interest, amount)
+    return amount - interest, interest
+
+
+def import_statement(
+    db: Session,
+    lines: Iterable[dict],
+    loan_id: int,
+    source_id: int,
+    match: Optional[str] = None,
+    payment_mode: str = "online",
+    batch_size: int = BATCH_SIZE,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Create repayments for a loan from parsed statement lines (see iter_statement).
+    Lines that aren't debits, or whose narration doesn't contain `match`, are ignored;
+    lines whose reference was already imported are counted in "skipped".
+    Returns {"imported": count, "skipped": count, "errors": [{"row": n, "error": message}, ...]}.
+    """
+    # Lock the loan so its outstanding principal doesn't move while splits are computed
+    loan = db.execute(
+        select(Loan.id, Loan.interest_rate, Loan.disbursed_to_date, Loan.principal_repaid)
+        .where(Loan.id == loan_id)
+        .with_for_update()
+    ).first()
+    if loan is None:
+        raise LookupError("Loan not found")
+    if db.get(PaymentSource, source_id) is None:
+        raise LookupError("Payment source not found")
+
+    # Interest accrues on what has been paid out so far, not on the sanctioned disbursement
+    outstanding = (loan.disbursed_to_date or 0) - (loan.principal_repaid or 0)
+    needle = match.lower() if match else None
+    imported = 0
+    skipped = 0
+    errors = []
+    seen = set()
+
+    parsed = []
+    for row_number, line in enumerate(lines, start=1):
+        if needle and needle not in (line.get("description") or "").lower():
+            continue
+        try:
+            amount = _parse_amount(line.get("amount"))
+            if amount is None or amount <= 0:
+                continue  # credits and balance-only lines
+            reference = (line.get("reference") or "").strip()
+            if not reference:
+                raise RowError("Missing transaction reference")
+            parsed.append(
+                {
+                    "row": row_number,
+                    "payment_date": _parse_date(line.get("payment_date")),
+                    "amount": amount,
+                    "principal": _parse_amount(line.get("principal")),
+                    "interest": _parse_amount(line.get("interest")),
+                    "reference": reference,
+                    "description": (line.get("description") or "").strip() or None,
+                }
+            )
+        except RowError as e:
+            errors.append({"row": row_number, "error": str(e)})
+    # Reducing-balance splits only make sense in date order
+    parsed.sort(key=lambda p: (p["payment_date"], p["row"]))
+
+    for start in range(0, len(parsed), batch_size):
+        batch = parsed[start:start + batch_size]
+        # One lookup per batch for references that are already on file for this loan
+        existing = set(
+            db.scalars(
+                select(LoanRepayment.transaction_reference).where(
+                    LoanRepayment.loan_id == loan_id,
+                    LoanRepayment.transaction_reference.in_({p["reference"] for p in batch}),
+                )
+            )
+        )
+
+        rows = []
+        for entry in batch:
+            if entry["reference"] in existing or entry["reference"] in seen:
+                skipped += 1
+                continue
+            seen.add(entry["reference"])
+
+            if entry["principal"] is not None or entry["interest"] is not None:
+                principal = entry["principal"] or Decimal("0")
+                interest = entry["interest"] or Decimal("0")
+                if principal + interest > entry["amount"]:
+                    errors.append(
+                        {"row": entry["row"], "error": "Principal and interest exceed the debited amount"}
+                    )
+                    continue
+            else:
+                principal, interest = split_emi(entry["amount"], outstanding, loan.interest_rate)
+            outstanding -= principal
+
+            rows.append(
+                {
+                    "loan_id": loan.id,
+                    "source_id": source_id,
+                    "payment_date": entry["payment_date"],
+                    "principal_amount": principal,
+                    "interest_amount": interest,
+                    # Whatever the statement debited beyond principal and interest
+                    "other_fees": entry["amount"] - principal - interest,
+                    "penalties": Decimal("0"),
+                    "payment_mode": payment_mode,
+                    "transaction_reference": entry["reference"],
+                    "notes": entry["description"],
+                }
+            )
+
+        imported += len(rows)
+        if not rows or dry_run:
+            continue
+
+        db.execute(insert(LoanRepayment), rows)
+        versions.mark(db, LoanRepayment.__tablename__)
+        balances.refresh_loan_totals(db, {loan.id})
+        summaries.mark_loans(db, {loan.id})
+
+    return {"imported": imported, "skipped": skipped, "errors": errors}
@@ -0,0 +1,365 @@
+"""Incremental maintenance of the acquisition cost and loan repayment summaries.
+
+Writes through an ORM Session mark the purchases and loans they touch; just
+before the transaction commits, only those summary rows are recomputed with an
+INSERT ... SELECT ... ON CONFLICT DO UPDATE scoped to the marked ids. An upsert
+rather than DELETE + INSERT, because two transactions may refresh the same
+purchase at once (payments on two of its invoices lock only their own invoice);
+the second DELETE would wait, delete nothing, and its INSERT hit the key. Code that writes with Core
+statements (bulk imports) calls mark_purchases()/mark_loans() itself.
+
+Once the transaction has committed, callbacks registered with on_change() are
+told which purchases and loans were refreshed, e.g. to drop cached responses.
+"""
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import Table, delete, event, func, inspect, literal, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import (
+    Loan,
+    LoanRepayment,
+    Payment,
+    PaymentSource,
+    Property,
+    Purchase,
+)
+from .views import AcquisitionCostSummary, LoanRepaymentSummary
+
+_PURCHASES = "summaries.purchase_ids"
+_LOANS = "summaries.loan_ids"
+_PROPERTIES = "summaries.property_ids"
+_SOURCES = "summaries.source_ids"
+_COMMITTED_PURCHASES = "summaries.committed_purchase_ids"
+_COMMITTED_LOANS = "summaries.committed_loan_ids"
+
+_change_listeners: List[Callable[[set, set], None]] = []
+
+
+def _pending(session: Session, key: str) -> set:
+    return session.info.setdefault(key, set())
+
+
+def mark_purchases(session: Session, purchase_ids: Iterable[int]) -> None:
+    """Schedule the acquisition cost summary of these purchases for refresh."""
+    _pending(session, _PURCHASES).update(i for i in purchase_ids if i is not None)
+
+
+def mark_loans(session: Session, loan_ids: Iterable[int]) -> None:
+    """Schedule the repayment summary of these loans (and their purchases) for refresh."""
+    _pending(session, _LOANS).update(i for i in loan_ids if i is not None)
+
+
+def on_change(listener: Callable[[set, set], None]) -> Callable[[set, set], None]:
+    """Register listener(purchase_ids, loan_ids), called after commits that refreshed summaries."""
+    _change_listeners.append(listener)
+    return listener
+
+
+def _values(obj, attr: str) -> set:
+    """Current and pre-flush values of an attribute, so moved rows refresh both sides."""
+    history = inspect(obj).attrs[attr].history
+    values = set(history.added) | set(history.deleted) | set(history.unchanged)
+    if not values:
+        values = {getattr(obj, attr)}
+    return {value for value in values if value is not None}
+
+
+def _collect(session: Session, obj) -> None:
+    if isinstance(obj, Payment):
+        mark_purchases(session, _values(obj, "purchase_id"))
+        _pending(session, _SOURCES).update(_values(obj, "source_id"))
+    elif isinstance(obj, LoanRepayment):
+        mark_loans(session, _values(obj, "loan_id"))
+    elif isinstance(obj, Loan):
+        mark_loans(session, _values(obj, "id"))
+        mark_purchases(session, _values(obj, "purchase_id"))
+    elif isinstance(obj, Purchase):
+        mark_purchases(session, _values(obj, "id"))
+        _pending(session, _PROPERTIES).update(_values(obj, "property_id"))
+    elif isinstance(obj, Property):
+        _pending(session, _PROPERTIES).update(_values(obj, "id"))
+    elif isinstance(obj, PaymentSource):
+        _pending(session, _SOURCES).update(_values(obj, "id"))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    # new/dirty/deleted and attribute history still hold their pre-flush state here
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        _collect(session, obj)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_pending(session: Session) -> None:
+    # Commit only flushes after this hook runs, so flush here to collect pending changes
+    session.flush()
+    if not any(session.info.get(key) for key in (_PURCHASES, _LOANS, _PROPERTIES, _SOURCES)):
+        return
+    _expand_pending(session)
+    loan_ids = session.info.pop(_LOANS, set())
+    purchase_ids = session.info.pop(_PURCHASES, set())
+    if loan_ids:
+        refresh_loan_summaries(session, loan_ids)
+    if purchase_ids:
+        refresh_acquisition_cost_summaries(session, purchase_ids)
+    _pending(session, _COMMITTED_LOANS).update(loan_ids)
+    _pending(session, _COMMITTED_PURCHASES).update(purchase_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_committed(session: Session) -> None:
+    purchase_ids = session.info.pop(_COMMITTED_PURCHASES, set())
+    loan_ids = session.info.pop(_COMMITTED_LOANS, set())
+    if purchase_ids or loan_ids:
+        for listener in _change_listeners:
+            listener(purchase_ids, loan_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    for key in (_PURCHASES, _LOANS, _PROPERTIES, _SOURCES, _COMMITTED_PURCHASES, _COMMITTED_LOANS):
+        session.info.pop(key, None)
+
+
+def _expand_pending(session: Session) -> None:
+    """Resolve marked properties, sources and loans to the purchases/loans they affect."""
+    property_ids = session.info.pop(_PROPERTIES, set())
+    source_ids = session.info.pop(_SOURCES, set())
+    loans = _pending(session, _LOANS)
+    purchases = _pending(session, _PURCHASES)
+
+    if property_ids:
+        purchases.update(
+            session.scalars(
+                select(Purchase.id).where(Purchase.property_id.in_(property_ids))
+            )
+        )
+        loans.update(
+            session.scalars(
+                select(Loan.id)
+                .join(Purchase, Loan.purchase_id == Purchase.id)
+                .where(Purchase.property_id.in_(property_ids))
+            )
+        )
+    if source_ids:
+        # A source's type decides whether its payments count as builder payments
+        purchases.update(
+            session.scalars(
+                select(Payment.purchase_id)
+                .where(Payment.source_id.in_(source_ids))
+                .distinct()
+            )
+        )
+        loans.update(
+            session.scalars(
+                select(PaymentSource.loan_id).where(
+                    PaymentSource.id.in_(source_ids),
+                    PaymentSource.loan_id.is_not(None),
+                )
+            )
+        )
+        # Repayment detail rows show the name of the source they were paid from
+        loans.update(
+            session.scalars(
+                select(LoanRepayment.loan_id)
+                .where(LoanRepayment.source_id.in_(source_ids))
+                .distinct()
+            )
+        )
+    if loans:
+        purchases.update(
+            session.scalars(select(Loan.purchase_id).where(Loan.id.in_(loans)))
+        )
+    purchases.discard(None)
+
+
+def _acquisition_cost_select(purchase_ids: Optional[set]):
+    loan_totals = (
+        select(
+            Loan.purchase_id.label("purchase_id"),
+            func.sum(LoanRepayment.principal_amount).label("principal"),
+            func.sum(LoanRepayment.interest_amount).label("interest"),
+            func.sum(
+                LoanRepayment.total_payment
+                - LoanRepayment.principal_amount
+                - LoanRepayment.interest_amount
+            ).label("others"),
+            func.sum(LoanRepayment.total_payment).label("payment"),
+        )
+        .join(Loan, LoanRepayment.loan_id == Loan.id)
+        .group_by(Loan.purchase_id)
+    )
+    # Payments funded by a loan are already counted through the loan's repayments
+    builder_totals = (
+        select(
+            Payment.purchase_id.label("purchase_id"),
+            func.sum(Payment.amount).label("payment"),
+        )
+        .join(PaymentSource, Payment.source_id == PaymentSource.id)
+        .where(PaymentSource.source_type != "loan")
+        .group_by(Payment.purchase_id)
+    )
+    if purchase_ids is not None:
+        loan_totals = loan_totals.where(Loan.purchase_id.in_(purchase_ids))
+        builder_totals = builder_totals.where(Payment.purchase_id.in_(purchase_ids))
+    loan_totals = loan_totals.subquery()
+    builder_totals = builder_totals.subquery()
+
+    loan_principal = func.coalesce(loan_totals.c.principal, 0)
+    loan_payment = func.coalesce(loan_totals.c.payment, 0)
+    builder_payment = func.coalesce(builder_totals.c.payment, 0)
+
+    query = (
+        select(
+            Purchase.id,
+            Purchase.user_id,
+            Property.name,
+            loan_principal,
+            func.coalesce(loan_totals.c.interest, 0),
+            func.coalesce(loan_totals.c.others, 0),
+            loan_payment,
+            builder_payment,
+            builder_payment,
+            loan_principal + builder_payment,
+            loan_payment + builder_payment,
+            Purchase.total_sale_cost,
+            Purchase.total_sale_cost - builder_payment - loan_principal,
+        )
+        .outerjoin(Property, Purchase.property_id == Property.id)
+        .outerjoin(loan_totals, loan_totals.c.purchase_id == Purchase.id)
+        .outerjoin(builder_totals, builder_totals.c.purchase_id == Purchase.id)
+    )
+    if purchase_ids is not None:
+        query = query.where(Purchase.id.in_(purchase_ids))
+    return query
+
+
+def _loan_repayment_select(loan_ids: Optional[set]):
+    repayment_totals = select(
+        LoanRepayment.loan_id.label("loan_id"),
+        func.sum(LoanRepayment.principal_amount).label("principal"),
+        func.sum(LoanRepayment.interest_amount).label("interest"),
+        func.sum(LoanRepayment.other_fees).label("other_fees"),
+        func.sum(LoanRepayment.penalties).label("penalties"),
+        func.sum(LoanRepayment.total_payment).label("total"),
+        func.count(LoanRepayment.id).label("payments"),
+        func.max(LoanRepayment.payment_date).label("last_date"),
+    ).group_by(LoanRepayment.loan_id)
+    if loan_ids is not None:
+        repayment_totals = repayment_totals.where(LoanRepayment.loan_id.in_(loan_ids))
+    repayment_totals = repayment_totals.subquery()
+
+    principal_paid = func.coalesce(repayment_totals.c.principal, 0)
+    query = (
+        select(
+            Loan.id,
+            Loan.user_id,
+            Loan.name,
+            Property.name,
+            Loan.sanction_amount,
+            Loan.total_disbursed_amount,
+            principal_paid,
+            func.coalesce(repayment_totals.c.interest, 0),
+            func.coalesce(repayment_totals.c.other_fees, 0),
+            func.coalesce(repayment_totals.c.penalties, 0),
+            func.coalesce(repayment_totals.c.total, 0),
+            func.coalesce(repayment_totals.c.payments, literal(0)),
+            repayment_totals.c.last_date,
+            func.coalesce(Loan.total_disbursed_amount, 0) - principal_paid,
+        )
+        .outerjoin(Purchase, Loan.purchase_id == Purchase.id)
+        .outerjoin(Property, Purchase.property_id == Property.id)
+        .outerjoin(repayment_totals, repayment_totals.c.loan_id == Loan.id)
+    )
+    if loan_ids is not None:
+        query = query.where(Loan.id.in_(loan_ids))
+    return query
+
+
+ACQUISITION_COST_COLUMNS = [
+    "purchase_id",
+    "user_id",
+    "property_name",
+    "total_loan_principal",
+    "total_loan_interest",
+    "total_loan_others",
+    "total_loan_payment",
+    "total_builder_principal",
+    "total_builder_payment",
+    "total_principal_payment",
+    "total_payment",
+    "total_sale_cost",
+    "remaining_balance",
+]
+
+LOAN_REPAYMENT_COLUMNS = [
+    "loan_id",
+    "user_id",
+    "loan_name",
+    "property_name",
+    "loan_sanctioned_amount",
+    "loan_disbursed_amount",
+    "total_principal_paid",
+    "total_interest_paid",
+    "total_other_fees",
+    "total_penalties",
+    "total_amount_paid",
+    "total_payments",
+    "last_repayment_date",
+    "principal_balance",
+]
+
+
+def _upsert(session: Session, table: Table, columns: List[str], query, parent_id, ids: Optional[set]) -> None:
+    """Write the rows of `query` into `table` by its key, then drop rows whose parent is gone."""
+    key = table.c[columns[0]]
+    dialect = postgresql if session.connection().dialect.name == "postgresql" else sqlite
+    # SQLite needs a WHERE before ON CONFLICT to tell it from a join's ON
+    stmt = dialect.insert(table).from_select(columns, query.where(true()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={column: stmt.excluded[column] for column in columns[1:]},
+    )
+    session.execute(stmt)
+    gone = delete(table).where(key.not_in(select(parent_id)))
+    if ids is not None:
+        gone = gone.where(key.in_(ids))
+    session.execute(gone)
+
+
+def refresh_acquisition_cost_summaries(
+    session: Session, purchase_ids: Optional[Iterable[int]] = None
+) -> None:
+    """Recompute acquisition cost summary rows; all purchases when ids is None."""
+    ids = set(purchase_ids) if purchase_ids is not None else None
+    _upsert(
+        session,
+        AcquisitionCostSummary.__table__,
+        ACQUISITION_COST_COLUMNS,
+        _acquisition_cost_select(ids),
+        Purchase.id,
+        ids,
+    )
+
+
+def refresh_loan_summaries(
+    session: Session, loan_ids: Optional[Iterable[int]] = None
+) -> None:
+    """Recompute loan repayment summary rows; all loans when ids is None."""
+    ids = set(loan_ids) if loan_ids is not None else None
+    _upsert(
+        session,
+        LoanRepaymentSummary.__table__,
+        LOAN_REPAYMENT_COLUMNS,
+        _loan_repayment_select(ids),
+        Loan.id,
+        ids,
+    )
+
+
+def refresh_all(session: Session) -> None:
+    """Rebuild both summary tables from scratch."""
+    refresh_loan_summaries(session)
+    refresh_acquisition_cost_summaries(session)
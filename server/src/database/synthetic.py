@@ -0,0 +1,418 @@
+"""Seeded synthetic portfolios for exercising the API at scale.
+
+generate() writes `users` users, each buying `properties` properties with one
+purchase apiece. Every purchase gets a construction-linked payment plan of
+invoices, payments against them from the user's bank account and, for most
+purchases, a home loan that pays the later instalments and is repaid in monthly
+EMIs. Values are drawn from a NumPy generator seeded with `seed` and dates are
+laid out between the fixed START and AS_OF dates, so the same arguments always
+produce the same rows.
+
+IDs are assigned here, continuing from each table's current maximum, so child
+rows refer to their parents without reading anything back. Rows are buffered
+per table and written parents first, with COPY on psycopg2 and executemany
+elsewhere, whenever `batch_size` payments have piled up. Stored invoice and
+loan totals are filled in as the rows are generated instead of being
+recomputed afterwards; the summary tables are rebuilt once at the end. On
+PostgreSQL the id sequences are moved past the generated ids.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from . import imports, summaries, versions
+from .models import Invoice, Loan, LoanRepayment, Payment, PaymentSource, Property, Purchase, User
+
+# Payments buffered before every table's pending rows are written out
+BATCH_SIZE = 50_000
+
+# Purchases are made between START and START + PURCHASE_WINDOW days; invoices,
+# payments and EMIs dated after AS_OF haven't happened yet
+START = date(2018, 1, 1)
+PURCHASE_WINDOW = 4 * 365
+AS_OF = date(2025, 6, 30)
+
+# Share of purchases financed with a home loan, and the share of the total
+# cost it is sanctioned for
+LOAN_SHARE = 0.7
+LOAN_TO_VALUE = 0.8
+# Instalments paid from the buyer's own funds before the loan is drawn
+OWN_CONTRIBUTION_INVOICES = 2
+
+MILESTONES = [
+    "booking",
+    "agreement",
+    "foundation",
+    "plinth",
+    "slab",
+    "brickwork",
+    "plastering",
+    "flooring",
+    "finishing",
+    "possession",
+]
+CITIES = ["Bengaluru", "Pune", "Hyderabad", "Mumbai", "Gurugram", "Chennai", "Noida"]
+DEVELOPERS = ["Prestige", "Godrej Properties", "Sobha", "Brigade", "DLF", "Lodha", "Puravankara"]
+PROJECTS = ["Lakeside", "Greens", "Heights", "Residency", "Park View", "Meadows", "Skyline"]
+PROPERTY_TYPES = ["Apartment", "Apartment", "Apartment", "Villa", "Plot"]
+BANKS = ["HDFC Bank", "ICICI Bank", "State Bank of India", "Axis Bank", "Kotak Mahindra Bank"]
+PAYMENT_MODES = ["online", "online", "cheque", "neft"]
+
+USER_COLUMNS = ["id", "username", "password", "email"]
+PROPERTY_COLUMNS = [
+    "id",
+    "name",
+    "address",
+    "property_type",
+    "developer",
+    "rera_id",
+    "carpet_area",
+    "exclusive_area",
+    "common_area",
+    "floor_number",
+    "initial_rate",
+    "current_rate",
+]
+PURCHASE_COLUMNS = [
+    "id",
+    "property_id",
+    "user_id",
+    "carpet_area",
+    "exclusive_area",
+    "common_area",
+    "floor_number",
+    "purchase_rate",
+    "current_rate",
+    "base_cost",
+    "other_charges",
+    "ifms",
+    "lease_rent",
+    "amc",
+    "gst",
+    "purchase_date",
+    "seller",
+]
+LOAN_COLUMNS = [
+    "id",
+    "user_id",
+    "purchase_id",
+    "name",
+    "institution",
+    "sanction_date",
+    "sanction_amount",
+    "processing_fee",
+    "other_charges",
+    "interest_rate",
+    "tenure_months",
+    "is_active",
+    "total_disbursed_amount",
+    "disbursed_to_date",
+    "principal_repaid",
+]
+SOURCE_COLUMNS = ["id", "user_id", "name", "source_type", "is_active", "bank_name", "account_number", "loan_id", "lender"]
+INVOICE_COLUMNS = ["id", "purchase_id", "invoice_number", "invoice_date", "due_date", "amount", "status", "milestone", "paid_amount"]
+PAYMENT_COLUMNS = ["id"] + imports.PAYMENT_COLUMNS
+REPAYMENT_COLUMNS = [
+    "id",
+    "loan_id",
+    "payment_date",
+    "principal_amount",
+    "interest_amount",
+    "other_fees",
+    "penalties",
+    "source_id",
+    "payment_mode",
+    "transaction_reference",
+]
+
+# Tables in the order their rows are written, parents before children
+TABLES = [
+    (User, USER_COLUMNS),
+    (Property, PROPERTY_COLUMNS),
+    (Purchase, PURCHASE_COLUMNS),
+    (Loan, LOAN_COLUMNS),
+    (PaymentSource, SOURCE_COLUMNS),
+    (Invoice, INVOICE_COLUMNS),
+    (Payment, PAYMENT_COLUMNS),
+    (LoanRepayment, REPAYMENT_COLUMNS),
+]
+
+
+class _Writer:
+    """Per-table row buffers and the next free id of each table."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.rows: Dict[type, List[list]] = {model: [] for model, _ in TABLES}
+        self.next_id = {model: (db.scalar(select(func.max(model.id))) or 0) + 1 for model, _ in TABLES}
+        self.counts = {model.__tablename__: 0 for model, _ in TABLES}
+
+    def add(self, model, *values) -> int:
+        """Buffer one row (values in the table's column order, without the id); returns its id."""
+        row_id = self.next_id[model]
+        self.next_id[model] += 1
+        self.rows[model].append([row_id, *values])
+        return row_id
+
+    def flush(self) -> None:
+        for model, columns in TABLES:
+            rows = self.rows[model]
+            imports.write_rows(self.db, model, columns, rows)
+            self.counts[model.__tablename__] += len(rows)
+            rows.clear()
+
+
+def _pick(rng: np.random.Generator, options: list):
+    return options[int(rng.integers(len(options)))]
+
+
+def _split(rng: np.random.Generator, total: int, parts: int) -> List[int]:
+    """`total` split into `parts` positive whole amounts of broadly similar size."""
+    weights = 1.0 + rng.random(parts)
+    amounts = np.floor(weights / weights.sum() * total).astype(np.int64)
+    amounts[-1] += total - amounts.sum()
+    return [int(amount) for amount in amounts]
+
+
+def _emis(principal: int, rate: Decimal, tenure: int, sanction_date: date):
+    """(payment_date, principal, interest) of the EMIs due on the 5th of each month up to AS_OF."""
+    first = np.datetime64(sanction_date, "M") + 1
+    paid = min(tenure, int(np.datetime64(AS_OF, "M") - first))
+    if paid <= 0 or principal <= 0:
+        return []
+    monthly = float(rate) / 1200
+    growth = (1 + monthly) ** np.arange(paid + 1)
+    emi = principal * monthly * (1 + monthly) ** tenure / ((1 + monthly) ** tenure - 1)
+    # Opening balance of each month, in closed form
+    opening = principal * growth[:-1] - emi * (growth[:-1] - 1) / monthly
+    interest = np.round(opening * monthly).astype(np.int64)
+    principal_paid = np.round(emi).astype(np.int64) - interest
+    dates = (first + np.arange(paid)).astype("datetime64[D]") + 4
+    return [
+        (day.item(), int(principal_part), int(interest_part))
+        for day, principal_part, interest_part in zip(dates, principal_paid, interest)
+    ]
+
+
+def _purchase(
+    writer: _Writer,
+    rng: np.random.Generator,
+    user_id: int,
+    bank_source_id: int,
+    invoices: int,
+    payments_per_invoice: int,
+) -> None:
+    developer = _pick(rng, DEVELOPERS)
+    city = _pick(rng, CITIES)
+    carpet = int(rng.integers(550, 2200))
+    exclusive = carpet * 8 // 100
+    common = carpet * 22 // 100
+    area = carpet + exclusive + common
+    floor = int(rng.integers(0, 30))
+    rate = int(rng.integers(40, 160)) * 100
+    current_rate = int(rate * rng.uniform(0.9, 1.6))
+    property_id = writer.add(
+        Property,
+        f"{developer} {_pick(rng, PROJECTS)} Tower {int(rng.integers(1, 9))}",
+        city,
+        _pick(rng, PROPERTY_TYPES),
+        developer,
+        f"PRM/{int(rng.integers(10**6, 10**7))}",
+        carpet,
+        exclusive,
+        common,
+        floor,
+        rate,
+        current_rate,
+    )
+
+    base_cost = rate * area
+    other_charges = base_cost * 3 // 100
+    gst = base_cost * 5 // 100
+    purchase_date = START + timedelta(days=int(rng.integers(PURCHASE_WINDOW)))
+    purchase_id = writer.add(
+        Purchase,
+        property_id,
+        user_id,
+        carpet,
+        exclusive,
+        common,
+        floor,
+        rate,
+        current_rate,
+        base_cost,
+        other_charges,
+        area * 50,
+        0,
+        area * 24,
+        gst,
+        purchase_date,
+        developer,
+    )
+
+    loan = None
+    if rng.random() < LOAN_SHARE:
+        sanction_amount = int((base_cost + other_charges + gst) * LOAN_TO_VALUE) // 1000 * 1000
+        loan = {
+            "sanction_date": purchase_date + timedelta(days=int(rng.integers(10, 45))),
+            "sanction_amount": sanction_amount,
+            "institution": _pick(rng, BANKS),
+            "interest_rate": Decimal(int(rng.integers(700, 950))) / 100,
+            "tenure_months": _pick(rng, [180, 240, 300]),
+            "disbursed": 0,
+        }
+
+    # Construction-linked plan: instalments spaced every 2-4 months from the purchase
+    amounts = _split(rng, base_cost + other_charges + gst, invoices)
+    spacing = int(rng.integers(60, 120))
+    invoice_rows = []
+    for number, amount in enumerate(amounts):
+        invoice_date = purchase_date + timedelta(days=number * spacing)
+        if invoice_date > AS_OF:
+            paid = 0
+        else:
+            roll = rng.random()
+            paid = amount if roll < 0.85 else int(amount * rng.uniform(0.2, 0.8)) if roll < 0.95 else 0
+        status = "paid" if paid >= amount else "partially_paid" if paid else "pending"
+        milestone = MILESTONES[min(number * len(MILESTONES) // invoices, len(MILESTONES) - 1)]
+        invoice_id = writer.add(
+            Invoice,
+            purchase_id,
+            f"INV-{purchase_id}-{number + 1:03d}",
+            invoice_date,
+            invoice_date + timedelta(days=30),
+            amount,
+            status,
+            milestone,
+            paid,
+        )
+        invoice_rows.append((invoice_id, invoice_date, paid, number))
+
+    loan_source_id = None
+    if loan is not None:
+        # The loan row is buffered once its totals are known and takes this id;
+        # its payment source is needed first, by the payments it disburses
+        loan_id = writer.next_id[Loan]
+        loan_source_id = writer.add(
+            PaymentSource, user_id, f"{loan['institution']} home loan", "loan", True, None, None, loan_id, loan["institution"]
+        )
+        loan["id"] = loan_id
+
+    for invoice_id, invoice_date, paid, number in invoice_rows:
+        if not paid:
+            continue
+        parts = _split(rng, paid, payments_per_invoice) if paid >= payments_per_invoice else [paid]
+        offsets = np.sort(rng.integers(0, 45, len(parts))).tolist()
+        modes = rng.integers(len(PAYMENT_MODES), size=len(parts)).tolist()
+        for amount, offset, mode in zip(parts, offsets, modes):
+            source_id = bank_source_id
+            if (
+                loan is not None
+                and number >= OWN_CONTRIBUTION_INVOICES
+                and loan["disbursed"] + amount <= loan["sanction_amount"]
+            ):
+                source_id = loan_source_id
+                loan["disbursed"] += amount
+            writer.add(
+                Payment,
+                user_id,
+                purchase_id,
+                invoice_id,
+                source_id,
+                min(invoice_date + timedelta(days=offset), AS_OF),
+                amount,
+                "online" if source_id == loan_source_id else PAYMENT_MODES[mode],
+                f"SYN{purchase_id}-{invoice_id}-{offset}",
+                None,
+                None,
+                None,
+            )
+
+    if loan is not None:
+        emis = _emis(loan["disbursed"], loan["interest_rate"], loan["tenure_months"], loan["sanction_date"])
+        repaid = sum(principal for _, principal, _ in emis)
+        writer.add(
+            Loan,
+            user_id,
+            purchase_id,
+            f"HL-{loan['id']:08d}",
+            loan["institution"],
+            loan["sanction_date"],
+            loan["sanction_amount"],
+            loan["sanction_amount"] // 200,
+            0,
+            loan["interest_rate"],
+            loan["tenure_months"],
+            True,
+            loan["disbursed"],
+            loan["disbursed"],
+            repaid,
+        )
+        for payment_date, principal, interest in emis:
+            writer.add(
+                LoanRepayment,
+                loan["id"],
+                payment_date,
+                principal,
+                interest,
+                0,
+                0,
+                bank_source_id,
+                "online",
+                f"EMI{loan['id']}-{payment_date:%Y%m}",
+            )
+
+
+def generate(
+    db: Session,
+    users: int,
+    properties: int,
+    invoices: int = 10,
+    payments_per_invoice: int = 3,
+    seed: int = 0,
+    batch_size: int = BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Write a synthetic portfolio; the caller commits or rolls back.
+    Returns the number of rows written per table.
+    """
+    rng = np.random.default_rng(seed)
+    writer = _Writer(db)
+    for _ in range(users):
+        user_id = writer.next_id[User]
+        writer.add(User, f"synthetic-{user_id}", "synthetic", f"synthetic-{user_id}@example.com")
+        bank = _pick(rng, BANKS)
+        bank_source_id = writer.add(
+            PaymentSource,
+            user_id,
+            f"{bank} savings",
+            "bank_account",
+            True,
+            bank,
+            f"XXXXXX{int(rng.integers(10**4)):04d}",
+            None,
+            None,
+        )
+        for _ in range(properties):
+            _purchase(writer, rng, user_id, bank_source_id, invoices, payments_per_invoice)
+            if len(writer.rows[Payment]) >= batch_size:
+                writer.flush()
+    writer.flush()
+
+    if db.connection().dialect.name == "postgresql":
+        # Ids were assigned explicitly, so move each sequence past them
+        for model, _ in TABLES:
+            table = model.__tablename__
+            db.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                )
+            )
+    versions.mark(db, *(model.__tablename__ for model, _ in TABLES))
+    summaries.refresh_all(db)
+    return writer.counts
@@ -0,0 +1,113 @@
+"""Per-table change counters used to validate cached API responses.
+
+Every transaction that writes to a table inserts a row for it into
+collection_changes just before it commits, so "has anything a response was
+built from changed?" is answered from those rows and the table's counter in
+collection_versions instead of scanning the tables themselves. ORM writes are
+picked up automatically; code that writes with Core statements (running
+totals, bulk imports) calls mark() itself.
+
+Writers only insert, so concurrent writers to the same table never wait on one
+another, and a change becomes visible exactly when the write commits. Now and
+then a writer folds a table's change rows into its counter; the counter row is
+taken with SKIP LOCKED, so a writer never waits for another one folding the
+same table. A version is the counter plus the table's unfolded changes, which
+folding leaves unchanged.
+"""
+import random
+from typing import Iterable
+
+from sqlalchemy import delete, event, func, insert, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from .base import Base
+from .models import CollectionChange, CollectionVersion
+
+# About one in this many writing commits folds the change rows of its tables
+FOLD_EVERY = 100
+
+_CHANGED = "versions.changed_tables"
+
+
+def mark(session: Session, *tables: str) -> None:
+    """Record that these tables were written in the session's current transaction."""
+    session.info.setdefault(_CHANGED, set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    tables = {
+        type(obj).__tablename__
+        for obj in list(session.new) + list(session.deleted)
+        if isinstance(obj, Base)
+    }
+    tables.update(
+        type(obj).__tablename__
+        for obj in session.dirty
+        if isinstance(obj, Base) and session.is_modified(obj)
+    )
+    tables.difference_update({CollectionVersion.__tablename__, CollectionChange.__tablename__})
+    if tables:
+        mark(session, *tables)
+
+
+@event.listens_for(Session, "before_commit")
+def _record_changes(session: Session) -> None:
+    # Commit only flushes after this hook runs, so flush here to collect pending changes
+    session.flush()
+    tables = sorted(session.info.pop(_CHANGED, ()))
+    if not tables:
+        return
+    session.execute(insert(CollectionChange.__table__), [{"name": name} for name in tables])
+    if random.random() * FOLD_EVERY < 1:
+        fold(session, tables)
+
+
+def fold(session: Session, tables: Iterable[str]) -> None:
+    """Move the tables' change rows into their counters, skipping tables another writer is folding."""
+    counters = CollectionVersion.__table__
+    changes = CollectionChange.__table__
+    # Seeded by the migration; a table without a counter row keeps its changes unfolded
+    rows = session.execute(
+        select(counters.c.name, counters.c.updated_at)
+        .where(counters.c.name.in_(sorted(set(tables))))
+        .with_for_update(skip_locked=True)
+    ).all()
+    for name, updated_at in rows:
+        # Only the holder of the counter row deletes its changes, so this never waits
+        folded = session.scalars(
+            delete(changes).where(changes.c.name == name).returning(changes.c.changed_at)
+        ).all()
+        if not folded:
+            continue
+        latest = max((at for at in (updated_at, *folded) if at is not None), default=None)
+        session.execute(
+            update(counters)
+            .where(counters.c.name == name)
+            .values(version=counters.c.version + len(folded), updated_at=latest)
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_CHANGED, None)
+
+
+def version_query(tables: Iterable[str]):
+    """Select the (count of counter rows, version summed over the tables, latest change)."""
+    names = sorted(set(tables))
+    counters = CollectionVersion.__table__
+    changes = CollectionChange.__table__
+    rows = union_all(
+        select(
+            literal(1).label("counter"),
+            counters.c.version.label("version"),
+            counters.c.updated_at.label("changed_at"),
+        ).where(counters.c.name.in_(names)),
+        select(literal(0), literal(1), changes.c.changed_at).where(changes.c.name.in_(names)),
+    ).subquery()
+    return select(
+        func.coalesce(func.sum(rows.c.counter), 0),
+        func.coalesce(func.sum(rows.c.version), 0),
+        func.max(rows.c.changed_at),
+    )
@@ -0,0 +1,73 @@
+"""Conditional GET support for list and detail endpoints.
+
+conditional() builds a route dependency that looks up the combined version of
+the tables a response is built from (see database.versions), turns it into an
+ETag and Last-Modified, and answers a matching If-None-Match (or, failing that,
+If-Modified-Since) with 304 before the endpoint runs its query.
+"""
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_async_read_db, versions
+
+
+def make_etag(request: Request, count: int, version: int) -> str:
+    # The query string is part of the tag so differently filtered lists never share one
+    raw = f"{request.url.path}?{request.url.query}|{count}|{version}"
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags
+
+
+def _not_modified_since(header: str, last_modified) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional(*models):
+    """Route dependency validating responses built from these models' tables."""
+    tables = [model.__tablename__ for model in models]
+
+    async def validate(
+        request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)
+    ) -> None:
+        count, version, updated_at = (await db.execute(versions.version_query(tables))).one()
+        etag = make_etag(request, count, version)
+        headers = {"ETag": etag}
+        last_modified: Optional[str] = None
+        if updated_at is not None:
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            last_modified = format_datetime(updated_at.astimezone(timezone.utc), usegmt=True)
+            headers["Last-Modified"] = last_modified
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, etag)
+        elif if_modified_since and updated_at is not None:
+            not_modified = _not_modified_since(if_modified_since, updated_at)
+        else:
+            not_modified = False
+        if not_modified:
+            # 304 responses carry no body; the handler sends just these headers
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    return validate
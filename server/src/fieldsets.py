@@ -0,0 +1,43 @@
+"""Sparse fieldsets for list and detail routes.
+
+Routes accept `?fields=id,amount,property_name` and map each response field to
+the SQL expression it is read from. The query then selects just the requested
+columns, so unrequested ones are never fetched, never hydrated into ORM
+objects and never serialized. Without `fields` every field of the response
+schema is selected, the same way.
+"""
+from typing import Iterable, Mapping, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+
+def parse(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma-separated `fields` parameter into schema field names, in schema order.
+    Returns None when no fields were requested; unknown names are rejected with 400.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        raise HTTPException(status_code=400, detail="fields must name at least one field")
+    unknown = sorted(requested - schema.model_fields.keys())
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+def columns(
+    column_map: Mapping[str, object],
+    schema: Type[BaseModel],
+    names: Optional[Iterable[str]] = None,
+    always: Iterable[str] = (),
+) -> list:
+    """
+    Labelled SQL columns for the requested field names (all of the schema's by default),
+    plus any `always` needed by the route itself, such as keyset pagination columns.
+    """
+    selected = dict.fromkeys(names if names is not None else schema.model_fields)
+    selected.update(dict.fromkeys(always))
+    return [column_map[name].label(name) for name in selected]
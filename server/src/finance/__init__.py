@@ -0,0 +1,4 @@
+"""Loan and investment calculations that run over whole portfolios with NumPy."""
+from . import amortization, returns, scenarios
+
+__all__ = ["amortization", "returns", "scenarios"]
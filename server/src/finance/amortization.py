@@ -0,0 +1,308 @@
+"""Month-by-month EMI schedules for loans drawn down in tranches.
+
+Under-construction loans are disbursed in parts, as the builder raises demands,
+and banks recompute the EMI on the outstanding balance over the remaining
+tenure after each disbursement. An annuity is linear in its principal, so that
+is the same as amortizing every tranche on its own over the months left when it
+was drawn, and adding the tranches up. Each tranche's balance after p payments
+has a closed form, which lets a schedule be computed for every tranche and every
+month at once with NumPy broadcasting, then summed per loan (and per calendar
+month for a portfolio) with bincount. There is no per-month loop. A portfolio
+is amortized a few thousand loans at a time (see amortize_in_chunks), so the
+tranche-by-month arrays stay small however many loans there are.
+
+Conventions: month 0 is the calendar month of the sanction date, a tranche
+drawn in month s is repaid from month s + 1, and interest accrues monthly at
+interest_rate / 12 on the opening balance. Broken-period (pre-EMI) interest
+for part of the month a tranche is drawn in is not modelled. Tranches are the
+payments made from the loan's payment sources.
+"""
+import calendar
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.database.models import Loan, Payment, PaymentSource
+
+# Per-month amounts in the arrays returned by amortize()
+COLUMNS = ("disbursement", "opening_balance", "emi", "principal", "interest", "closing_balance")
+
+# Tranche-months amortized per pass; amortize() holds about ten float arrays this size
+MAX_CELLS = 1_000_000
+
+
+def add_months(start: date, months: int) -> date:
+    """The same day `months` later, clamped to the end of shorter months."""
+    year, month = divmod(start.month - 1 + months, 12)
+    year += start.year
+    month += 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def month_index(dates, origins) -> np.ndarray:
+    """Whole calendar months from each origin date to the matching date."""
+    months = np.asarray(dates, dtype="datetime64[M]").astype(np.int64)
+    return months - np.asarray(origins, dtype="datetime64[M]").astype(np.int64)
+
+
+def amortize(
+    loan_index: np.ndarray,
+    start_month: np.ndarray,
+    amount: np.ndarray,
+    annual_rate: np.ndarray,
+    tenure: np.ndarray,
+) -> dict:
+    """
+    Schedules for a batch of loans from their tranches.
+    `loan_index`, `start_month` and `amount` describe each tranche: the loan it belongs
+    to (an index into `annual_rate` and `tenure`), the month it was drawn in and its size.
+    Returns {column: array of shape (loans, max tenure + 1)} for each of COLUMNS;
+    months past a loan's tenure are zero.
+    """
+    loan_index = np.asarray(loan_index, dtype=np.int64)
+    amount = np.asarray(amount, dtype=np.float64)
+    annual_rate = np.asarray(annual_rate, dtype=np.float64)
+    tenure = np.maximum(np.asarray(tenure, dtype=np.int64), 1)
+    loans = len(tenure)
+    horizon = int(tenure.max(initial=0)) + 1
+
+    # Tranches of a loan drawn in the same month amortize as one
+    start = np.clip(np.asarray(start_month, dtype=np.int64), 0, tenure[loan_index] - 1)
+    key, merged = np.unique(loan_index * horizon + start, return_inverse=True)
+    amount = np.bincount(merged.ravel(), weights=amount, minlength=len(key))
+    loan_index, start = np.divmod(key, horizon)
+
+    # Per tranche: monthly rate, month drawn and months left to repay it in
+    rate = (annual_rate / 1200.0)[loan_index][:, None]
+    start = start[:, None]
+    term = (tenure[loan_index][:, None] - start).astype(np.float64)
+    principal = amount[:, None]
+
+    # Payments made on each tranche by the end of each month, shape (tranches, horizon)
+    paid = np.arange(horizon)[None, :] - start
+    repaying = (paid >= 1) & (paid <= term)
+
+    growth = np.power(1.0 + rate, term)
+    has_rate = rate > 0
+    # Avoid dividing by zero for interest-free loans; those take the straight-line branch
+    denominator = np.where(has_rate, growth - 1.0, 1.0)
+
+    def balance(payments):
+        payments = np.clip(payments, 0, term)
+        compound = principal * (growth - np.power(1.0 + rate, payments)) / denominator
+        return np.where(has_rate, compound, principal * (1.0 - payments / term))
+
+    emi = np.where(has_rate, principal * rate * growth / denominator, principal / term)
+    opening = np.where(repaying, balance(paid - 1), 0.0)
+    interest = opening * rate
+    tranche_columns = {
+        "disbursement": np.where(paid == 0, principal, 0.0),
+        "emi": np.where(repaying, emi, 0.0),
+        "interest": interest,
+        "principal": np.where(repaying, emi - interest, 0.0),
+        "closing_balance": np.where(paid >= 0, balance(paid), 0.0),
+    }
+
+    # Sum tranches into their loans: flat index loan * horizon + month
+    flat = (loan_index[:, None] * horizon + np.arange(horizon)[None, :]).ravel()
+    size = loans * horizon
+    totals = {
+        name: np.bincount(flat, weights=values.ravel(), minlength=size).reshape(loans, horizon)
+        for name, values in tranche_columns.items()
+    }
+    previous = np.zeros_like(totals["closing_balance"])
+    previous[:, 1:] = totals["closing_balance"][:, :-1]
+    totals["opening_balance"] = previous + totals["disbursement"]
+
+    # Blank out months past each loan's tenure
+    within = np.arange(horizon)[None, :] <= tenure[:, None]
+    return {name: np.where(within, totals[name], 0.0) for name in COLUMNS}
+
+
+def amortize_in_chunks(
+    loan_index: np.ndarray,
+    start_month: np.ndarray,
+    amount: np.ndarray,
+    annual_rate: np.ndarray,
+    tenure: np.ndarray,
+    max_cells: int = MAX_CELLS,
+) -> Iterator[Tuple[int, dict]]:
+    """
+    amortize() over consecutive runs of loans, each small enough to hold about
+    `max_cells` tranche-months. Yields (first loan, columns for its run of loans).
+    """
+    loan_index = np.asarray(loan_index, dtype=np.int64)
+    tenure = np.asarray(tenure, dtype=np.int64)
+    loans = len(tenure)
+    order = np.argsort(loan_index, kind="stable")
+    # Tranches of loans [0, i) end at ends[i - 1] in `order`
+    ends = np.cumsum(np.bincount(loan_index, minlength=loans))
+    per_pass = max(1, max_cells // (int(tenure.max(initial=0)) + 2))
+    first = 0
+    while first < loans:
+        done = int(ends[first - 1]) if first else 0
+        last = max(first + 1, int(np.searchsorted(ends, done + per_pass, side="right")))
+        last = min(last, loans)
+        chunk = order[done:int(ends[last - 1])]
+        yield first, amortize(
+            loan_index[chunk] - first,
+            np.asarray(start_month)[chunk],
+            np.asarray(amount)[chunk],
+            np.asarray(annual_rate)[first:last],
+            tenure[first:last],
+        )
+        first = last
+
+
+def by_calendar_month(columns: dict, offset: np.ndarray, tenure: np.ndarray) -> dict:
+    """
+    Add schedules from amortize() up by calendar month.
+    `offset` is each loan's month 0 counted from the earliest one; returns 1-d arrays.
+    """
+    offset = np.asarray(offset, dtype=np.int64)
+    loans, horizon = columns["emi"].shape
+    months = offset[:, None] + np.arange(horizon)[None, :]
+    within = np.arange(horizon)[None, :] <= np.asarray(tenure)[:, None]
+    index = months[within]
+    size = int(index.max(initial=-1)) + 1
+    return {
+        name: np.bincount(index, weights=values[within], minlength=size)
+        for name, values in columns.items()
+    }
+
+
+def money(values: np.ndarray) -> List[Decimal]:
+    """Round an array of amounts to Decimals with two places."""
+    # Adding 0.0 turns -0.0 from rounding tiny float residues into 0.0
+    return [Decimal(f"{value:.2f}") for value in (np.round(values, 2) + 0.0).tolist()]
+
+
+def _rows(columns: dict, row: int, months: int, origin: date) -> List[dict]:
+    values = {name: money(columns[name][row, : months + 1]) for name in COLUMNS}
+    return [
+        {"month": month, "due_date": add_months(origin, month), **{name: values[name][month] for name in COLUMNS}}
+        for month in range(months + 1)
+    ]
+
+
+def load_loans(
+    db: Session,
+    loan_ids: Optional[Iterable[int]] = None,
+    active_only: bool = False,
+    include_undisbursed: bool = False,
+):
+    """
+    Loans and their tranches, as NumPy inputs for amortize().
+    Returns (loan rows, amortize() arguments, amount disbursed per loan).
+    """
+    query = select(
+        Loan.id,
+        Loan.name,
+        Loan.sanction_date,
+        Loan.sanction_amount,
+        Loan.interest_rate,
+        Loan.tenure_months,
+    ).order_by(Loan.id)
+    if loan_ids is not None:
+        query = query.where(Loan.id.in_(list(loan_ids)))
+    if active_only:
+        query = query.where(Loan.is_active.is_(True))
+    loans = db.execute(query).all()
+    position = {loan.id: i for i, loan in enumerate(loans)}
+
+    tranches = db.execute(
+        select(PaymentSource.loan_id, Payment.payment_date, Payment.amount)
+        .join(PaymentSource, Payment.source_id == PaymentSource.id)
+        .where(PaymentSource.loan_id.in_(list(position)))
+    ).all() if loans else []
+
+    loan_index = np.array([position[t.loan_id] for t in tranches], dtype=np.int64)
+    sanction_dates = [loans[i].sanction_date for i in loan_index.tolist()]
+    start_month = month_index([t.payment_date for t in tranches], sanction_dates) if tranches else np.zeros(0, np.int64)
+    amount = np.array([float(t.amount) for t in tranches], dtype=np.float64)
+
+    disbursed = np.bincount(loan_index, weights=amount, minlength=len(loans))
+    if include_undisbursed and loans:
+        # Draw whatever is left of each sanction alongside the loan's latest tranche
+        remaining = np.array([float(loan.sanction_amount) for loan in loans]) - disbursed
+        latest = np.zeros(len(loans), dtype=np.int64)
+        np.maximum.at(latest, loan_index, start_month)
+        pending = np.flatnonzero(remaining > 0.005)
+        loan_index = np.concatenate([loan_index, pending])
+        start_month = np.concatenate([start_month, latest[pending]])
+        amount = np.concatenate([amount, remaining[pending]])
+
+    rates = np.array([float(loan.interest_rate) for loan in loans], dtype=np.float64)
+    tenure = np.array([loan.tenure_months for loan in loans], dtype=np.int64)
+    return loans, (loan_index, start_month, amount, rates, tenure), disbursed
+
+
+def _summary(loan, columns: dict, row: int, disbursed: float) -> dict:
+    months = max(loan.tenure_months, 1)
+    emi = columns["emi"][row, : months + 1]
+    total_interest, total_payment, final_emi = money(
+        np.array([columns["interest"][row].sum(), emi.sum(), emi[-1]])
+    )
+    return {
+        "loan_id": loan.id,
+        "loan_name": loan.name,
+        "sanction_date": loan.sanction_date,
+        "sanction_amount": loan.sanction_amount,
+        "interest_rate": loan.interest_rate,
+        "tenure_months": loan.tenure_months,
+        "disbursed_amount": money(np.array([disbursed]))[0],
+        "emi": final_emi,
+        "total_interest": total_interest,
+        "total_payment": total_payment,
+        "end_date": add_months(loan.sanction_date, months),
+    }
+
+
+def loan_schedule(db: Session, loan_id: int, include_undisbursed: bool = False) -> Optional[dict]:
+    """A loan's schedule summary plus its month-by-month rows, or None if there's no such loan."""
+    loans, inputs, disbursed = load_loans(db, [loan_id], include_undisbursed=include_undisbursed)
+    if not loans:
+        return None
+    columns = amortize(*inputs)
+    loan = loans[0]
+    return {
+        **_summary(loan, columns, 0, disbursed[0]),
+        "schedule": _rows(columns, 0, max(loan.tenure_months, 1), loan.sanction_date),
+    }
+
+
+def portfolio_schedule(db: Session, include_undisbursed: bool = False) -> dict:
+    """
+    Schedules for every active loan, computed in batches of loans: a summary per loan
+    and the combined disbursements, EMIs and balances for each calendar month.
+    """
+    loans, inputs, disbursed = load_loans(db, active_only=True, include_undisbursed=include_undisbursed)
+    if not loans:
+        return {"loans": [], "months": []}
+    sanction_dates = [loan.sanction_date for loan in loans]
+    offset = month_index(sanction_dates, [min(sanction_dates)] * len(loans))
+    tenure = inputs[-1]
+    size = int((offset + np.maximum(tenure, 0)).max()) + 1
+    monthly = {name: np.zeros(size) for name in COLUMNS}
+    summaries = []
+    for start, columns in amortize_in_chunks(*inputs):
+        count = len(columns["emi"])
+        summaries.extend(
+            _summary(loans[start + i], columns, i, disbursed[start + i]) for i in range(count)
+        )
+        chunk = by_calendar_month(columns, offset[start:start + count], tenure[start:start + count])
+        for name, values in chunk.items():
+            monthly[name][: len(values)] += values
+    first = min(sanction_dates).replace(day=1)
+    values = {name: money(monthly[name]) for name in COLUMNS}
+    return {
+        "loans": summaries,
+        "months": [
+            {"month": month, "due_date": add_months(first, month), **{name: values[name][month] for name in COLUMNS}}
+            for month in range(len(monthly["emi"]))
+        ],
+    }
@@ -0,0 +1,244 @@
+"""Annualized returns (XIRR) on purchases, from their dated cashflows.
+
+The investor's own cashflows on a purchase are builder payments made from
+non-loan sources, and loan repayments (EMIs, fees and all). Payments funded by
+a loan aren't the investor's cash; they are counted through the repayments,
+the same way the acquisition cost summary counts them. The terminal cashflow,
+on the valuation date, is what the investor would hold if the property were
+sold for its current valuation (current_rate x super_area) and the loan
+principal still owed were paid off.
+
+Cashflows are streamed from one UNION ALL query in purchase order, and the XIRR
+of every purchase (and of the portfolio as a whole) is solved in one batch:
+Newton steps for all purchases at once, falling back to bisection wherever a
+step would leave the bracketing interval.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import Session
+
+from src.database.models import Loan, LoanRepayment, Payment, PaymentSource, Property, Purchase
+
+from .amortization import money
+
+# Bracket searched for a root, as annual rates (-99% to +1000%)
+LOWEST_RATE = -0.99
+HIGHEST_RATE = 10.0
+
+# Rows fetched per round trip while streaming cashflows
+STREAM_CHUNK_SIZE = 5000
+
+
+def _npv(rates, index, amounts, years, groups):
+    """NPV and its derivative at each group's rate, summed per group."""
+    rate = rates[index]
+    discount = np.exp(-years * np.log1p(rate))
+    npv = np.bincount(index, weights=amounts * discount, minlength=groups)
+    slope = np.bincount(index, weights=-years * amounts * discount / (1.0 + rate), minlength=groups)
+    return npv, slope
+
+
+def _initial_guess(index, amounts, years, groups):
+    """Money multiple annualized over the gap between average outflow and inflow dates."""
+    inflow = np.where(amounts > 0, amounts, 0.0)
+    outflow = np.where(amounts < 0, -amounts, 0.0)
+    received = np.bincount(index, weights=inflow, minlength=groups)
+    paid = np.bincount(index, weights=outflow, minlength=groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gap = (
+            np.bincount(index, weights=inflow * years, minlength=groups) / received
+            - np.bincount(index, weights=outflow * years, minlength=groups) / paid
+        )
+        guess = np.power(received / paid, 1.0 / np.maximum(gap, 1.0 / 12)) - 1.0
+    return np.where(np.isfinite(guess), guess, 0.1)
+
+
+def xirr(
+    index: np.ndarray,
+    amounts: np.ndarray,
+    years: np.ndarray,
+    groups: int,
+    tolerance: float = 1e-9,
+    max_iterations: int = 100,
+) -> np.ndarray:
+    """
+    Solve the XIRR of many cashflow series at once.
+    Each cashflow has the series it belongs to (`index`, 0 to groups - 1), an amount and
+    its time in years from the series' first cashflow. Returns annual rates, with NaN
+    where a series has no root in the bracket (e.g. only outflows).
+    """
+    index = np.asarray(index, dtype=np.int64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    years = np.asarray(years, dtype=np.float64)
+
+    low = np.full(groups, LOWEST_RATE)
+    high = np.full(groups, HIGHEST_RATE)
+    npv_low, _ = _npv(low, index, amounts, years, groups)
+    npv_high, _ = _npv(high, index, amounts, years, groups)
+    solvable = np.sign(npv_low) * np.sign(npv_high) < 0
+    # Which side of a root the low end is on decides how a new point narrows the bracket
+    low_sign = np.sign(npv_low)
+
+    rate = np.clip(_initial_guess(index, amounts, years, groups), LOWEST_RATE / 2, HIGHEST_RATE / 2)
+    converged = ~solvable
+    for _ in range(max_iterations):
+        # Only series still being solved are evaluated
+        pending = ~converged[index]
+        npv, slope = _npv(rate, index[pending], amounts[pending], years[pending], groups)
+        narrow_low = np.sign(npv) == low_sign
+        low = np.where(narrow_low & ~converged, rate, low)
+        high = np.where(~narrow_low & ~converged, rate, high)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = rate - npv / slope
+        bisect = (low + high) / 2.0
+        inside = np.isfinite(newton) & (newton > low) & (newton < high)
+        step = np.where(inside, newton, bisect)
+
+        done = converged | (np.abs(step - rate) <= tolerance * (1.0 + np.abs(rate)))
+        rate = np.where(converged, rate, step)
+        converged = done
+        if converged.all():
+            break
+
+    return np.where(solvable, rate, np.nan)
+
+
+def _cashflow_query(purchase_ids: Optional[list], as_of: date):
+    """(purchase_id, date, own cash, change in loan principal owed), in purchase order."""
+    own_payments = (
+        select(
+            Payment.purchase_id.label("purchase_id"),
+            Payment.payment_date.label("flow_date"),
+            (-Payment.amount).label("cash"),
+            literal(0).label("debt"),
+        )
+        .join(PaymentSource, Payment.source_id == PaymentSource.id)
+        .where(PaymentSource.source_type != "loan", Payment.payment_date <= as_of)
+    )
+    loan_payments = (
+        select(
+            Payment.purchase_id,
+            Payment.payment_date,
+            literal(0),
+            Payment.amount,
+        )
+        .join(PaymentSource, Payment.source_id == PaymentSource.id)
+        .where(PaymentSource.source_type == "loan", Payment.payment_date <= as_of)
+    )
+    repayments = (
+        select(
+            Loan.purchase_id,
+            LoanRepayment.payment_date,
+            -LoanRepayment.total_payment,
+            -LoanRepayment.principal_amount,
+        )
+        .join(Loan, LoanRepayment.loan_id == Loan.id)
+        .where(LoanRepayment.payment_date <= as_of)
+    )
+    if purchase_ids is not None:
+        own_payments = own_payments.where(Payment.purchase_id.in_(purchase_ids))
+        loan_payments = loan_payments.where(Payment.purchase_id.in_(purchase_ids))
+        repayments = repayments.where(Loan.purchase_id.in_(purchase_ids))
+    flows = union_all(own_payments, loan_payments, repayments).subquery()
+    return select(flows).order_by(flows.c.purchase_id, flows.c.flow_date)
+
+
+def _percent(rates: np.ndarray) -> list:
+    return [None if np.isnan(rate) else Decimal(f"{rate * 100:.4f}") for rate in rates.tolist()]
+
+
+def purchase_returns(
+    db: Session, purchase_ids: Optional[Iterable[int]] = None, as_of: Optional[date] = None
+) -> dict:
+    """
+    XIRR of each purchase (all of them by default) and of the purchases taken together,
+    valued on `as_of` (today by default).
+    Returns {"purchases": [per-purchase result, ...], "portfolio": combined result}.
+    """
+    as_of = as_of or date.today()
+    purchase_ids = list(purchase_ids) if purchase_ids is not None else None
+
+    valuations = select(
+        Purchase.id,
+        Property.name.label("property_name"),
+        (Purchase.current_rate * Purchase.super_area).label("current_value"),
+    ).outerjoin(Property, Purchase.property_id == Property.id).order_by(Purchase.id)
+    if purchase_ids is not None:
+        valuations = valuations.where(Purchase.id.in_(purchase_ids))
+    purchases = db.execute(valuations).all()
+    position = {purchase.id: i for i, purchase in enumerate(purchases)}
+    count = len(purchases)
+
+    # Stream the cashflows into flat arrays: group, day number, own cash, debt change
+    index, days, cash, debt = [], [], [], []
+    result = db.execute(
+        _cashflow_query(purchase_ids, as_of).execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    for chunk in result.partitions():
+        for purchase_id, flow_date, flow_cash, flow_debt in chunk:
+            if purchase_id not in position:
+                continue
+            index.append(position[purchase_id])
+            days.append(flow_date.toordinal())
+            cash.append(float(flow_cash or 0))
+            debt.append(float(flow_debt or 0))
+    index = np.array(index, dtype=np.int64)
+    days = np.array(days, dtype=np.int64)
+    cash = np.array(cash, dtype=np.float64)
+    debt = np.array(debt, dtype=np.float64)
+
+    has_flows = np.bincount(index, minlength=count) > 0
+    invested = -np.bincount(index, weights=cash, minlength=count)
+    owed = np.bincount(index, weights=debt, minlength=count)
+    value = np.array(
+        [np.nan if p.current_value is None else float(p.current_value) for p in purchases],
+        dtype=np.float64,
+    )
+    net_value = value - owed
+    first_day = np.full(count, as_of.toordinal(), dtype=np.int64)
+    np.minimum.at(first_day, index, days)
+
+    # Each purchase is a group; group `count` is the whole portfolio. The terminal
+    # cashflow of each purchase closes both its own series and the portfolio's.
+    valued = ~np.isnan(net_value)
+    terminal = np.flatnonzero(valued)
+    portfolio_start = first_day[valued].min() if valued.any() else as_of.toordinal()
+    in_portfolio = valued[index]
+    flow_group = np.concatenate([index, np.full(in_portfolio.sum(), count), terminal, np.full(len(terminal), count)])
+    flow_amount = np.concatenate([cash, cash[in_portfolio], net_value[terminal], net_value[terminal]])
+    flow_day = np.concatenate([days, days[in_portfolio], np.full(len(terminal) * 2, as_of.toordinal())])
+    origin = np.append(first_day, portfolio_start)
+    years = (flow_day - origin[flow_group]) / 365.0
+
+    rates = xirr(flow_group, flow_amount, years, count + 1)
+    # Unvalued purchases have no terminal cashflow, so no return
+    rates[:count] = np.where(valued, rates[:count], np.nan)
+
+    percents = _percent(rates)
+    invested_money = money(invested)
+    owed_money = money(owed)
+    results = [
+        {
+            "purchase_id": purchase.id,
+            "property_name": purchase.property_name,
+            "invested": invested_money[i],
+            "current_value": purchase.current_value,
+            "outstanding_loan": owed_money[i],
+            "first_cashflow_date": date.fromordinal(int(first_day[i])) if has_flows[i] else None,
+            "xirr": percents[i],
+        }
+        for i, purchase in enumerate(purchases)
+    ]
+    totals = money(np.array([invested[valued].sum(), np.nansum(value), owed[valued].sum()]))
+    portfolio = {
+        "invested": totals[0],
+        "current_value": totals[1],
+        "outstanding_loan": totals[2],
+        "xirr": percents[count],
+    }
+    return {"purchases": results, "portfolio": portfolio, "as_of": as_of}
@@ -0,0 +1,221 @@
+"""What-if simulation of prepayments and rate changes on loans.
+
+A scenario applies, in one month of a loan's schedule, a prepayment and/or a
+shift in the interest rate, and then either keeps the EMI and lets the tenure
+shrink (or grow), or keeps the end date and recomputes the EMI. Every
+(loan, scenario) pair becomes a row of a batch, with one extra unchanged row
+per loan as the baseline. The batch is stepped through the months with NumPy,
+one array operation per step for all rows, so the cost is set by the longest
+tenure and hardly depends on how many scenarios are asked for.
+
+Month numbering, tranches and EMI recomputation on each disbursement follow
+amortization.py; the baseline rows reproduce its schedules. The prepayment is
+made after that month's EMI, and a shifted rate applies to interest from that
+month on.
+"""
+from itertools import product
+from typing import Iterable, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import amortization
+
+REDUCE_TENURE = "reduce_tenure"  # keep the EMI, finish earlier
+REDUCE_EMI = "reduce_emi"  # keep the end date, pay less each month
+MODES = (REDUCE_TENURE, REDUCE_EMI)
+
+# Longest schedule simulated; a loan that isn't repaid by then has no tenure
+MAX_MONTHS = 600
+# Upper bound on loans x scenarios in one request
+MAX_SCENARIOS = 20_000
+
+# Balances below half a paisa count as repaid
+CLEARED = 0.005
+
+
+def annuity(balance: np.ndarray, rate: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """EMI that repays `balance` in `months` at a monthly `rate`."""
+    months = np.maximum(months, 1).astype(np.float64)
+    growth = np.power(1.0 + rate, months)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        compound = balance * rate * growth / (growth - 1.0)
+    return np.where(rate > 0, compound, balance / months)
+
+
+def simulate(
+    disbursement: np.ndarray,
+    annual_rate: np.ndarray,
+    tenure: np.ndarray,
+    month: np.ndarray,
+    prepayment: np.ndarray,
+    rate_shift: np.ndarray,
+    reduce_emi: np.ndarray,
+) -> dict:
+    """
+    Run a batch of scenarios. Each row has its loan's disbursements by month (one row
+    of amortize()'s "disbursement" output), annual rate and tenure, and the scenario's
+    month, prepayment, rate shift (in percentage points) and mode.
+    Returns per-row arrays: "emi" after the change, "total_interest" and "tenure"
+    (the month of the last payment, or -1 if the loan isn't repaid within MAX_MONTHS).
+    """
+    disbursement = np.asarray(disbursement, dtype=np.float64)
+    rows, drawn_months = disbursement.shape
+    tenure = np.maximum(np.asarray(tenure, dtype=np.int64), 1)
+    month = np.asarray(month, dtype=np.int64)
+    prepayment = np.asarray(prepayment, dtype=np.float64)
+    reduce_emi = np.asarray(reduce_emi, dtype=bool)
+    annual_rate = np.asarray(annual_rate, dtype=np.float64)
+    base_rate = annual_rate / 1200.0
+    new_rate = np.maximum(annual_rate + np.asarray(rate_shift, dtype=np.float64), 0.0) / 1200.0
+    last_drawn = np.where(disbursement.any(axis=0))[0]
+    last_drawn = int(last_drawn[-1]) if len(last_drawn) else 0
+
+    balance = disbursement[:, 0].copy()
+    emi = annuity(balance, base_rate, tenure)
+    emi_after = emi.copy()
+    total_interest = np.zeros(rows)
+    repaid_in = np.where(balance > CLEARED, -1, 0)
+
+    for k in range(1, max(MAX_MONTHS, int(tenure.max())) + 1):
+        rate = np.where(k >= month, new_rate, base_rate)
+        interest = balance * rate
+        payment = np.minimum(emi, balance + interest)
+        owing = balance > CLEARED
+        balance = np.where(owing, balance + interest - payment, balance)
+        total_interest += np.where(owing, interest, 0.0)
+
+        event = month == k
+        if event.any():
+            balance = balance - np.where(event, np.minimum(prepayment, balance), 0.0)
+            emi = np.where(event & reduce_emi, annuity(balance, new_rate, tenure - k), emi)
+            emi_after = np.where(event, emi, emi_after)
+
+        cleared = owing & (balance <= CLEARED)
+        repaid_in = np.where(cleared, k, repaid_in)
+        balance = np.where(cleared, 0.0, balance)
+
+        if k < drawn_months:
+            drawn = disbursement[:, k]
+            if drawn.any():
+                # A new tranche re-spreads the balance over what is left of the original tenure
+                balance = balance + drawn
+                next_rate = np.where(k + 1 >= month, new_rate, base_rate)
+                emi = np.where(drawn > 0, annuity(balance, next_rate, tenure - k), emi)
+                emi_after = np.where((drawn > 0) & (month <= k), emi, emi_after)
+                repaid_in = np.where(drawn > 0, -1, repaid_in)
+
+        if k >= last_drawn and not (balance > CLEARED).any():
+            break
+
+    return {"emi": emi_after, "total_interest": total_interest, "tenure": repaid_in}
+
+
+def scenario_grid(
+    months: Sequence[int],
+    prepayments: Sequence[float],
+    rate_shifts_bps: Sequence[int],
+    modes: Sequence[str],
+) -> list:
+    """Every combination of the given values, as (month, prepayment, rate shift, mode)."""
+    if not (months and prepayments and rate_shifts_bps and modes):
+        raise ValueError("Each scenario dimension needs at least one value")
+    unknown = sorted(set(modes) - set(MODES))
+    if unknown:
+        raise ValueError(f"Unknown modes: {', '.join(unknown)}")
+    if any(m < 1 for m in months):
+        raise ValueError("Scenario months start at 1, the first instalment")
+    if any(p < 0 for p in prepayments):
+        raise ValueError("Prepayments can't be negative")
+    # Checked before building the product, which could otherwise be huge
+    if len(months) * len(prepayments) * len(rate_shifts_bps) * len(modes) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} loan scenarios can be simulated at once")
+    return list(product(months, prepayments, rate_shifts_bps, modes))
+
+
+def simulate_loans(
+    db: Session,
+    loan_ids: Iterable[int],
+    scenarios: Sequence[tuple],
+    include_undisbursed: bool = False,
+) -> dict:
+    """
+    Evaluate every scenario (see scenario_grid) against every loan in one batch.
+    Raises LookupError naming loans that don't exist, and ValueError for too large a batch.
+    """
+    loan_ids = list(dict.fromkeys(loan_ids))
+    if not loan_ids:
+        raise ValueError("No loans to simulate")
+    if len(loan_ids) * len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} loan scenarios can be simulated at once")
+    loans, inputs, _ = amortization.load_loans(db, loan_ids, include_undisbursed=include_undisbursed)
+    missing = sorted(set(loan_ids) - {loan.id for loan in loans})
+    if missing:
+        raise LookupError(f"Loans not found: {', '.join(map(str, missing))}")
+
+    schedule = amortization.amortize(*inputs)
+    _, _, _, rates, tenure = inputs
+    count = len(scenarios)
+
+    # Rows: one baseline per loan, then each loan's scenarios
+    loan_row = np.concatenate([np.arange(len(loans)), np.repeat(np.arange(len(loans)), count)])
+    grid = np.array(
+        [(m, p, s / 100.0, mode == REDUCE_EMI) for m, p, s, mode in scenarios], dtype=np.float64
+    )
+    # Baseline rows change nothing: month 0 never comes round
+    events = np.vstack([np.zeros((len(loans), 4)), np.tile(grid, (len(loans), 1))])
+
+    result = simulate(
+        schedule["disbursement"][loan_row],
+        rates[loan_row],
+        tenure[loan_row],
+        events[:, 0].astype(np.int64),
+        events[:, 1],
+        events[:, 2],
+        events[:, 3].astype(bool),
+    )
+
+    first = len(loans)
+    baseline_tenure = result["tenure"][:first]
+    emi = amortization.money(result["emi"])
+    interest = amortization.money(result["total_interest"])
+    saved = amortization.money(
+        result["total_interest"][:first][loan_row[first:]] - result["total_interest"][first:]
+    )
+
+    def tenure_of(row):
+        return int(result["tenure"][row]) if result["tenure"][row] >= 0 else None
+
+    baselines = [
+        {
+            "loan_id": loan.id,
+            "emi": emi[i],
+            "total_interest": interest[i],
+            "tenure_months": tenure_of(i),
+        }
+        for i, loan in enumerate(loans)
+    ]
+    outcomes = []
+    for offset, i in enumerate(range(first, len(loan_row))):
+        loan = loan_row[i]
+        month, prepayment, shift, mode = scenarios[offset % count]
+        new_tenure = tenure_of(i)
+        outcomes.append(
+            {
+                "loan_id": loans[loan].id,
+                "month": month,
+                "prepayment": prepayment,
+                "rate_shift_bps": shift,
+                "mode": mode,
+                "emi": emi[i],
+                "total_interest": interest[i],
+                "interest_saved": saved[offset],
+                "tenure_months": new_tenure,
+                "months_saved": (
+                    int(baseline_tenure[loan]) - new_tenure
+                    if new_tenure is not None and baseline_tenure[loan] >= 0
+                    else None
+                ),
+            }
+        )
+    return {"baselines": baselines, "scenarios": outcomes}
@@ -0,0 +1,111 @@
+"""Logging that keeps file I/O and formatting off the request path.
+
+configure() puts a QueueHandler on the root logger, so logging a record only
+appends it to an in-memory queue. A QueueListener thread takes records off the
+queue, formats them and writes them out: everything to logs/app.log as text,
+and the per-request access records to logs/access.log as JSON lines.
+
+Records are queued as they are, without being formatted first, so %-style
+arguments (logger.info("Found %s rows", count)) are rendered on the listener
+thread, and not at all for records below the level. When LOG_LEVEL is DEBUG,
+only LOG_DEBUG_SAMPLE_RATE of debug records are kept, so turning debug logging
+on in production doesn't flood the queue.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_DIR = os.getenv("LOG_DIR") or "logs"
+LOG_LEVEL = (os.getenv("LOG_LEVEL") or "INFO").upper()
+DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE") or 0.01)
+
+# Logger the access log middleware writes to
+ACCESS_LOGGER = "src.access"
+# Request fields written to each access log line
+ACCESS_FIELDS = ("method", "path", "status", "duration_ms", "db_queries", "db_time_ms", "client")
+
+APP_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats the message here, on the caller's thread, so
+        # records can be pickled; an in-process queue passes them by reference
+        return record
+
+
+class DebugSampler(logging.Filter):
+    """Keep every record above DEBUG and a random `rate` of DEBUG records."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class AccessFormatter(logging.Formatter):
+    """One JSON object per request."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"time": datetime.fromtimestamp(record.created, timezone.utc).isoformat()}
+        entry.update((name, getattr(record, name)) for name in ACCESS_FIELDS if hasattr(record, name))
+        return json.dumps(entry, default=str)
+
+
+def configure(
+    log_dir: str = LOG_DIR,
+    level: str = LOG_LEVEL,
+    debug_sample_rate: float = DEBUG_SAMPLE_RATE,
+) -> QueueListener:
+    """Route all logging through the queue and start the writer thread; safe to call twice."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    os.makedirs(log_dir, exist_ok=True)
+    app_handler = logging.FileHandler(os.path.join(log_dir, "app.log"))
+    app_handler.setFormatter(logging.Formatter(APP_FORMAT))
+    app_handler.addFilter(lambda record: record.name != ACCESS_LOGGER)
+    access_handler = logging.FileHandler(os.path.join(log_dir, "access.log"))
+    access_handler.setFormatter(AccessFormatter())
+    access_handler.addFilter(lambda record: record.name == ACCESS_LOGGER)
+
+    records = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(records)
+    queue_handler.addFilter(DebugSampler(debug_sample_rate))
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(records, app_handler, access_handler, respect_handler_level=True)
+    _listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def after_fork() -> None:
+    """Restart the writer thread in a forked child process; threads don't survive fork."""
+    global _listener
+    if _listener is None:
+        return
+    atexit.unregister(_listener.stop)
+    _listener = QueueListener(_listener.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
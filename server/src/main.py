@@ -1,25 +1,33 @@
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict
-from src import schemas, routes
+from src import logging_config, profiling, schemas, routes
+from src.cache import ACQUISITION_COST, LOANS, response_cache
 from src.database import (
     get_db,
+    get_async_db,
+    get_read_db,
+    replicas,
+    engine,
+    async_engine,
+    pool_stats,
+    warm_up,
+    warm_up_async,
     models,
     views,
     init as db_init,
 )
-from sqlalchemy import func
-import logging  
-
-# Configure root logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='logs/app.log'
-)
+from sqlalchemy import func, select
+from time import perf_counter
+import logging
+
+# Send all logging through a queue; a background thread formats and writes it
+logging_config.configure()
 
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger(logging_config.ACCESS_LOGGER)
 app = FastAPI()
 
 # Add CORS middleware
@@ -29,6 +37,7 @@ app.add_middleware(
     # allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing", replicas.WRITE_HEADER],
 )
 
 
@@ -36,6 +45,15 @@ app.add_middleware(
 @app.on_event("startup")
 def startup_db_client():
     db_init()
+    warm_up(engine)
+
+
+# Open DB_POOL_WARMUP connections up front so the first requests don't pay for them
+@app.on_event("startup")
+async def warm_up_async_pool():
+    opened = await warm_up_async(async_engine)
+    if opened:
+        logger.info("Warmed up %s async database connections", opened)
 
 
 # Mount the router to the main app
@@ -46,6 +64,7 @@ app.include_router(routes.payments_router)
 app.include_router(routes.repayments_router)
 app.include_router(routes.payment_sources_router)
 app.include_router(routes.invoices_router)
+app.include_router(routes.dashboard_router)
 
 
 # Health check endpoint
@@ -54,11 +73,27 @@ def health_check():
     return {"status": "healthy"}
 
 
+# Connection pool diagnostics
+@app.get("/health/pool")
+def pool_health_check():
+    return {
+        "sync": pool_stats(engine.pool),
+        "async": pool_stats(async_engine.sync_engine.pool),
+        "replicas": replicas.stats(),
+    }
+
+
+# Dashboard response cache diagnostics
+@app.get("/health/cache")
+def cache_health_check():
+    return response_cache.stats()
+
+
 # Construction Status routes
 @app.get("/construction-status", response_model=List[schemas.ConstructionStatus], include_in_schema=False)
 @app.get("/construction-status/", response_model=List[schemas.ConstructionStatus])
 def get_construction_statuses(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> List[schemas.ConstructionStatus]:
     try:
         statuses = db.query(models.ConstructionStatus).all()
@@ -69,7 +104,7 @@ def get_construction_statuses(
 @app.get("/construction-status/{status_id}", response_model=schemas.ConstructionStatus, include_in_schema=False)
 @app.get("/construction-status/{status_id}/", response_model=schemas.ConstructionStatus)
 def get_construction_status(
-    status_id: int, db: Session = Depends(get_db)
+    status_id: int, db: Session = Depends(get_read_db)
 ) -> schemas.ConstructionStatus:
     try:
         status = (
@@ -86,6 +121,7 @@ def get_construction_status(
 
 @app.get("/acquisition-cost/summary", response_model=List[schemas.AcquisitionCostSummary], include_in_schema=False)
 @app.get("/acquisition-cost/summary/", response_model=List[schemas.AcquisitionCostSummary])
+@response_cache.cached(ACQUISITION_COST, List[schemas.AcquisitionCostSummary], scope="purchase_id")
 def get_acquisition_cost_summary(
     user_id: Optional[int] = None,
     purchase_id: Optional[int] = None,
@@ -110,6 +146,7 @@ def get_acquisition_cost_summary(
 
 @app.get("/acquisition-cost/details", response_model=List[schemas.AcquisitionCostDetails], include_in_schema=False)
 @app.get("/acquisition-cost/details/", response_model=List[schemas.AcquisitionCostDetails])
+@response_cache.cached(ACQUISITION_COST, List[schemas.AcquisitionCostDetails], scope="purchase_id")
 def get_acquisition_cost_details(
     user_id: Optional[int] = None,
     purchase_id: Optional[int] = None,
@@ -150,6 +187,7 @@ def get_acquisition_cost_details(
 
 @app.get("/loan-repayment-details/summary", response_model=List[schemas.LoanRepaymentSummary], include_in_schema=False)
 @app.get("/loan-repayment-details/summary/", response_model=List[schemas.LoanRepaymentSummary])
+@response_cache.cached(LOANS, List[schemas.LoanRepaymentSummary])
 def get_loan_repayment_summary(
     user_id: int,
     loan_name: Optional[str] = None,
@@ -189,7 +227,6 @@ def get_loan_repayment_summary(
         query = query.group_by(views.LoanRepaymentDetails.loan_name)
 
         results = query.all()
-        print(results)
 
         # Convert results to dictionaries
         formatted_results = []
@@ -211,14 +248,14 @@ def get_loan_repayment_summary(
 
 @app.get("/loans/summary", response_model=List[schemas.LoanSummary], include_in_schema=False)
 @app.get("/loans/summary/", response_model=List[schemas.LoanSummary])
-def get_loan_summary(
+@response_cache.cached(LOANS, List[schemas.LoanSummary], scope="loan_id")
+async def get_loan_summary(
     user_id: Optional[int] = None,
     loan_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> List[schemas.LoanSummary]:
     try:
-        print(user_id, loan_id)
-        query = db.query(views.LoanRepaymentSummary)
+        query = select(views.LoanRepaymentSummary)
 
         # Apply filters if provided
         if user_id:
@@ -228,7 +265,7 @@ def get_loan_summary(
             query = query.filter(views.LoanRepaymentSummary.loan_id == loan_id)
 
         # Get loan details to enrich the summary
-        results = query.all()
+        results = (await db.execute(query)).scalars().all()
 
         return results
     except Exception as e:
@@ -237,14 +274,15 @@ def get_loan_summary(
 
 @app.get("/loans/summary/enhanced", response_model=List[Dict], include_in_schema=False)
 @app.get("/loans/summary/enhanced/", response_model=List[Dict])
-def get_enhanced_loan_summary(
+@response_cache.cached(LOANS, List[Dict], scope="loan_id")
+async def get_enhanced_loan_summary(
     user_id: Optional[int] = None,
     loan_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
-        # Join the loan_repayment_summary view with the loans table to get more details
-        query = db.query(
+        # Join the loan_repayment_summary table with the loans table to get more details
+        query = select(
             views.LoanRepaymentSummary.loan_id,
             views.LoanRepaymentSummary.user_id,
             views.LoanRepaymentSummary.total_principal_paid,
@@ -255,15 +293,15 @@ def get_enhanced_loan_summary(
             views.LoanRepaymentSummary.total_payments,
             views.LoanRepaymentSummary.last_repayment_date,
             views.LoanRepaymentSummary.principal_balance,
-            views.Loan.name.label("loan_name"),
-            views.Loan.institution,
-            views.Loan.sanction_amount,
-            views.Loan.total_disbursed_amount,
-            views.Loan.interest_rate,
-            views.Loan.tenure_months,
-            views.Loan.is_active,
-            views.Loan.purchase_id,
-        ).join(views.Loan, views.LoanRepaymentSummary.loan_id == views.Loan.id)
+            models.Loan.name.label("loan_name"),
+            models.Loan.institution,
+            models.Loan.sanction_amount,
+            models.Loan.total_disbursed_amount,
+            models.Loan.interest_rate,
+            models.Loan.tenure_months,
+            models.Loan.is_active,
+            models.Loan.purchase_id,
+        ).join(models.Loan, views.LoanRepaymentSummary.loan_id == models.Loan.id)
 
         # Apply filters if provided
         if user_id:
@@ -272,7 +310,7 @@ def get_enhanced_loan_summary(
         if loan_id:
             query = query.filter(views.LoanRepaymentSummary.loan_id == loan_id)
 
-        results = query.all()
+        results = (await db.execute(query)).all()
 
         # Convert results to dictionaries
         formatted_results = []
@@ -315,11 +353,51 @@ def get_enhanced_loan_summary(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Read-your-writes: tell a client that wrote when, so its next reads wait for a replica to catch up
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    written = replicas.track_writes()
+    response = await call_next(request)
+    if written:
+        replicas.remember_write(response, written[-1])
+    return response
+
+
+# Access log: latency, status and the statements each request ran in the database
 @app.middleware("http")
-async def log_requests(request: Request, call_next):
-    print(f"Request: {request.method} {request.url}")
+async def access_log(request: Request, call_next):
+    started = perf_counter()
+    stats = profiling.start()
     response = await call_next(request)
-    print(f"Response: {response.status_code}")
+    duration_ms = round((perf_counter() - started) * 1000, 3)
+    response.headers.append("Server-Timing", stats.server_timing())
+    access_logger.info(
+        "%s %s %s %sms db_queries=%s db_time_ms=%s",
+        request.method,
+        request.url.path,
+        response.status_code,
+        duration_ms,
+        stats.count,
+        stats.duration_ms,
+        extra={
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "duration_ms": duration_ms,
+            "db_queries": stats.count,
+            "db_time_ms": stats.duration_ms,
+            "client": request.client.host if request.client else None,
+        },
+    )
+    for statement, count in stats.repeated():
+        logger.warning(
+            "Possible N+1 in %s %s: statement run %s times: %s",
+            request.method,
+            request.url.path,
+            count,
+            statement,
+            extra={"db_statement": statement, "db_statement_count": count},
+        )
     return response
 
 
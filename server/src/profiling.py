@@ -0,0 +1,109 @@
+"""Per-request database statement counts and timings.
+
+SQLAlchemy cursor events on every engine (sync, async and the replicas) record
+each statement into the QueryStats of the request being served, which the
+middleware in main.py installs in a context variable. The middleware reports
+the count and total DB time in a Server-Timing header and in its log line, and
+warns when one statement runs N_PLUS_ONE_THRESHOLD or more times in a request,
+the signature of a per-row query inside a loop.
+
+query_budget() is the test-side counterpart: it counts every statement run
+while the block is open, whichever thread runs it, and fails the test when an
+endpoint goes over the number of queries it is allowed.
+"""
+import os
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+# Times one statement may run in a request before it is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD") or 5)
+
+_STARTED = "profiling.started"
+
+
+class QueryStats:
+    """Statements run and time spent in the database."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 3)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[tuple]:
+        """(statement, times run) for statements run at least `threshold` times."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+# Open query_budget() blocks; they see statements from every thread
+_budgets: List[QueryStats] = []
+
+
+def start() -> QueryStats:
+    """Start collecting the statements of the current request (or task)."""
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED, []).append(perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = perf_counter() - conn.info[_STARTED].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    for budget in _budgets:
+        budget.record(statement, duration)
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_failed(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    started = exception_context.connection.info.get(_STARTED) if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Fail with AssertionError when more than `max_queries` statements run inside the block.
+
+        with query_budget(2):
+            client.get("/loans/1")
+    """
+    stats = QueryStats()
+    _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        _budgets.remove(stats)
+    if stats.count > max_queries:
+        statements = "\n".join(f"  {count} x {statement}" for statement, count in stats.statements.most_common())
+        raise AssertionError(f"{stats.count} queries run, budget is {max_queries}:\n{statements}")
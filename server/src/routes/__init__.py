@@ -6,6 +6,7 @@ from .payments import router as payments_router
 from .users import router as users_router
 from .purchases import router as purchases_router
 from .invoices import router as invoices_router
+from .dashboard import router as dashboard_router
 # from .documents import router as documents_router
 
 __all__ = [
@@ -17,4 +18,5 @@ __all__ = [
     "users_router",
     "purchases_router",
     "invoices_router",
+    "dashboard_router",
 ]
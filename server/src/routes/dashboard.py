@@ -0,0 +1,188 @@
+from fastapi import APIRouter
+from fastapi import Depends, HTTPException
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+from typing import Optional
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from src import schemas
+from src.database import get_read_db, models, views
+import logging
+
+# Create a router instance
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+logger = logging.getLogger(__name__)
+
+# Section name -> response schema holding its per-purchase and total figures
+SECTIONS = {
+    "purchase": schemas.DashboardPurchaseTotals,
+    "invoices": schemas.DashboardInvoiceTotals,
+    "payments": schemas.DashboardPaymentTotals,
+    "loans": schemas.DashboardLoanTotals,
+    "acquisition_cost": schemas.DashboardAcquisitionCost,
+}
+
+
+def _scoped(query, purchase_id, purchases):
+    return query.where(purchase_id.in_(purchases)) if purchases is not None else query
+
+
+def _dashboard_query(user_id: Optional[int], today: date):
+    """One row per purchase, with a `<section>__<field>` column for every section field."""
+    purchases = select(models.Purchase.id).where(models.Purchase.user_id == user_id) if user_id else None
+
+    invoices = _scoped(
+        select(
+            models.Invoice.purchase_id,
+            func.count().label("count"),
+            func.sum(models.Invoice.amount).label("amount"),
+            func.sum(models.Invoice.paid_amount).label("paid"),
+            func.sum(
+                case(
+                    (models.Invoice.status != "cancelled", models.Invoice.amount - models.Invoice.paid_amount),
+                    else_=0,
+                )
+            ).label("outstanding"),
+            func.sum(
+                case(
+                    (
+                        and_(
+                            models.Invoice.due_date < today,
+                            models.Invoice.paid_amount < models.Invoice.amount,
+                            models.Invoice.status != "cancelled",
+                        ),
+                        1,
+                    ),
+                    else_=0,
+                )
+            ).label("overdue"),
+        ).group_by(models.Invoice.purchase_id),
+        models.Invoice.purchase_id,
+        purchases,
+    ).cte("invoice_totals")
+
+    payments = _scoped(
+        select(
+            models.Payment.purchase_id,
+            func.count().label("count"),
+            func.sum(models.Payment.amount).label("amount"),
+            func.max(models.Payment.payment_date).label("last_payment_date"),
+        ).group_by(models.Payment.purchase_id),
+        models.Payment.purchase_id,
+        purchases,
+    ).cte("payment_totals")
+
+    repaid = views.LoanRepaymentSummary
+    loans = _scoped(
+        select(
+            models.Loan.purchase_id,
+            func.count().label("count"),
+            func.sum(case((models.Loan.is_active.is_(True), 1), else_=0)).label("active"),
+            func.sum(models.Loan.sanction_amount).label("sanctioned"),
+            func.sum(models.Loan.disbursed_to_date).label("disbursed"),
+            func.sum(repaid.total_principal_paid).label("principal_paid"),
+            func.sum(repaid.total_interest_paid).label("interest_paid"),
+            func.sum(func.coalesce(repaid.principal_balance, models.Loan.disbursed_to_date)).label(
+                "principal_balance"
+            ),
+        )
+        .outerjoin(repaid, repaid.loan_id == models.Loan.id)
+        .group_by(models.Loan.purchase_id),
+        models.Loan.purchase_id,
+        purchases,
+    ).cte("loan_totals")
+
+    cost = views.AcquisitionCostSummary
+    columns = {
+        "purchase": {
+            "total_cost": models.Purchase.total_cost,
+            "total_sale_cost": models.Purchase.total_sale_cost,
+            "current_value": models.Purchase.current_rate * models.Purchase.super_area,
+        },
+        "invoices": {name: invoices.c[name] for name in schemas.DashboardInvoiceTotals.model_fields},
+        "payments": {name: payments.c[name] for name in schemas.DashboardPaymentTotals.model_fields},
+        "loans": {name: loans.c[name] for name in schemas.DashboardLoanTotals.model_fields},
+        "acquisition_cost": {
+            "builder_payment": cost.total_builder_payment,
+            "loan_payment": cost.total_loan_payment,
+            "principal_payment": cost.total_principal_payment,
+            "total_payment": cost.total_payment,
+            "remaining_balance": cost.remaining_balance,
+        },
+    }
+    query = (
+        select(
+            models.Purchase.id.label("purchase_id"),
+            models.Property.name.label("property_name"),
+            *(
+                column.label(f"{section}__{name}")
+                for section, fields in columns.items()
+                for name, column in fields.items()
+            ),
+        )
+        .select_from(models.Purchase)
+        .outerjoin(models.Property, models.Purchase.property_id == models.Property.id)
+        .outerjoin(invoices, invoices.c.purchase_id == models.Purchase.id)
+        .outerjoin(payments, payments.c.purchase_id == models.Purchase.id)
+        .outerjoin(loans, loans.c.purchase_id == models.Purchase.id)
+        .outerjoin(cost, cost.purchase_id == models.Purchase.id)
+        .order_by(models.Purchase.id)
+    )
+    if user_id:
+        query = query.where(models.Purchase.user_id == user_id)
+    return query
+
+
+def _section(rows, section: str, schema):
+    """Per-purchase figures of one section, with missing aggregates as zero, and their total."""
+    fields = schema.model_fields
+    per_purchase = []
+    totals = defaultdict(lambda: None)
+    for row in rows:
+        values = {}
+        for name, field in fields.items():
+            value = row[f"{section}__{name}"]
+            if isinstance(field.default, (int, Decimal)):
+                value = field.default if value is None else value
+                totals[name] = value if totals[name] is None else totals[name] + value
+            elif value is not None:
+                # Dates add up to the latest one
+                totals[name] = value if totals[name] is None else max(totals[name], value)
+            values[name] = value
+        per_purchase.append(values)
+    return per_purchase, {name: totals[name] for name in fields if totals[name] is not None}
+
+
+@router.get("", response_model=schemas.Dashboard, include_in_schema=False)
+@router.get("/", response_model=schemas.Dashboard)
+def get_dashboard(
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+) -> schemas.Dashboard:
+    """
+    Purchase, invoice, payment, loan and acquisition cost figures for every purchase
+    and for the portfolio. Each section is a CTE aggregated per purchase and one
+    statement joins them all onto the purchases, so the dashboard costs a single
+    round trip instead of one request (and session) per summary and list. Totals
+    are added up from the per-purchase rows. The query's time is reported in the
+    Server-Timing header like every other request's.
+    """
+    try:
+        rows = db.execute(_dashboard_query(user_id, date.today())).mappings().all()
+
+        purchases = [
+            {"purchase_id": row["purchase_id"], "property_name": row["property_name"]} for row in rows
+        ]
+        totals = {}
+        for section, schema in SECTIONS.items():
+            per_purchase, totals[section] = _section(rows, section, schema)
+            for purchase, values in zip(purchases, per_purchase):
+                purchase[section] = values
+
+        return {"purchase_count": len(purchases), "totals": totals, "purchases": purchases}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error in get_dashboard: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
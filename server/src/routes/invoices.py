@@ -1,42 +1,96 @@
 from fastapi import APIRouter
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from src import schemas
-from src.database import get_db, models
-from sqlalchemy import func
+from src import etags, fieldsets, schemas, serialization
+from src.database import get_db, get_async_read_db, models, balances
+from sqlalchemy import case, func, select
 
 # Create a router instance
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
+# Conditional GET validator: invoice responses only change when one of these tables is written
+not_modified = etags.conditional(models.Invoice, models.Purchase, models.Property)
+
+# Response fields and the columns they are read from, for sparse fieldsets
+INVOICE_COLUMNS = {
+    "id": models.Invoice.id,
+    "purchase_id": models.Invoice.purchase_id,
+    "property_name": models.Property.name,
+    "invoice_number": models.Invoice.invoice_number,
+    "invoice_date": models.Invoice.invoice_date,
+    "due_date": models.Invoice.due_date,
+    "amount": models.Invoice.amount,
+    "status": models.Invoice.status,
+    "milestone": models.Invoice.milestone,
+    "description": models.Invoice.description,
+    "created_at": models.Invoice.created_at,
+    "updated_at": models.Invoice.updated_at,
+    "paid_amount": models.Invoice.paid_amount,
+}
+
+
+def _invoice_query(columns: list):
+    """Select `columns` from invoices joined with their purchase and property."""
+    return (
+        select(*columns)
+        .select_from(models.Invoice)
+        .join(models.Purchase, models.Invoice.purchase_id == models.Purchase.id)
+        .join(models.Property, models.Purchase.property_id == models.Property.id)
+    )
+
+
+def _lock_purchase(db: Session, purchase_id: int) -> Optional[models.Purchase]:
+    """Load a purchase with a row lock so its invoice total can't change under us.
+
+    FOR NO KEY UPDATE still serializes invoice writes on the purchase, but unlike
+    FOR UPDATE it doesn't block the FOR KEY SHARE lock that inserting a payment
+    or summary row referencing the purchase takes through the foreign key.
+    """
+    return (
+        db.query(models.Purchase)
+        .filter(models.Purchase.id == purchase_id)
+        .with_for_update(key_share=True)
+        .first()
+    )
+
+
+def _invoice_totals(
+    db: Session, purchase_id: int, invoice_number: Optional[str], exclude_id: Optional[int] = None
+):
+    """Invoiced total for a purchase and whether `invoice_number` is taken, in one query."""
+    query = select(
+        func.coalesce(func.sum(models.Invoice.amount), 0).label("invoiced"),
+        func.coalesce(
+            func.max(case((models.Invoice.invoice_number == invoice_number, 1), else_=0)), 0
+        ).label("number_taken"),
+    ).where(models.Invoice.purchase_id == purchase_id)
+    if exclude_id is not None:
+        query = query.where(models.Invoice.id != exclude_id)
+    return db.execute(query).one()
+
+
 # Create a new invoice
 @router.post("/", response_model=schemas.InvoiceOld, description="Create a new invoice")
 def create_invoice(
     invoice: schemas.InvoiceCreate, db: Session = Depends(get_db)
 ) -> schemas.InvoiceOld:
     try:
-        # Check if purchase exists
-        purchase = (
-            db.query(models.Purchase)
-            .filter(models.Purchase.id == invoice.purchase_id)
-            .first()
-        )
+        # Check if purchase exists; the lock serialises invoice writes per purchase
+        purchase = _lock_purchase(db, invoice.purchase_id)
         if purchase is None:
             raise HTTPException(status_code=404, detail="Purchase not found")
-        
-        invoices = (
-            db.query(models.Invoice)
-            .filter(models.Invoice.purchase_id == invoice.purchase_id)
-            .all()
-        )
+
+        totals = _invoice_totals(db, invoice.purchase_id, invoice.invoice_number)
 
         # Check if invoice amount is not greater than the purchase's balance
-        if invoice.amount > purchase.total_sale_cost - sum(i.amount for i in invoices):
+        if invoice.amount > purchase.total_sale_cost - totals.invoiced:
             raise HTTPException(
                 status_code=400,
                 detail="Invoice amount exceeds balance of purchase cost",
             )
-        if invoice.invoice_number in [i.invoice_number for i in invoices]:
+        if totals.number_taken:
             raise HTTPException(
                 status_code=400,
                 detail="Invoice number already exists",
@@ -67,20 +121,44 @@ def update_invoice(
         )
         if db_invoice is None:
             raise HTTPException(status_code=404, detail="Invoice not found")
-                # Check if invoice amount is not greater than the purchase's balance
-        
-        purchase = db.query(models.Purchase).filter(models.Purchase.id == db_invoice.purchase_id).first()
-        invoices = db.query(models.Invoice).filter(models.Invoice.purchase_id == db_invoice.purchase_id).all()
 
-        if invoice.amount > purchase.total_sale_cost - sum(i.amount for i in invoices):
+        # Lock the purchase before the invoice. Payments lock the invoice and then
+        # only key-share the purchase through their foreign keys, which the
+        # no-key-update lock on the purchase doesn't block, so this can't deadlock
+        purchase = _lock_purchase(db, db_invoice.purchase_id)
+        db_invoice = (
+            db.query(models.Invoice)
+            .filter(models.Invoice.id == invoice_id)
+            .with_for_update()
+            .populate_existing()
+            .first()
+        )
+        totals = _invoice_totals(
+            db, db_invoice.purchase_id, invoice.invoice_number, exclude_id=invoice_id
+        )
+
+        # Check if invoice amount is not greater than the purchase's balance
+        if invoice.amount is not None and invoice.amount > purchase.total_sale_cost - totals.invoiced:
             raise HTTPException(
                 status_code=400,
                 detail="Invoice amount exceeds balance of purchase cost",
             )
+        if invoice.invoice_number is not None and totals.number_taken:
+            raise HTTPException(
+                status_code=400,
+                detail="Invoice number already exists",
+            )
         # Update invoice fields
-        for key, value in invoice.dict(exclude_unset=True).items():
+        update_data = invoice.dict(exclude_unset=True)
+        for key, value in update_data.items():
             setattr(db_invoice, key, value)
 
+        # A new amount can move the invoice between pending/partially_paid/paid
+        if "amount" in update_data and "status" not in update_data:
+            db_invoice.status = balances.invoice_status(
+                db_invoice.status, db_invoice.paid_amount, db_invoice.amount
+            )
+
         db.commit()
         db.refresh(db_invoice)
         return db_invoice
@@ -124,29 +202,23 @@ def delete_invoice(invoice_id: int, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("", response_model=List[schemas.InvoicePublic], include_in_schema=False)
-@router.get("/", response_model=List[schemas.InvoicePublic])
-def get_invoices(
+@router.get("", response_model=List[schemas.InvoicePublic], include_in_schema=False, dependencies=[Depends(not_modified)])
+@router.get("/", response_model=List[schemas.InvoicePublic], dependencies=[Depends(not_modified)])
+async def get_invoices(
+    response: Response,
     purchase_id: Optional[int] = None,
     status: Optional[str] = None,
     milestone: Optional[str] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
 ) -> List[schemas.InvoicePublic]:
     try:
-        # Start with a query that joins Invoice with Purchase, Property and Payments
-        query = (
-            db.query(
-                models.Invoice,
-                models.Property.name.label("property_name"),
-                func.coalesce(func.sum(models.Payment.amount), 0).label("paid_amount")
-            )
-            .join(models.Purchase, models.Invoice.purchase_id == models.Purchase.id)
-            .join(models.Property, models.Purchase.property_id == models.Property.id)
-            .outerjoin(models.Payment, models.Invoice.id == models.Payment.invoice_id)
-            .group_by(models.Invoice.id, models.Property.name)
-        )
+        names = fieldsets.parse(fields, schemas.InvoicePublic)
+        # Join Invoice with Purchase and Property, selecting only the requested columns;
+        # paid_amount is stored on the invoice
+        query = _invoice_query(fieldsets.columns(INVOICE_COLUMNS, schemas.InvoicePublic, names))
 
         # Apply filters if provided
         if purchase_id:
@@ -163,75 +235,46 @@ def get_invoices(
         # Order by invoice date (newest first)
         query = query.order_by(models.Invoice.invoice_date.desc())
 
-        results = query.all()
-        
-        # Convert the results to the expected schema format
-        invoices = []
-        for invoice, property_name, paid_amount in results:
-            invoice_dict = {
-                "id": invoice.id,
-                "purchase_id": invoice.purchase_id,
-                "invoice_number": invoice.invoice_number,
-                "invoice_date": invoice.invoice_date,
-                "due_date": invoice.due_date,
-                "amount": invoice.amount,
-                "status": invoice.status,
-                "milestone": invoice.milestone,
-                "description": invoice.description,
-                "created_at": invoice.created_at,
-                "updated_at": invoice.updated_at,
-                "paid_amount": paid_amount,
-                "property_name": property_name,
-            }
-            invoices.append(invoice_dict)
-            
-        return invoices
+        results = (await db.execute(query)).all()
+
+        # Rows come straight from typed columns, so skip re-validation and encode with orjson
+        return serialization.json_response(
+            [row._mapping for row in results],
+            schemas.InvoicePublic,
+            validate=False,
+            response=response,
+            fields=names,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{invoice_id}", response_model=schemas.Invoice, include_in_schema=False)
-@router.get("/{invoice_id}", response_model=schemas.Invoice)
-def get_invoice(invoice_id: int, db: Session = Depends(get_db)) -> schemas.Invoice:
+@router.get("/{invoice_id}", response_model=schemas.Invoice, include_in_schema=False, dependencies=[Depends(not_modified)])
+@router.get("/{invoice_id}", response_model=schemas.Invoice, dependencies=[Depends(not_modified)])
+async def get_invoice(
+    invoice_id: int,
+    response: Response,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> schemas.Invoice:
     try:
-        # Query that joins Invoice with Purchase, Property and calculates paid_amount
+        names = fieldsets.parse(fields, schemas.Invoice)
+        # Query that joins Invoice with Purchase and Property, for the requested columns only
         result = (
-            db.query(
-                models.Invoice,
-                models.Property.name.label("property_name"),
-                func.coalesce(func.sum(models.Payment.amount), 0).label("paid_amount")
+            await db.execute(
+                _invoice_query(fieldsets.columns(INVOICE_COLUMNS, schemas.Invoice, names))
+                .filter(models.Invoice.id == invoice_id)
             )
-            .join(models.Purchase, models.Invoice.purchase_id == models.Purchase.id)
-            .join(models.Property, models.Purchase.property_id == models.Property.id)
-            .outerjoin(models.Payment, models.Invoice.id == models.Payment.invoice_id)
-            .filter(models.Invoice.id == invoice_id)
-            .group_by(models.Invoice.id, models.Property.name)
-            .first()
-        )
+        ).first()
         
         if result is None:
             raise HTTPException(status_code=404, detail="Invoice not found")
-            
-        invoice, property_name, paid_amount = result
-        
-        # Convert to the expected schema format
-        invoice_dict = {
-            "id": invoice.id,
-            "purchase_id": invoice.purchase_id,
-            "invoice_number": invoice.invoice_number,
-            "invoice_date": invoice.invoice_date,
-            "due_date": invoice.due_date,
-            "amount": invoice.amount,
-            "status": invoice.status,
-            "milestone": invoice.milestone,
-            "description": invoice.description,
-            "created_at": invoice.created_at,
-            "updated_at": invoice.updated_at,
-            "paid_amount": paid_amount,
-            "property_name": property_name,
-        }
-            
-        return invoice_dict
+
+        return serialization.json_response(
+            result._mapping, schemas.Invoice, validate=False, response=response, fields=names
+        )
     except HTTPException:
         raise
     except Exception as e:
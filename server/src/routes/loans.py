@@ -1,15 +1,23 @@
 from fastapi import APIRouter
 from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import select
 from typing import List, Optional
-from src import schemas
-from src.database import get_db, models
+from src import etags, schemas
+from src.database import get_db, get_read_db, get_async_read_db, models
+from src.finance import amortization, scenarios
 from src.routes.payment_sources import create_payment_source
 import logging
 
 # Create a router instance
 router = APIRouter(prefix="/loans", tags=["loans"])     
+
+# Conditional GET validator: loan responses only change when one of these tables is written
+not_modified = etags.conditional(models.Loan, models.Purchase, models.Property)
+# Schedules are built from loan terms and the payments made from each loan's sources
+schedule_not_modified = etags.conditional(models.Loan, models.Payment, models.PaymentSource)
+
 logger = logging.getLogger(__name__)
 
 # Loan routes
@@ -175,29 +183,22 @@ def delete_loan(loan_id: int, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("", response_model=List[schemas.LoanPublic], include_in_schema=False)
-@router.get("/", response_model=List[schemas.LoanPublic])
-def get_loans(
+@router.get("", response_model=List[schemas.LoanPublic], include_in_schema=False, dependencies=[Depends(not_modified)])
+@router.get("/", response_model=List[schemas.LoanPublic], dependencies=[Depends(not_modified)])
+async def get_loans(
     purchase_id: Optional[int] = None,
     is_active: Optional[bool] = None,
     from_amount: Optional[float] = None,
     to_amount: Optional[float] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ) -> List[schemas.LoanPublic]:
     """
     Get a list of loans with essential information for the frontend.
     Optimized for frontend listing views with enhanced filtering using a single SQL query.
     """
     try:
-        query = (
-            db.query(
-                models.Loan,
-                func.coalesce(func.sum(models.Payment.amount), 0).label('total_disbursed_amount')
-            )
-            .outerjoin(models.PaymentSource, models.Loan.id == models.PaymentSource.loan_id)
-            .outerjoin(models.Payment, models.PaymentSource.id == models.Payment.source_id)
-            .group_by(models.Loan.id)
-        )
+        # The disbursed total is maintained on the loan row by the payment routes
+        query = select(models.Loan)
 
         # Apply filters if provided
         if purchase_id:
@@ -213,7 +214,7 @@ def get_loans(
             query = query.filter(models.Loan.sanction_amount <= to_amount)
 
         # Execute the query
-        results = query.all()
+        results = (await db.execute(query)).scalars().all()
         
         # Convert to LoanPublic schema objects
         return [
@@ -222,21 +223,92 @@ def get_loans(
                 "name": loan.name,
                 "institution": loan.institution,
                 "sanction_amount": loan.sanction_amount,
-                "total_disbursed_amount": total_disbursed,
+                "total_disbursed_amount": loan.disbursed_to_date,
                 "is_active": loan.is_active,
             }
-            for loan, total_disbursed in results
+            for loan in results
         ]
     except HTTPException as e:
-        logger.error(f"Error in get_loans: {e}") 
+        logger.error("Error in get_loans: %s", e) 
+        raise
+    except Exception as e:
+        logger.error("Error in get_loans: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Declared before /{loan_id} so "schedule" isn't parsed as a loan id
+@router.get("/schedule", response_model=schemas.PortfolioSchedule, include_in_schema=False, dependencies=[Depends(schedule_not_modified)])
+@router.get("/schedule/", response_model=schemas.PortfolioSchedule, dependencies=[Depends(schedule_not_modified)])
+def get_portfolio_schedule(
+    include_undisbursed: bool = False, db: Session = Depends(get_read_db)
+) -> schemas.PortfolioSchedule:
+    """
+    Amortization schedules of all active loans, computed in one batched pass:
+    per-loan totals and the combined EMIs and balances for each calendar month.
+    Pass `include_undisbursed=true` to project the rest of each sanction as drawn
+    alongside the loan's latest disbursement.
+    """
+    try:
+        return amortization.portfolio_schedule(db, include_undisbursed=include_undisbursed)
+    except Exception as e:
+        logger.error("Error in get_portfolio_schedule: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/simulate", response_model=schemas.ScenarioResults, include_in_schema=False)
+@router.post("/simulate/", response_model=schemas.ScenarioResults)
+def simulate_scenarios(
+    grid: schemas.ScenarioGrid, db: Session = Depends(get_read_db)
+) -> schemas.ScenarioResults:
+    """
+    Run what-if prepayment and rate-change scenarios against loans in one batch.
+    Every combination of `months`, `prepayments`, `rate_shifts_bps` and `modes` is
+    applied to each loan; each outcome reports interest saved and the new tenure
+    against the loan's unchanged baseline.
+    """
+    try:
+        grid_scenarios = scenarios.scenario_grid(
+            grid.months,
+            [float(amount) for amount in grid.prepayments],
+            grid.rate_shifts_bps,
+            grid.modes,
+        )
+        return scenarios.simulate_loans(
+            db, grid.loan_ids, grid_scenarios, include_undisbursed=grid.include_undisbursed
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Error in simulate_scenarios: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{loan_id}/schedule", response_model=schemas.LoanSchedule, include_in_schema=False, dependencies=[Depends(schedule_not_modified)])
+@router.get("/{loan_id}/schedule/", response_model=schemas.LoanSchedule, dependencies=[Depends(schedule_not_modified)])
+def get_loan_schedule(
+    loan_id: int, include_undisbursed: bool = False, db: Session = Depends(get_read_db)
+) -> schemas.LoanSchedule:
+    """
+    Month-by-month principal, interest and balance schedule of a loan, built from
+    the disbursements made through its payment sources. The EMI is recomputed over
+    the remaining tenure after each disbursement.
+    """
+    try:
+        schedule = amortization.loan_schedule(db, loan_id, include_undisbursed=include_undisbursed)
+        if schedule is None:
+            raise HTTPException(status_code=404, detail="Loan not found")
+        return schedule
+    except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in get_loans: {e}")
+        logger.error("Error in get_loan_schedule: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{loan_id}", response_model=schemas.Loan, include_in_schema=False)
-@router.get("/{loan_id}", response_model=schemas.Loan)
-def get_loan(loan_id: int, db: Session = Depends(get_db)) -> schemas.Loan:
+
+@router.get("/{loan_id}", response_model=schemas.Loan, include_in_schema=False, dependencies=[Depends(not_modified)])
+@router.get("/{loan_id}", response_model=schemas.Loan, dependencies=[Depends(not_modified)])
+async def get_loan(loan_id: int, db: AsyncSession = Depends(get_async_read_db)) -> schemas.Loan:
     """
     Get a detailed view of a single loan with property information.
     Optimized for frontend detail views.
@@ -244,21 +316,20 @@ def get_loan(loan_id: int, db: Session = Depends(get_db)) -> schemas.Loan:
     try:
         # Query that joins Loan with Purchase and Property
         result = (
-            db.query(
-                models.Loan,
-                models.Property.name.label("property_name")
+            await db.execute(
+                select(
+                    models.Loan,
+                    models.Property.name.label("property_name")
+                )
+                .join(models.Purchase, models.Loan.purchase_id == models.Purchase.id)
+                .join(models.Property, models.Purchase.property_id == models.Property.id)
+                .filter(models.Loan.id == loan_id)
             )
-            .join(models.Purchase, models.Loan.purchase_id == models.Purchase.id)
-            .join(models.Property, models.Purchase.property_id == models.Property.id)
-            .filter(models.Loan.id == loan_id)
-            .first()
-        )
-        source = db.query(models.PaymentSource).filter(models.PaymentSource.loan_id == loan_id).first()
-        payments = db.query(models.Payment).filter(models.Payment.source_id == source.id).all()
+        ).first()
 
         if result is None:
             raise HTTPException(status_code=404, detail="Loan not found")
-            
+
         loan, property_name = result
         
         # Convert to the expected schema format
@@ -266,7 +337,7 @@ def get_loan(loan_id: int, db: Session = Depends(get_db)) -> schemas.Loan:
             "id": loan.id,
             "name": loan.name,
             "institution": loan.institution,
-            "total_disbursed_amount": sum(payment.amount for payment in payments) if payments else 0,
+            "total_disbursed_amount": loan.disbursed_to_date,
             "sanction_amount": loan.sanction_amount,
             "property_name": property_name,
             "processing_fee": loan.processing_fee,
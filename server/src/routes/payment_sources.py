@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from src import schemas
-from src.database import get_db, models
+from src.database import get_db, get_read_db, models
 
 router = APIRouter(prefix="/payment-sources", tags=["payment-sources"])
 
@@ -27,7 +27,7 @@ def create_payment_source(
 
 @router.get("", response_model=List[schemas.PaymentSource], include_in_schema=False)
 @router.get("/", response_model=List[schemas.PaymentSource])
-def get_payment_sources(db: Session = Depends(get_db)) -> List[schemas.PaymentSource]:
+def get_payment_sources(db: Session = Depends(get_read_db)) -> List[schemas.PaymentSource]:
     try:
         payment_sources = (
             db.query(models.PaymentSource)
@@ -42,7 +42,7 @@ def get_payment_sources(db: Session = Depends(get_db)) -> List[schemas.PaymentSo
 @router.get("/{source_id}", response_model=schemas.PaymentSource, include_in_schema=False)
 @router.get("/{source_id}/", response_model=schemas.PaymentSource)
 def get_payment_source(
-    source_id: int, db: Session = Depends(get_db)
+    source_id: int, db: Session = Depends(get_read_db)
 ) -> schemas.PaymentSource:
     try:
         payment_source = (
@@ -129,7 +129,7 @@ router_dev = APIRouter(prefix="/v2/payment-sources", tags=["payment-sources"])
 def get_payment_sources_v2(
     is_active: Optional[bool] = None,
     source_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> List[schemas.PaymentSourcePublic]:
     """
     Get a list of payment sources with minimal information needed for the frontend.
@@ -1,15 +1,144 @@
 from fastapi import APIRouter
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from src import schemas
-from src.database import get_db, models
+from datetime import date
+import base64
+import csv
+from src import etags, fieldsets, schemas, serialization
+from src.database import get_db, get_async_read_db, models, balances, imports
+from src.routes.uploads import spool_request_body
 import logging
 
 # Create a router instance
 router = APIRouter(prefix="/payments", tags=["payments"])
+
+# Conditional GET validator: payment responses only change when one of these tables is written
+not_modified = etags.conditional(models.Payment, models.Invoice, models.Purchase, models.Property, models.PaymentSource)
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming the payment list
+STREAM_CHUNK_SIZE = 1000
+
+# Response fields and the columns they are read from, for sparse fieldsets
+PAYMENT_COLUMNS = {
+    "id": models.Payment.id,
+    "payment_date": models.Payment.payment_date,
+    "amount": models.Payment.amount,
+    "source_name": models.PaymentSource.name,
+    "payment_mode": models.Payment.payment_mode,
+    "property_name": models.Property.name,
+    "invoice_number": models.Invoice.invoice_number,
+    "transaction_reference": models.Payment.transaction_reference,
+    "receipt_date": models.Payment.receipt_date,
+    "receipt_number": models.Payment.receipt_number,
+    "notes": models.Payment.notes,
+}
+
+# The keyset position is read from every list row, requested or not
+KEYSET_FIELDS = ("payment_date", "id")
+
+
+def _payment_query(columns: list):
+    """Select `columns` from payments joined with their invoice, purchase, property and source."""
+    return (
+        select(*columns)
+        .select_from(models.Payment)
+        .join(models.Invoice, models.Payment.invoice_id == models.Invoice.id)
+        .join(models.Purchase, models.Invoice.purchase_id == models.Purchase.id)
+        .join(models.Property, models.Purchase.property_id == models.Property.id)
+        .join(models.PaymentSource, models.Payment.source_id == models.PaymentSource.id)
+    )
+
+
+def _encode_cursor(payment_date: date, payment_id: int) -> str:
+    """Encode the (payment_date, id) keyset position into an opaque cursor."""
+    raw = f"{payment_date.isoformat()}:{payment_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by _encode_cursor back into (payment_date, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _payment_list_query(
+    columns: list,
+    purchase_id: Optional[int] = None,
+    invoice_id: Optional[int] = None,
+    source_id: Optional[int] = None,
+    payment_mode: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+):
+    """Build the filtered payment list query, ordered newest first by (payment_date, id)."""
+    query = _payment_query(columns)
+
+    # Apply filters if provided
+    if purchase_id:
+        query = query.filter(models.Purchase.id == purchase_id)
+
+    if invoice_id:
+        query = query.filter(models.Payment.invoice_id == invoice_id)
+
+    if source_id:
+        query = query.filter(models.Payment.source_id == source_id)
+
+    if payment_mode:
+        query = query.filter(models.Payment.payment_mode == payment_mode)
+
+    if from_date:
+        query = query.filter(models.Payment.payment_date >= from_date)
+
+    if to_date:
+        query = query.filter(models.Payment.payment_date <= to_date)
+
+    if min_amount:
+        query = query.filter(models.Payment.amount >= min_amount)
+
+    if max_amount:
+        query = query.filter(models.Payment.amount <= max_amount)
+
+    # Order by payment date (newest first), with id as a tie-breaker so the keyset is unique
+    return query.order_by(models.Payment.payment_date.desc(), models.Payment.id.desc())
+
+
+async def _stream_payments(
+    db: AsyncSession, filters: dict, after: Optional[tuple], fields: Optional[tuple] = None
+):
+    """
+    Yield the payment list as a chunked JSON array.
+    Closes the session itself, since the request dependency may release it before the body is sent.
+    """
+    try:
+        columns = fieldsets.columns(PAYMENT_COLUMNS, schemas.PaymentPublic, fields, always=KEYSET_FIELDS)
+        query = _payment_list_query(columns, **filters)
+        if after:
+            query = query.filter(
+                tuple_(models.Payment.payment_date, models.Payment.id) < tuple_(*after)
+            )
+        result = await db.stream(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        yield b"["
+        separator = b""
+        async for row in result:
+            item = serialization.project(row._mapping, schemas.PaymentPublic, fields)
+            yield separator + serialization.dumps(item)
+            separator = b","
+        yield b"]"
+    finally:
+        await db.close()
+
 # Create a new payment
 @router.post("", response_model=schemas.PaymentOld, include_in_schema=False, description="Create a new payment")
 @router.post("/", response_model=schemas.PaymentOld, description="Create a new payment")
@@ -17,30 +146,27 @@ def create_payment(
     payment: schemas.PaymentCreate, db: Session = Depends(get_db)
 ) -> schemas.PaymentOld:
     try:
-        logger.info(f"Creating new payment for invoice_id={payment.invoice_id}, amount={payment.amount}")
+        logger.info("Creating new payment for invoice_id=%s, amount=%s", payment.invoice_id, payment.amount)
         if payment.amount <= 0:
-            logger.warning(f"Invalid payment amount: {payment.amount}")
+            logger.warning("Invalid payment amount: %s", payment.amount)
             raise HTTPException(status_code=400, detail="Payment amount must be greater than 0")
         
-        # Check if invoice exists
+        # Check if invoice exists, locking it so concurrent payments against the
+        # same invoice validate against each other's paid_amount in turn
         invoice = (
             db.query(models.Invoice)
             .filter(models.Invoice.id == payment.invoice_id)
+            .with_for_update()
             .first()
         )
         if invoice is None:
-            logger.warning(f"Invoice not found: invoice_id={payment.invoice_id}")
+            logger.warning("Invoice not found: invoice_id=%s", payment.invoice_id)
             raise HTTPException(status_code=404, detail="Invoice not found")
         
-        invoice_payments = (
-            db.query(models.Payment)
-            .filter(models.Payment.invoice_id == payment.invoice_id)
-            .all()
-        )
-        invoice_balance = invoice.amount - sum(p.amount for p in invoice_payments)
-        logger.debug(f"Invoice balance: {invoice_balance}, payment amount: {payment.amount}")
+        invoice_balance = invoice.amount - (invoice.paid_amount or 0)
+        logger.debug("Invoice balance: %s, payment amount: %s", invoice_balance, payment.amount)
         if payment.amount > invoice_balance:
-            logger.warning(f"Payment amount {payment.amount} exceeds invoice balance {invoice_balance}")
+            logger.warning("Payment amount %s exceeds invoice balance %s", payment.amount, invoice_balance)
             raise HTTPException(
                 status_code=400,
                 detail="Payment amount exceeds invoice's balance amount",
@@ -52,19 +178,19 @@ def create_payment(
             .first()
         )
         if payment_source is None:
-            logger.warning(f"Payment source not found: source_id={payment.source_id}")
+            logger.warning("Payment source not found: source_id=%s", payment.source_id)
             raise HTTPException(status_code=404, detail="Payment source not found")
 
         # Check if the payment source's source_type is "loan" and update the loan's total disbursed amount
         if payment_source.source_type == "loan":
-            logger.debug(f"Payment source is a loan: loan_id={payment_source.loan_id}")
+            logger.debug("Payment source is a loan: loan_id=%s", payment_source.loan_id)
             loan = (
                 db.query(models.Loan)
                 .filter(models.Loan.id == payment_source.loan_id)
                 .first()
             )
             if not loan:
-                logger.warning(f"Loan not found: loan_id={payment_source.loan_id}")
+                logger.warning("Loan not found: loan_id=%s", payment_source.loan_id)
                 raise HTTPException(status_code=404, detail="Loan not found")
             # TODO: Revalidate this logic and push it 
             # loan_payments = (
@@ -77,21 +203,69 @@ def create_payment(
             #     raise HTTPException(status_code=400, detail="This payment will exceed the loan's sanction amount")
 
             
-        # Create payment with user_id defaulted to 1
-        db_payment = models.Payment(**payment.model_dump(), user_id=1)
+        # Create payment with user_id defaulted to 1; the purchase follows the invoice
+        db_payment = models.Payment(
+            **payment.model_dump(), user_id=1, purchase_id=invoice.purchase_id
+        )
         db.add(db_payment)
-        
+        balances.apply_invoice_payment(db, invoice.id, db_payment.amount)
+        balances.apply_loan_disbursement(db, db_payment.source_id, db_payment.amount)
+
         db.commit()
         db.refresh(db_payment)
-        logger.info(f"Payment created successfully: payment_id={db_payment.id}")
+        logger.info("Payment created successfully: payment_id=%s", db_payment.id)
         return db_payment
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in create_payment: {e}")
+        logger.error("Error in create_payment: %s", e)
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Bulk import payments
+@router.post("/import", response_model=schemas.ImportResult, description="Bulk import payments from a CSV or JSON file")
+async def import_payments(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|json)$"),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+) -> schemas.ImportResult:
+    """
+    Bulk import payments from the raw request body, sent as CSV (with a header row),
+    a JSON array or JSON Lines. The format follows the Content-Type unless `format` is given.
+
+    Invalid rows are skipped and listed in `errors`; all valid rows are written in a
+    single transaction. Pass `dry_run=true` to validate the file without writing.
+    """
+    fmt = format or imports.detect_format(content_type=request.headers.get("content-type"))
+    logger.info("Importing payments: format=%s, dry_run=%s", fmt, dry_run)
+    stream = await spool_request_body(request)
+    try:
+        # The import does blocking database work, so keep it off the event loop
+        result = await run_in_threadpool(
+            imports.import_payments,
+            db,
+            imports.iter_records(stream, fmt),
+            dry_run=dry_run,
+        )
+        if dry_run:
+            await run_in_threadpool(db.rollback)
+        else:
+            await run_in_threadpool(db.commit)
+        logger.info("Imported %s payments with %s errors", result['imported'], len(result['errors']))
+        return result
+    except (ValueError, csv.Error) as e:
+        # Malformed JSON or CSV that can't be read any further
+        logger.warning("Unreadable payment import file: %s", e)
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=400, detail=f"Could not parse import file: {e}")
+    except Exception as e:
+        logger.error("Error in import_payments: %s", e)
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        stream.close()
+
 # Update a payment
 @router.put("/{payment_id}", response_model=schemas.PaymentOld, include_in_schema=False, description="Update a payment")
 @router.put("/{payment_id}/", response_model=schemas.PaymentOld, description="Update a payment")
@@ -99,103 +273,106 @@ def update_payment(
     payment_id: int, payment: schemas.PaymentUpdate, db: Session = Depends(get_db)
 ) -> schemas.PaymentOld:
     try:
-        logger.info(f"Updating payment: payment_id={payment_id}")
+        logger.info("Updating payment: payment_id=%s", payment_id)
         # Check if payment exists
         db_payment = (
             db.query(models.Payment).filter(models.Payment.id == payment_id).first()
         )
         if db_payment is None:
-            logger.warning(f"Payment not found: payment_id={payment_id}")
+            logger.warning("Payment not found: payment_id=%s", payment_id)
             raise HTTPException(status_code=404, detail="Payment not found")
 
         # # Check if user owns this payment
         # if db_payment.user_id != current_user.id:
         #     raise HTTPException(status_code=403, detail="Not authorized to update this payment")
-        # Check if invoice exists
+        # Check if invoice exists, locking it for the balance check below
         invoice = (
             db.query(models.Invoice)
             .filter(models.Invoice.id == db_payment.invoice_id)
+            .with_for_update()
             .first()
         )
         if invoice is None:
-            logger.warning(f"Invoice not found: invoice_id={db_payment.invoice_id}")
+            logger.warning("Invoice not found: invoice_id=%s", db_payment.invoice_id)
             raise HTTPException(status_code=404, detail="Invoice not found")
         
-        # Get all payments for this invoice except the current one being updated
-        invoice_payments = (
-            db.query(models.Payment)
-            .filter(models.Payment.invoice_id == db_payment.invoice_id)
-            .filter(models.Payment.id != payment_id)
-            .all()
-        )
-        
-        # Check if the updated payment amount would exceed the invoice balance
-        invoice_balance = invoice.amount - sum(p.amount for p in invoice_payments)
-        logger.debug(f"Invoice balance (excluding current payment): {invoice_balance}")
+        # Check if the updated payment amount would exceed the invoice balance,
+        # excluding the current payment from the stored paid amount
+        invoice_balance = invoice.amount - (invoice.paid_amount or 0) + db_payment.amount
+        logger.debug("Invoice balance (excluding current payment): %s", invoice_balance)
         if payment.amount and payment.amount > invoice_balance:
-            logger.warning(f"Updated payment amount {payment.amount} exceeds invoice balance {invoice_balance}")
+            logger.warning("Updated payment amount %s exceeds invoice balance %s", payment.amount, invoice_balance)
             raise HTTPException(
                 status_code=400,
                 detail="Payment amount exceeds invoice's balance amount",
             )
         
         if payment.amount and payment.amount <= 0:
-            logger.warning(f"Invalid payment amount: {payment.amount}")
+            logger.warning("Invalid payment amount: %s", payment.amount)
             raise HTTPException(status_code=400, detail="Payment amount must be greater than 0")
 
         # If payment source is being updated, check if it exists
         if payment.source_id:
-            logger.debug(f"Updating payment source to: source_id={payment.source_id}")
+            logger.debug("Updating payment source to: source_id=%s", payment.source_id)
             payment_source = (
                 db.query(models.PaymentSource)
                 .filter(models.PaymentSource.id == payment.source_id)
                 .first()
             )
             if payment_source is None:
-                logger.warning(f"Payment source not found: source_id={payment.source_id}")
+                logger.warning("Payment source not found: source_id=%s", payment.source_id)
                 raise HTTPException(status_code=404, detail="Payment source not found")
             
             # Check if the payment source's source_type is "loan" and validate against loan's disbursed amount
             if payment_source.source_type == "loan":
-                logger.debug(f"New payment source is a loan: loan_id={payment_source.loan_id}")
+                logger.debug("New payment source is a loan: loan_id=%s", payment_source.loan_id)
                 loan = (
                     db.query(models.Loan)
                     .filter(models.Loan.id == payment_source.loan_id)
+                    .with_for_update()
                     .first()
                 )
                 if loan:
-                    loan_payments = (
-                        db.query(models.Payment)
-                        .filter(models.Payment.source_id == payment_source.id)
-                        .filter(models.Payment.id != payment_id)
-                        .all()
+                    # Payments already made from the loan, excluding this one
+                    loan_payments_total = loan.disbursed_to_date - (
+                        db_payment.amount if db_payment.source_id == payment_source.id else 0
                     )
-                    loan_balance = loan.total_disbursed_amount - sum(p.amount for p in loan_payments)
-                    logger.debug(f"Loan balance: {loan_balance}, payment amount: {payment.amount}")
+                    loan_balance = loan.total_disbursed_amount - loan_payments_total
+                    logger.debug("Loan balance: %s, payment amount: %s", loan_balance, payment.amount)
                     if payment.amount and payment.amount > loan_balance:
-                        logger.warning(f"Payment amount {payment.amount} exceeds loan balance {loan_balance}")
+                        logger.warning("Payment amount %s exceeds loan balance %s", payment.amount, loan_balance)
                         raise HTTPException(
                             status_code=400, 
                             detail="Payment amount exceeds loan's disbursed amount"
                         )
                 else:
-                    logger.warning(f"Loan not found: loan_id={payment_source.loan_id}")
+                    logger.warning("Loan not found: loan_id=%s", payment_source.loan_id)
                     raise HTTPException(status_code=404, detail="Loan not found")
 
         # Update payment fields
         update_data = payment.dict(exclude_unset=True)
-        logger.debug(f"Updating payment with data: {update_data}")
+        logger.debug("Updating payment with data: %s", update_data)
+        previous_amount = db_payment.amount
+        previous_source_id = db_payment.source_id
         for key, value in update_data.items():
             setattr(db_payment, key, value)
+        balances.apply_invoice_payment(db, invoice.id, db_payment.amount - previous_amount)
+        if db_payment.source_id != previous_source_id:
+            balances.apply_loan_disbursement(db, previous_source_id, -previous_amount)
+            balances.apply_loan_disbursement(db, db_payment.source_id, db_payment.amount)
+        else:
+            balances.apply_loan_disbursement(
+                db, db_payment.source_id, db_payment.amount - previous_amount
+            )
 
         db.commit()
         db.refresh(db_payment)
-        logger.info(f"Payment updated successfully: payment_id={db_payment.id}")
+        logger.info("Payment updated successfully: payment_id=%s", db_payment.id)
         return db_payment
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in update_payment: {e}")
+        logger.error("Error in update_payment: %s", e)
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -205,30 +382,33 @@ def update_payment(
 @router.delete("/{payment_id}/", description="Delete a payment")
 def delete_payment(payment_id: int, db: Session = Depends(get_db)):
     try:
-        logger.info(f"Deleting payment: payment_id={payment_id}")
+        logger.info("Deleting payment: payment_id=%s", payment_id)
         # Check if payment exists
         payment = (
             db.query(models.Payment).filter(models.Payment.id == payment_id).first()
         )
         if payment is None:
-            logger.warning(f"Payment not found: payment_id={payment_id}")
+            logger.warning("Payment not found: payment_id=%s", payment_id)
             raise HTTPException(status_code=404, detail="Payment not found")
 
         # Delete the payment
         db.delete(payment)
+        balances.apply_invoice_payment(db, payment.invoice_id, -payment.amount)
+        balances.apply_loan_disbursement(db, payment.source_id, -payment.amount)
         db.commit()
-        logger.info(f"Payment deleted successfully: payment_id={payment_id}")
+        logger.info("Payment deleted successfully: payment_id=%s", payment_id)
         return {"message": "Payment deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in delete_payment: {e}")
+        logger.error("Error in delete_payment: %s", e)
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("", response_model=List[schemas.PaymentPublic], include_in_schema=False, description="Get a list of payments with property and invoice information")
-@router.get("/", response_model=List[schemas.PaymentPublic], description="Get a list of payments with property and invoice information")
-def get_payments(
+@router.get("", response_model=List[schemas.PaymentPublic], include_in_schema=False, description="Get a list of payments with property and invoice information", dependencies=[Depends(not_modified)])
+@router.get("/", response_model=List[schemas.PaymentPublic], description="Get a list of payments with property and invoice information", dependencies=[Depends(not_modified)])
+async def get_payments(
+    response: Response,
     purchase_id: Optional[int] = None,
     invoice_id: Optional[int] = None,
     source_id: Optional[int] = None,
@@ -237,132 +417,115 @@ def get_payments(
     to_date: Optional[str] = None,
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[str] = None,
+    stream: bool = False,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
 ) -> List[schemas.PaymentPublic]:
     """
     Get a list of payments with property and invoice information.
     Optimized for frontend listing views with enhanced filtering.
+
+    Pass `limit` to page through the list; the cursor for the next page is returned
+    in the `X-Next-Cursor` header and is sent back as `after`. Pass `stream=true` to
+    receive the full list as a chunked JSON array without buffering it in memory.
+    Pass `fields` (e.g. `fields=id,amount,property_name`) to fetch and return only those fields.
     """
     try:
-        logger.info("Fetching payments with filters")
-        logger.debug(f"Filters: purchase_id={purchase_id}, invoice_id={invoice_id}, source_id={source_id}, "
-                    f"payment_mode={payment_mode}, from_date={from_date}, to_date={to_date}, "
-                    f"min_amount={min_amount}, max_amount={max_amount}")
-        
-        # Start with a query that joins Payment with Invoice, Purchase, Property, and PaymentSource
-        query = (
-            db.query(
-                models.Payment,
-                models.Property.name.label("property_name"),
-                models.Invoice.invoice_number.label("invoice_number"),
-                models.PaymentSource.name.label("source_name")
+        logger.debug("Fetching payments with filters")
+        logger.debug("Filters: purchase_id=%s, invoice_id=%s, source_id=%s, "
+                    "payment_mode=%s, from_date=%s, to_date=%s, "
+                    "min_amount=%s, max_amount=%s, limit=%s, after=%s",
+                    purchase_id, invoice_id, source_id, payment_mode, from_date, to_date,
+                    min_amount, max_amount, limit, after)
+
+        filters = {
+            "purchase_id": purchase_id,
+            "invoice_id": invoice_id,
+            "source_id": source_id,
+            "payment_mode": payment_mode,
+            "from_date": from_date,
+            "to_date": to_date,
+            "min_amount": min_amount,
+            "max_amount": max_amount,
+        }
+        position = _decode_cursor(after) if after else None
+        names = fieldsets.parse(fields, schemas.PaymentPublic)
+
+        if stream:
+            return StreamingResponse(
+                _stream_payments(db, filters, position, names), media_type="application/json"
             )
-            .join(models.Invoice, models.Payment.invoice_id == models.Invoice.id)
-            .join(models.Purchase, models.Invoice.purchase_id == models.Purchase.id)
-            .join(models.Property, models.Purchase.property_id == models.Property.id)
-            .join(models.PaymentSource, models.Payment.source_id == models.PaymentSource.id)
-        )
 
-        # Apply filters if provided
-        if purchase_id:
-            query = query.filter(models.Purchase.id == purchase_id)
-            
-        if invoice_id:
-            query = query.filter(models.Payment.invoice_id == invoice_id)
-            
-        if source_id:
-            query = query.filter(models.Payment.source_id == source_id)
-            
-        if payment_mode:
-            query = query.filter(models.Payment.payment_mode == payment_mode)
-            
-        if from_date:
-            query = query.filter(models.Payment.payment_date >= from_date)
-            
-        if to_date:
-            query = query.filter(models.Payment.payment_date <= to_date)
-            
-        if min_amount:
-            query = query.filter(models.Payment.amount >= min_amount)
-            
-        if max_amount:
-            query = query.filter(models.Payment.amount <= max_amount)
+        columns = fieldsets.columns(PAYMENT_COLUMNS, schemas.PaymentPublic, names, always=KEYSET_FIELDS)
+        query = _payment_list_query(columns, **filters)
+
+        # Keyset pagination: continue strictly after the last (payment_date, id) seen
+        if position:
+            query = query.filter(
+                tuple_(models.Payment.payment_date, models.Payment.id) < tuple_(*position)
+            )
 
-        # Order by payment date (newest first)
-        query = query.order_by(models.Payment.payment_date.desc())
+        if limit:
+            # Fetch one extra row to know whether another page exists
+            results = (await db.execute(query.limit(limit + 1))).all()
+            if len(results) > limit:
+                results = results[:limit]
+                last_payment = results[-1]
+                response.headers["X-Next-Cursor"] = _encode_cursor(
+                    last_payment.payment_date, last_payment.id
+                )
+        else:
+            results = (await db.execute(query)).all()
+        logger.debug("Found %s payments matching the criteria", len(results))
 
-        results = query.all()
-        logger.info(f"Found {len(results)} payments matching the criteria")
-        
-        # Convert the results to the expected schema format
-        payments = []
-        for payment, property_name, invoice_number, source_name in results:
-            payment_dict = {
-                "id": payment.id,
-                "payment_date": payment.payment_date,
-                "amount": payment.amount,
-                "source_name": source_name,
-                "payment_mode": payment.payment_mode,
-                "property_name": property_name,
-                "invoice_number": invoice_number,
-            }
-            payments.append(payment_dict)
-            
-        return payments
+        # Rows come straight from typed columns, so skip re-validation and encode with orjson
+        return serialization.json_response(
+            [row._mapping for row in results],
+            schemas.PaymentPublic,
+            validate=False,
+            response=response,
+            fields=names,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in get_payments: {e}")
+        logger.error("Error in get_payments: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{payment_id}", response_model=schemas.Payment, include_in_schema=False, description="Get a detailed view of a single payment with property and invoice information")
-@router.get("/{payment_id}", response_model=schemas.Payment, description="Get a detailed view of a single payment with property and invoice information")
-def get_payment(payment_id: int, db: Session = Depends(get_db)) -> schemas.Payment:
+@router.get("/{payment_id}", response_model=schemas.Payment, include_in_schema=False, description="Get a detailed view of a single payment with property and invoice information", dependencies=[Depends(not_modified)])
+@router.get("/{payment_id}", response_model=schemas.Payment, description="Get a detailed view of a single payment with property and invoice information", dependencies=[Depends(not_modified)])
+async def get_payment(
+    payment_id: int,
+    response: Response,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> schemas.Payment:
     """
     Get a detailed view of a single payment with property and invoice information.
-    Optimized for frontend detail views.
+    Optimized for frontend detail views. Pass `fields` to fetch and return only those fields.
     """
     try:
-        logger.info(f"Fetching payment details: payment_id={payment_id}")
-        # Query with joins to Invoice, Purchase, Property, and PaymentSource
+        logger.debug("Fetching payment details: payment_id=%s", payment_id)
+        names = fieldsets.parse(fields, schemas.Payment)
+        # Select only the requested columns, joined through Invoice, Purchase, Property and PaymentSource
         result = (
-            db.query(
-                models.Payment,
-                models.Property.name.label("property_name"),
-                models.Invoice.invoice_number.label("invoice_number"),
-                models.PaymentSource.name.label("source_name")
+            await db.execute(
+                _payment_query(fieldsets.columns(PAYMENT_COLUMNS, schemas.Payment, names))
+                .filter(models.Payment.id == payment_id)
             )
-            .join(models.Invoice, models.Payment.invoice_id == models.Invoice.id)
-            .join(models.Purchase, models.Invoice.purchase_id == models.Purchase.id)
-            .join(models.Property, models.Purchase.property_id == models.Property.id)
-            .join(models.PaymentSource, models.Payment.source_id == models.PaymentSource.id)
-            .filter(models.Payment.id == payment_id)
-            .first()
-        )
+        ).first()
         
         if result is None:
-            logger.warning(f"Payment not found: payment_id={payment_id}")
+            logger.warning("Payment not found: payment_id=%s", payment_id)
             raise HTTPException(status_code=404, detail="Payment not found")
-            
-        payment, property_name, invoice_number, source_name = result
-        logger.debug(f"Found payment: id={payment.id}, invoice={invoice_number}, property={property_name}")
-        
-        # Convert to the expected schema format
-        payment_dict = {
-            "id": payment.id,
-            "payment_date": payment.payment_date,
-            "amount": payment.amount,
-            "source_name": source_name,
-            "payment_mode": payment.payment_mode,
-            "property_name": property_name,
-            "invoice_number": invoice_number,
-            "transaction_reference": payment.transaction_reference,
-            "receipt_date": payment.receipt_date,
-            "receipt_number": payment.receipt_number,
-            "notes": payment.notes,
-        }
-            
-        return payment_dict
+
+        return serialization.json_response(
+            result._mapping, schemas.Payment, validate=False, response=response, fields=names
+        )
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in get_payment: {e}")
+        logger.error("Error in get_payment: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,58 @@
 from fastapi import APIRouter
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from src import schemas
-from src.database import get_db, models
+from datetime import date
+from src import etags, fieldsets, schemas, serialization
+from src.cache import ACQUISITION_COST, response_cache
+from src.finance import returns
+from src.database import get_db, get_read_db, models
 import logging
 
 # Create a router instance
 router = APIRouter(prefix="/purchases", tags=["purchases"])
+
+# Conditional GET validator: purchase responses only change when one of these tables is written
+not_modified = etags.conditional(models.Purchase, models.Property)
 logger = logging.getLogger(__name__)
 
+# Response fields and the columns they are read from, for sparse fieldsets
+PURCHASE_COLUMNS = {
+    "id": models.Purchase.id,
+    "property_name": models.Property.name,
+    "purchase_date": models.Purchase.purchase_date,
+    "registration_date": models.Purchase.registration_date,
+    "possession_date": models.Purchase.possession_date,
+    "carpet_area": models.Purchase.carpet_area,
+    "exclusive_area": models.Purchase.exclusive_area,
+    "common_area": models.Purchase.common_area,
+    "floor_number": models.Purchase.floor_number,
+    "super_area": models.Purchase.super_area,
+    "purchase_rate": models.Purchase.purchase_rate,
+    "current_rate": models.Purchase.current_rate,
+    "base_cost": models.Purchase.base_cost,
+    "other_charges": models.Purchase.other_charges,
+    "ifms": models.Purchase.ifms,
+    "lease_rent": models.Purchase.lease_rent,
+    "amc": models.Purchase.amc,
+    "gst": models.Purchase.gst,
+    "property_cost": models.Purchase.property_cost,
+    "total_cost": models.Purchase.total_cost,
+    "total_sale_cost": models.Purchase.total_sale_cost,
+    "seller": models.Purchase.seller,
+    "remarks": models.Purchase.remarks,
+}
+
+
+def _purchase_query(columns: list):
+    """Select `columns` from purchases joined with their property."""
+    return (
+        select(*columns)
+        .select_from(models.Purchase)
+        .join(models.Property, models.Purchase.property_id == models.Property.id)
+    )
+
 
 # Purchase routes
 @router.post("", response_model=schemas.PurchaseOld, include_in_schema=False)
@@ -21,15 +64,15 @@ def create_purchase(
     Create a new purchase.
     """
     try:
-        logger.info(f"Creating new purchase for property_id={purchase.property_id}")
+        logger.info("Creating new purchase for property_id=%s", purchase.property_id)
         db_property = models.Purchase(**purchase.dict())
         db.add(db_property)
         db.commit()
         db.refresh(db_property)
-        logger.info(f"Purchase created successfully: purchase_id={db_property.id}")
+        logger.info("Purchase created successfully: purchase_id=%s", db_property.id)
         return db_property
     except Exception as e:
-        logger.error(f"Error in create_purchase: {e}")
+        logger.error("Error in create_purchase: %s", e)
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -45,30 +88,30 @@ def update_purchase(
     Update an existing purchase by purchase_id.
     """
     try:
-        logger.info(f"Updating purchase: purchase_id={purchase_id}")
+        logger.info("Updating purchase: purchase_id=%s", purchase_id)
         # Get the existing property
         db_purchase = (
             db.query(models.Purchase).filter(models.Purchase.id == purchase_id).first()
         )
         if not db_purchase:
-            logger.warning(f"Purchase not found: purchase_id={purchase_id}")
+            logger.warning("Purchase not found: purchase_id=%s", purchase_id)
             raise HTTPException(status_code=404, detail="Purchase not found")
 
         # Update property attributes
         purchase_data = purchase_update.dict(exclude_unset=True)
-        logger.debug(f"Updating purchase with data: {purchase_data}")
+        logger.debug("Updating purchase with data: %s", purchase_data)
         for key, value in purchase_data.items():
             setattr(db_purchase, key, value)
 
         # Save changes
         db.commit()
         db.refresh(db_purchase)
-        logger.info(f"Purchase updated successfully: purchase_id={db_purchase.id}")
+        logger.info("Purchase updated successfully: purchase_id=%s", db_purchase.id)
         return db_purchase
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in update_purchase: {e}")
+        logger.error("Error in update_purchase: %s", e)
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -79,57 +122,55 @@ def delete_purchase(purchase_id: int, db: Session = Depends(get_db)):
     Delete a purchase by purchase_id.
     """
     try:
-        logger.info(f"Deleting purchase: purchase_id={purchase_id}")
+        logger.info("Deleting purchase: purchase_id=%s", purchase_id)
         # Check if purchase exists
         purchase = (
             db.query(models.Purchase).filter(models.Purchase.id == purchase_id).first()
         )
         if purchase is None:
-            logger.warning(f"Purchase not found: purchase_id={purchase_id}")
+            logger.warning("Purchase not found: purchase_id=%s", purchase_id)
             raise HTTPException(status_code=404, detail="Purchase not found")
 
         # Delete the purchase
         db.delete(purchase)
         db.commit()
-        logger.info(f"Purchase deleted successfully: purchase_id={purchase_id}")
+        logger.info("Purchase deleted successfully: purchase_id=%s", purchase_id)
         return {"message": "Purchase deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in delete_purchase: {e}")
+        logger.error("Error in delete_purchase: %s", e)
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 # V2 routes for frontend-aligned endpoints
-@router.get("", response_model=List[schemas.PurchasePublic], include_in_schema=False)
-@router.get("/", response_model=List[schemas.PurchasePublic])
+@router.get("", response_model=List[schemas.PurchasePublic], include_in_schema=False, dependencies=[Depends(not_modified)])
+@router.get("/", response_model=List[schemas.PurchasePublic], dependencies=[Depends(not_modified)])
 def get_purchases(
+    response: Response,
     property_id: Optional[int] = None,
     developer: Optional[str] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
 ) -> List[schemas.PurchasePublic]:
     """
     Get a list of purchases with property information and enhanced filtering.
-    Optimized for frontend listing views.
+    Optimized for frontend listing views. Pass `fields` to fetch and return only those fields.
     """
     try:
-        logger.info("Fetching purchases with filters")
-        logger.debug(f"Filters: property_id={property_id}, developer={developer}, "
-                    f"from_date={from_date}, to_date={to_date}, "
-                    f"min_amount={min_amount}, max_amount={max_amount}")
+        logger.debug("Fetching purchases with filters")
+        logger.debug("Filters: property_id=%s, developer=%s, "
+                    "from_date=%s, to_date=%s, "
+                    "min_amount=%s, max_amount=%s",
+                    property_id, developer, from_date, to_date, min_amount, max_amount)
         
-        # Start with a query that joins Purchase with Property
-        query = (
-            db.query(
-                models.Purchase,
-                models.Property.name.label("property_name")
-            )
-            .join(models.Property, models.Purchase.property_id == models.Property.id)
-        )
+        names = fieldsets.parse(fields, schemas.PurchasePublic)
+        # Start with a query that joins Purchase with Property, for the requested columns only
+        query = _purchase_query(fieldsets.columns(PURCHASE_COLUMNS, schemas.PurchasePublic, names))
 
         if property_id:
             query = query.filter(models.Purchase.property_id == property_id)
@@ -151,86 +192,107 @@ def get_purchases(
             query = query.filter(models.Purchase.total_sale_cost <= max_amount)
 
         # Execute query
-        results = query.all()
-        logger.info(f"Found {len(results)} purchases matching the criteria")
-        
-        # Convert the results to the expected schema format
-        purchases = [
-            {
-                "id": purchase.id,
-                "property_name": property_name,
-                "purchase_date": purchase.purchase_date,
-                "carpet_area": purchase.carpet_area,
-                "super_area": purchase.super_area,
-                "total_sale_cost": purchase.total_sale_cost,
-            } for purchase, property_name in results
-        ]
-            
-        return purchases
+        results = db.execute(query).all()
+        logger.debug("Found %s purchases matching the criteria", len(results))
+
+        return serialization.json_response(
+            [row._mapping for row in results],
+            schemas.PurchasePublic,
+            validate=False,
+            response=response,
+            fields=names,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in get_purchases: {e}")
+        logger.error("Error in get_purchases: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{purchase_id}", response_model=schemas.Purchase, include_in_schema=False)
-@router.get("/{purchase_id}", response_model=schemas.Purchase)
-def get_purchase(purchase_id: int, db: Session = Depends(get_db)) -> schemas.Purchase:
+def _today() -> str:
+    # Resolved before the cache lookup, so a cached return is only reused on the day it was valued for
+    return date.today().isoformat()
+
+
+def _valuation_date(as_of: Optional[str]) -> Optional[date]:
+    try:
+        return date.fromisoformat(as_of) if as_of else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="as_of must be a date (YYYY-MM-DD)")
+
+
+# Declared before /{purchase_id} so "returns" isn't parsed as a purchase id.
+# Cached until a purchase's payments, repayments, loans or valuation change.
+@router.get("/returns", response_model=schemas.PortfolioReturns, include_in_schema=False)
+@router.get("/returns/", response_model=schemas.PortfolioReturns)
+@response_cache.cached(ACQUISITION_COST, schemas.PortfolioReturns, defaults={"as_of": _today})
+def get_portfolio_returns(
+    as_of: Optional[str] = None, db: Session = Depends(get_db)
+) -> schemas.PortfolioReturns:
+    """
+    Annualized return (XIRR) of every purchase and of the portfolio, from builder
+    payments and loan repayments, with the current valuation net of the loan
+    principal still owed as the terminal value on `as_of` (today by default).
+    """
+    try:
+        return returns.purchase_returns(db, as_of=_valuation_date(as_of))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error in get_portfolio_returns: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{purchase_id}/returns", response_model=schemas.PurchaseReturn, include_in_schema=False)
+@router.get("/{purchase_id}/returns/", response_model=schemas.PurchaseReturn)
+@response_cache.cached(
+    ACQUISITION_COST, schemas.PurchaseReturn, scope="purchase_id", defaults={"as_of": _today}
+)
+def get_purchase_returns(
+    purchase_id: int, as_of: Optional[str] = None, db: Session = Depends(get_db)
+) -> schemas.PurchaseReturn:
+    """Annualized return (XIRR) of a single purchase; see /purchases/returns."""
+    try:
+        result = returns.purchase_returns(db, [purchase_id], as_of=_valuation_date(as_of))
+        if not result["purchases"]:
+            raise HTTPException(status_code=404, detail="Purchase not found")
+        return result["purchases"][0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error in get_purchase_returns: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{purchase_id}", response_model=schemas.Purchase, include_in_schema=False, dependencies=[Depends(not_modified)])
+@router.get("/{purchase_id}", response_model=schemas.Purchase, dependencies=[Depends(not_modified)])
+def get_purchase(
+    purchase_id: int,
+    response: Response,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+) -> schemas.Purchase:
     """
     Get a detailed view of a single purchase with property information.
-    Optimized for frontend detail views.
+    Optimized for frontend detail views. Pass `fields` to fetch and return only those fields.
     """
     try:
-        logger.info(f"Fetching purchase details: purchase_id={purchase_id}")
-        # Query with join to Property
-        result = (
-            db.query(
-                models.Purchase,
-                models.Property.name.label("property_name")
-            )
-            .join(models.Property, models.Purchase.property_id == models.Property.id)
+        logger.debug("Fetching purchase details: purchase_id=%s", purchase_id)
+        names = fieldsets.parse(fields, schemas.Purchase)
+        # Query with join to Property, for the requested columns only
+        result = db.execute(
+            _purchase_query(fieldsets.columns(PURCHASE_COLUMNS, schemas.Purchase, names))
             .filter(models.Purchase.id == purchase_id)
-            .first()
-        )
+        ).first()
         
         if result is None:
-            logger.warning(f"Purchase not found: purchase_id={purchase_id}")
+            logger.warning("Purchase not found: purchase_id=%s", purchase_id)
             raise HTTPException(status_code=404, detail="Purchase not found")
-            
-        purchase, property_name = result
-        logger.debug(f"Found purchase: id={purchase.id}, property={property_name}")
-        
-        # Convert to the expected schema format
-        return {
-            "id": purchase.id,
-            "property_name": property_name,
-            "purchase_date": purchase.purchase_date,
-            "registration_date": purchase.registration_date,
-            "possession_date": purchase.possession_date,
-            
-            # Area fields moved from Property to Purchase
-            "carpet_area": purchase.carpet_area,
-            "exclusive_area": purchase.exclusive_area,
-            "common_area": purchase.common_area,
-            "floor_number": purchase.floor_number,
-            "super_area": purchase.super_area,
-            
-            # Rate fields moved from Property to Purchase
-            "purchase_rate": purchase.purchase_rate,
-            "current_rate": purchase.current_rate,
-            
-            "base_cost": purchase.base_cost,
-            "other_charges": purchase.other_charges,
-            "ifms": purchase.ifms,
-            "lease_rent": purchase.lease_rent,
-            "amc": purchase.amc,
-            "gst": purchase.gst,
-            "property_cost": purchase.property_cost,
-            "total_cost": purchase.total_cost,
-            "total_sale_cost": purchase.total_sale_cost,
-            "seller": purchase.seller,
-            "remarks": purchase.remarks,
-        }
+
+        return serialization.json_response(
+            result._mapping, schemas.Purchase, validate=False, response=response, fields=names
+        )
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in get_purchase: {e}")
+        logger.error("Error in get_purchase: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
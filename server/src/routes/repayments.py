@@ -1,13 +1,24 @@
-from fastapi import Depends, HTTPException
+import csv
+import logging
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from src import schemas
-from src.database import get_db, models
+from src import etags, schemas, serialization
+from src.database import get_db, get_async_read_db, models, balances, statements
+from src.routes.uploads import spool_request_body
 from fastapi import APIRouter
 
 # Create a router instance
 router = APIRouter(prefix="/repayments", tags=["repayments"])
 
+logger = logging.getLogger(__name__)
+
+# Conditional GET validator: repayment responses only change when one of these tables is written
+not_modified = etags.conditional(models.LoanRepayment, models.Loan, models.PaymentSource, models.Purchase, models.Property)
+
 # V2 routes for frontend-aligned endpoints
 router_dev = APIRouter(prefix="/repayments", tags=["repayments"])
 
@@ -21,7 +32,7 @@ def create_loan_repayment(
     """
     Create a new loan repayment.
     """
-    print(repayment.model_dump())
+    logger.debug("Creating loan repayment: %s", repayment)
     try:
         # Check if loan exists (required)
         loan = db.query(models.Loan).filter(models.Loan.id == repayment.loan_id).first()
@@ -46,6 +57,7 @@ def create_loan_repayment(
         # Create loan repayment
         db_repayment = models.LoanRepayment(**repayment.dict())
         db.add(db_repayment)
+        balances.apply_loan_repayment(db, loan.id, db_repayment.principal_amount)
         db.commit()
         db.refresh(db_repayment)
         return db_repayment
@@ -55,6 +67,55 @@ def create_loan_repayment(
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/import-statement", response_model=schemas.ImportResult)
+async def import_statement(
+    request: Request,
+    loan_id: int,
+    source_id: int,
+    match: Optional[str] = None,
+    payment_mode: str = "online",
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+) -> schemas.ImportResult:
+    """
+    Create repayments for a loan from a bank statement CSV sent as the request body.
+
+    Each debit line becomes a repayment from `source_id`; pass `match` to keep only lines
+    whose narration contains it (e.g. the loan account number). Lines whose transaction
+    reference was imported before are skipped, so a statement can be re-imported safely.
+    Principal and interest are taken from the statement when present, otherwise derived
+    from the loan's interest rate on the outstanding principal.
+    """
+    stream = await spool_request_body(request)
+    try:
+        # The import does blocking database work, so keep it off the event loop
+        result = await run_in_threadpool(
+            statements.import_statement,
+            db,
+            statements.iter_statement(stream),
+            loan_id,
+            source_id,
+            match=match,
+            payment_mode=payment_mode,
+            dry_run=dry_run,
+        )
+        if dry_run:
+            await run_in_threadpool(db.rollback)
+        else:
+            await run_in_threadpool(db.commit)
+        return result
+    except LookupError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ValueError, csv.Error) as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=400, detail=f"Could not parse statement: {e}")
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        stream.close()
+
 @router.put("/{repayment_id}", response_model=schemas.LoanRepaymentOld, include_in_schema=False)
 @router.put("/{repayment_id}/", response_model=schemas.LoanRepaymentOld)
 def update_loan_repayment(
@@ -65,13 +126,7 @@ def update_loan_repayment(
     """
     Update an existing loan repayment by ID.
     """
-    x = schemas.LoanRepaymentUpdate(**repayment.model_dump())
-    print(x)
-    print(repayment.model_dump(exclude_unset=True))
-    try:
-        print(x.total_payment)
-    except Exception as e:
-        print(str(e))
+    logger.debug("Updating loan repayment %s: %s", repayment_id, repayment)
     try:
         # Check if repayment exists
         db_repayment = (
@@ -100,9 +155,19 @@ def update_loan_repayment(
             )
 
         # Update repayment fields
+        previous_principal = db_repayment.principal_amount
+        previous_loan_id = db_repayment.loan_id
         for key, value in repayment.dict(exclude_unset=True).items():
             setattr(db_repayment, key, value)
 
+        if db_repayment.loan_id != previous_loan_id:
+            balances.apply_loan_repayment(db, previous_loan_id, -previous_principal)
+            balances.apply_loan_repayment(db, db_repayment.loan_id, db_repayment.principal_amount)
+        else:
+            balances.apply_loan_repayment(
+                db, db_repayment.loan_id, db_repayment.principal_amount - previous_principal
+            )
+
         db.commit()
         db.refresh(db_repayment)
         return db_repayment
@@ -130,6 +195,7 @@ def delete_loan_repayment(repayment_id: int, db: Session = Depends(get_db)):
 
         # Delete the repayment
         db.delete(repayment)
+        balances.apply_loan_repayment(db, repayment.loan_id, -repayment.principal_amount)
         db.commit()
         return {"message": "Loan repayment deleted successfully"}
     except HTTPException:
@@ -138,30 +204,34 @@ def delete_loan_repayment(repayment_id: int, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("", response_model=List[schemas.LoanRepaymentPublic], include_in_schema=False)
-@router.get("/", response_model=List[schemas.LoanRepaymentPublic])
-def get_loan_repayments(
+@router.get("", response_model=List[schemas.LoanRepaymentPublic], include_in_schema=False, dependencies=[Depends(not_modified)])
+@router.get("/", response_model=List[schemas.LoanRepaymentPublic], dependencies=[Depends(not_modified)])
+async def get_loan_repayments(
+    response: Response,
     loan_id: Optional[int] = None,
     source_id: Optional[int] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ) -> List[schemas.LoanRepaymentPublic]:
     """
     Get a list of loan repayments with enhanced information.
     Optimized for frontend listing views with improved filtering.
     """
     try:
-        # Start with a query that joins LoanRepayment with Loan, PaymentSource, Purchase, and Property
+        # Only the listed columns, joined from Loan, PaymentSource, Purchase and Property
         query = (
-            db.query(
-                models.LoanRepayment,
+            select(
+                models.LoanRepayment.id,
                 models.Loan.name.label("loan_name"),
-                models.PaymentSource.name.label("source_name"),
+                models.Loan.institution.label("loan_institution"),
                 models.Property.name.label("property_name"),
-                models.Loan.institution.label("loan_institution")
+                models.LoanRepayment.total_payment,
+                models.PaymentSource.name.label("source_name"),
+                models.LoanRepayment.payment_date,
+                models.LoanRepayment.payment_mode,
             )
             .join(models.Loan, models.LoanRepayment.loan_id == models.Loan.id)
             .join(models.PaymentSource, models.LoanRepayment.source_id == models.PaymentSource.id)
@@ -191,30 +261,18 @@ def get_loan_repayments(
         # Order by payment date (newest first)
         query = query.order_by(models.LoanRepayment.payment_date.desc())
 
-        results = query.all()
-        
-        # Convert the results to the expected schema format
-        repayments = []
-        for repayment, loan_name, source_name, property_name, loan_institution in results:
-            repayment_dict = {
-                "id": repayment.id,
-                "loan_name": loan_name,
-                "loan_institution": loan_institution,
-                "property_name": property_name,
-                "total_payment": repayment.total_payment,
-                "source_name": source_name,
-                "payment_date": repayment.payment_date,
-                "payment_mode": repayment.payment_mode,
-            }
-            repayments.append(repayment_dict)
-            
-        return repayments
+        results = (await db.execute(query)).all()
+
+        # Rows come straight from typed columns, so skip re-validation and encode with orjson
+        return serialization.json_response(
+            [row._mapping for row in results], schemas.LoanRepaymentPublic, validate=False, response=response
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{repayment_id}", response_model=schemas.LoanRepayment, include_in_schema=False)
-@router.get("/{repayment_id}", response_model=schemas.LoanRepayment)
-def get_loan_repayment(repayment_id: int, db: Session = Depends(get_db)) -> schemas.LoanRepayment:
+@router.get("/{repayment_id}", response_model=schemas.LoanRepayment, include_in_schema=False, dependencies=[Depends(not_modified)])
+@router.get("/{repayment_id}", response_model=schemas.LoanRepayment, dependencies=[Depends(not_modified)])
+async def get_loan_repayment(repayment_id: int, db: AsyncSession = Depends(get_async_read_db)) -> schemas.LoanRepayment:
     """
     Get a detailed view of a single loan repayment.
     Optimized for frontend detail views.
@@ -222,21 +280,22 @@ def get_loan_repayment(repayment_id: int, db: Session = Depends(get_db)) -> sche
     try:
         # Query with joins to Loan, PaymentSource, Purchase, and Property
         result = (
-            db.query(
-                models.LoanRepayment,
-                models.Loan.name.label("loan_name"),
-                models.Loan.institution.label("loan_institution"),
-                models.PaymentSource.name.label("source_name"),
-                models.Property.name.label("property_name"),
-                models.Purchase.id.label("purchase_id")
+            await db.execute(
+                select(
+                    models.LoanRepayment,
+                    models.Loan.name.label("loan_name"),
+                    models.Loan.institution.label("loan_institution"),
+                    models.PaymentSource.name.label("source_name"),
+                    models.Property.name.label("property_name"),
+                    models.Purchase.id.label("purchase_id")
+                )
+                .join(models.Loan, models.LoanRepayment.loan_id == models.Loan.id)
+                .join(models.PaymentSource, models.LoanRepayment.source_id == models.PaymentSource.id)
+                .join(models.Purchase, models.Loan.purchase_id == models.Purchase.id)
+                .join(models.Property, models.Purchase.property_id == models.Property.id)
+                .filter(models.LoanRepayment.id == repayment_id)
             )
-            .join(models.Loan, models.LoanRepayment.loan_id == models.Loan.id)
-            .join(models.PaymentSource, models.LoanRepayment.source_id == models.PaymentSource.id)
-            .join(models.Purchase, models.Loan.purchase_id == models.Purchase.id)
-            .join(models.Property, models.Purchase.property_id == models.Property.id)
-            .filter(models.LoanRepayment.id == repayment_id)
-            .first()
-        )
+        ).first()
         
         if result is None:
             raise HTTPException(status_code=404, detail="Loan repayment not found")
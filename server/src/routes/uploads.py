@@ -0,0 +1,21 @@
+import io
+import tempfile
+from typing import IO
+
+from fastapi import Request
+
+# Uploads larger than this are spooled to a temporary file instead of memory
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+async def spool_request_body(request: Request) -> IO[str]:
+    """
+    Copy a raw request body into a rewound text file without buffering it all in memory.
+    The caller closes the returned file.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    # utf-8-sig drops the byte order mark spreadsheet exports tend to add
+    return io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from src import schemas
-from src.database import get_db, models
+from src.database import get_db, get_read_db, models
 
 # Create a router instance
 router = APIRouter(prefix="/api/v1", tags=["v1"])
@@ -32,7 +32,7 @@ def create_user(
 
 
 @router.get("/api/users/{user_id}", response_model=schemas.User)
-def get_user(user_id: int, db: Session = Depends(get_db)) -> schemas.User:
+def get_user(user_id: int, db: Session = Depends(get_read_db)) -> schemas.User:
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
@@ -12,9 +12,29 @@ from .dashboard import (
     AcquisitionCostSummary,
     AcquisitionCostDetails,
     LoanSummary,
+    DashboardPurchaseTotals,
+    DashboardInvoiceTotals,
+    DashboardPaymentTotals,
+    DashboardLoanTotals,
+    DashboardAcquisitionCost,
+    DashboardSections,
+    DashboardPurchase,
+    Dashboard,
 )
 from .construction_status import ConstructionStatus
 from .purchases import Purchase, PurchaseCreate, PurchaseUpdate, PurchasePublic, Purchase, PurchaseOld
+from .imports import ImportResult, ImportRowError
+from .schedules import (
+    ScheduleMonth,
+    LoanScheduleSummary,
+    LoanSchedule,
+    PortfolioSchedule,
+    ScenarioGrid,
+    ScenarioBaseline,
+    ScenarioOutcome,
+    ScenarioResults,
+)
+from .returns import PurchaseReturn, PortfolioReturn, PortfolioReturns
 
 __all__ = [
     # Original schemas
@@ -48,6 +68,27 @@ __all__ = [
     "AcquisitionCostSummary",
     "AcquisitionCostDetails",
     "LoanSummary",
+    "DashboardPurchaseTotals",
+    "DashboardInvoiceTotals",
+    "DashboardPaymentTotals",
+    "DashboardLoanTotals",
+    "DashboardAcquisitionCost",
+    "DashboardSections",
+    "DashboardPurchase",
+    "Dashboard",
+    "ImportResult",
+    "ImportRowError",
+    "ScheduleMonth",
+    "LoanScheduleSummary",
+    "LoanSchedule",
+    "PortfolioSchedule",
+    "ScenarioGrid",
+    "ScenarioBaseline",
+    "ScenarioOutcome",
+    "ScenarioResults",
+    "PurchaseReturn",
+    "PortfolioReturn",
+    "PortfolioReturns",
     
     # V2 schemas
     "PropertyPublic",
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 from decimal import Decimal
 
@@ -71,3 +71,62 @@ class LoanSummary(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class DashboardPurchaseTotals(BaseModel):
+    """Cost and current valuation (current_rate x super_area) of purchases."""
+    total_cost: Decimal = Decimal(0)
+    total_sale_cost: Decimal = Decimal(0)
+    current_value: Decimal = Decimal(0)
+
+
+class DashboardInvoiceTotals(BaseModel):
+    count: int = 0
+    amount: Decimal = Decimal(0)
+    paid: Decimal = Decimal(0)
+    outstanding: Decimal = Decimal(0)
+    overdue: int = 0  # Past due, not fully paid and not cancelled
+
+
+class DashboardPaymentTotals(BaseModel):
+    count: int = 0
+    amount: Decimal = Decimal(0)
+    last_payment_date: Optional[date] = None
+
+
+class DashboardLoanTotals(BaseModel):
+    count: int = 0
+    active: int = 0
+    sanctioned: Decimal = Decimal(0)
+    disbursed: Decimal = Decimal(0)
+    principal_paid: Decimal = Decimal(0)
+    interest_paid: Decimal = Decimal(0)
+    principal_balance: Decimal = Decimal(0)
+
+
+class DashboardAcquisitionCost(BaseModel):
+    builder_payment: Decimal = Decimal(0)
+    loan_payment: Decimal = Decimal(0)
+    principal_payment: Decimal = Decimal(0)
+    total_payment: Decimal = Decimal(0)
+    remaining_balance: Decimal = Decimal(0)
+
+
+class DashboardSections(BaseModel):
+    purchase: DashboardPurchaseTotals
+    invoices: DashboardInvoiceTotals
+    payments: DashboardPaymentTotals
+    loans: DashboardLoanTotals
+    acquisition_cost: DashboardAcquisitionCost
+
+
+class DashboardPurchase(DashboardSections):
+    purchase_id: int
+    property_name: Optional[str] = None
+
+
+class Dashboard(BaseModel):
+    """Every dashboard aggregate, per purchase and in total, from one query."""
+    purchase_count: int
+    totals: DashboardSections
+    purchases: List[DashboardPurchase]
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class ImportRowError(BaseModel):
+    """A row that was rejected by a bulk import, numbered from 1 in file order."""
+    row: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    """Outcome of a bulk import: rows written and a per-row error report."""
+    imported: int
+    skipped: int = 0  # Rows already on file, e.g. repayments with a known transaction reference
+    errors: List[ImportRowError] = []
@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+from decimal import Decimal
+
+
+class PurchaseReturn(BaseModel):
+    """Annualized return on a purchase from its own cashflows and current valuation."""
+    purchase_id: int
+    property_name: Optional[str] = None
+    invested: Decimal  # Builder payments from own sources plus loan repayments
+    current_value: Optional[Decimal] = None  # current_rate x super_area
+    outstanding_loan: Decimal  # Loan principal still owed on the valuation date
+    first_cashflow_date: Optional[date] = None
+    xirr: Optional[Decimal] = None  # Percent per year; None when it can't be solved
+
+
+class PortfolioReturn(BaseModel):
+    """Combined return of all valued purchases, treated as one series of cashflows."""
+    invested: Decimal
+    current_value: Decimal
+    outstanding_loan: Decimal
+    xirr: Optional[Decimal] = None
+
+
+class PortfolioReturns(BaseModel):
+    """Per-purchase and portfolio returns valued on `as_of`."""
+    as_of: date
+    portfolio: PortfolioReturn
+    purchases: List[PurchaseReturn]
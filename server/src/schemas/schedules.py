@@ -0,0 +1,82 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import date
+from decimal import Decimal
+
+
+class ScheduleMonth(BaseModel):
+    """One month of an amortization schedule; month 0 is the sanction month."""
+    month: int
+    due_date: date
+    disbursement: Decimal
+    opening_balance: Decimal  # Previous closing balance plus this month's disbursement
+    emi: Decimal
+    principal: Decimal
+    interest: Decimal
+    closing_balance: Decimal
+
+
+class LoanScheduleSummary(BaseModel):
+    """Totals of a loan's schedule over its full tenure."""
+    loan_id: int
+    loan_name: str
+    sanction_date: date
+    sanction_amount: Decimal
+    interest_rate: Decimal
+    tenure_months: int
+    disbursed_amount: Decimal  # Tranches the schedule is built from
+    emi: Decimal  # EMI once every tranche is being repaid
+    total_interest: Decimal
+    total_payment: Decimal
+    end_date: date
+
+
+class LoanSchedule(LoanScheduleSummary):
+    """A loan's month-by-month principal, interest and balance schedule."""
+    schedule: List[ScheduleMonth]
+
+
+class PortfolioSchedule(BaseModel):
+    """Schedules of all active loans: per-loan totals and combined calendar months."""
+    loans: List[LoanScheduleSummary]
+    months: List[ScheduleMonth]  # Month 0 is the earliest sanction month
+
+
+class ScenarioGrid(BaseModel):
+    """What-if scenarios to run against each loan: every combination of the values given."""
+    # Bounded so an oversized request is rejected before any work; the combinations
+    # are further capped at finance.scenarios.MAX_SCENARIOS
+    loan_ids: List[int] = Field(min_length=1, max_length=20_000)
+    months: List[int] = Field([1], max_length=600)  # Month of the change, counted as in the schedule
+    prepayments: List[Decimal] = Field([Decimal("0")], max_length=1000)
+    rate_shifts_bps: List[int] = Field([0], max_length=1000)
+    modes: List[Literal["reduce_tenure", "reduce_emi"]] = Field(["reduce_tenure"], max_length=2)
+    include_undisbursed: bool = False
+
+
+class ScenarioBaseline(BaseModel):
+    """A loan's schedule with no changes, as simulated."""
+    loan_id: int
+    emi: Decimal
+    total_interest: Decimal
+    tenure_months: Optional[int] = None  # Month of the last instalment
+
+
+class ScenarioOutcome(BaseModel):
+    """Result of one scenario on one loan."""
+    loan_id: int
+    month: int
+    prepayment: Decimal
+    rate_shift_bps: int
+    mode: str
+    emi: Decimal  # EMI after the change
+    total_interest: Decimal
+    interest_saved: Decimal  # Against the baseline; negative when the scenario costs more
+    tenure_months: Optional[int] = None  # None when the EMI no longer repays the loan
+    months_saved: Optional[int] = None
+
+
+class ScenarioResults(BaseModel):
+    """Baselines and outcomes of a scenario simulation."""
+    baselines: List[ScenarioBaseline]
+    scenarios: List[ScenarioOutcome]
@@ -0,0 +1,111 @@
+"""Fast JSON responses for list endpoints.
+
+By default FastAPI validates every item a route returns against its
+response_model, converts it to JSON-compatible Python objects and encodes the
+result with the stdlib json module. List routes that build their items from
+typed ORM columns can opt out of most of that by returning json_response():
+
+- validate=True re-validates the items with a TypeAdapter that is built once
+  per schema, then encodes with orjson;
+- validate=False trusts the items, keeps just the schema's fields in schema
+  order, and encodes them with orjson directly.
+
+Both produce the same JSON as the default path (Decimals as strings, dates in
+ISO format, UTC datetimes with a trailing Z). See benchmarks/serialization.py
+for the per-row cost of each path. Sparse fieldsets (see fieldsets.py) always
+take the trusted path, since a partial row can't validate against the schema.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Iterable, List, Mapping, Optional, Tuple, Type, Union
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+# pydantic writes UTC offsets as "Z" rather than "+00:00"
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _default(value):
+    # orjson has no native Decimal support; pydantic serializes Decimals as strings
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Encode with orjson, handling Decimal the way pydantic does."""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for a list of `schema`, built once per schema."""
+    return TypeAdapter(List[schema])
+
+
+@lru_cache(maxsize=None)
+def _field_defaults(schema: Type[BaseModel], fields: Optional[Tuple[str, ...]] = None) -> tuple:
+    return tuple(
+        (name, None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in schema.model_fields.items()
+        if fields is None or name in fields
+    )
+
+
+def project(item: Mapping, schema: Type[BaseModel], fields: Optional[Tuple[str, ...]] = None) -> dict:
+    """Trusted projection of a row mapping onto the schema's fields (or just `fields`)."""
+    return {name: item.get(name, default) for name, default in _field_defaults(schema, fields)}
+
+
+def encode_items(
+    items: Iterable[Mapping],
+    schema: Type[BaseModel],
+    validate: bool = True,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> bytes:
+    """Encode a list of row mappings as a JSON array of `schema` objects."""
+    if validate and fields is None:
+        adapter = list_adapter(schema)
+        return dumps(adapter.dump_python(adapter.validate_python(items, from_attributes=True)))
+    return dumps([project(item, schema, fields) for item in items])
+
+
+def encode_item(
+    item: Mapping,
+    schema: Type[BaseModel],
+    validate: bool = True,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> bytes:
+    """Encode a single row mapping as a `schema` object."""
+    if validate and fields is None:
+        return dumps(schema.model_validate(item, from_attributes=True).model_dump())
+    return dumps(project(item, schema, fields))
+
+
+def json_response(
+    content: Union[Iterable[Mapping], Mapping],
+    schema: Type[BaseModel],
+    validate: bool = True,
+    response: Optional[Response] = None,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> Response:
+    """
+    Response for a list route (a list of row mappings) or a detail route (a single
+    mapping), bypassing FastAPI's response_model serialization. `fields` limits the
+    output to a sparse fieldset.
+    Headers and status set on the route's injected `response` (e.g. by dependencies)
+    are carried over, since FastAPI only merges them into responses it builds itself.
+    """
+    if isinstance(content, Mapping):
+        body = encode_item(content, schema, validate=validate, fields=fields)
+    else:
+        body = encode_items(content, schema, validate=validate, fields=fields)
+    fast_response = Response(content=body, media_type="application/json")
+    if response is not None:
+        fast_response.status_code = response.status_code or fast_response.status_code
+        for name, value in response.headers.items():
+            if name != "content-length":
+                fast_response.headers.append(name, value)
+    return fast_response
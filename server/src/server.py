@@ -0,0 +1,87 @@
+"""Production server: gunicorn managing uvicorn workers, configured by gunicorn.conf.py.
+
+The app is imported once in the gunicorn master (preload_app) and the worker
+processes are forked from it, so they start quickly and share the imported
+code's memory pages. Anything the master opened that a child must not share
+is reset in after_fork():
+
+- connection pools: a pooled connection inherited across fork would be used by
+  two processes at once. Each engine's pool is replaced without closing the
+  inherited connections, which still belong to the master (SQLAlchemy's
+  dispose(close=False) recipe for forking).
+- the logging listener thread, which doesn't survive fork; without it the
+  worker's records would pile up in its queue.
+"""
+import math
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+from uvicorn.workers import UvicornWorker
+
+load_dotenv()
+
+# cgroup v2 and v1 files holding the container's CPU quota
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as stream:
+            return stream.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_quota(
+    cpu_max: str = CGROUP_V2_CPU_MAX,
+    v1_quota: str = CGROUP_V1_QUOTA,
+    v1_period: str = CGROUP_V1_PERIOD,
+) -> Optional[float]:
+    """CPUs the cgroup may use (e.g. 2.0 for cpus: '2'), or None when unlimited or unknown."""
+    limit = _read(cpu_max)
+    if limit:
+        quota, _, period = limit.partition(" ")
+        if quota != "max":
+            return int(quota) / int(period or 100000)
+        return None
+    quota, period = _read(v1_quota), _read(v1_period)
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def default_workers() -> int:
+    """One worker per CPU of the container's quota, else per CPU this process may run on."""
+    quota = cpu_quota()
+    if quota:
+        return max(1, math.ceil(quota))
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+class Worker(UvicornWorker):
+    """Uvicorn worker on uvloop and httptools that drains requests for gunicorn's graceful_timeout."""
+
+    # Fail at startup if the C implementations are missing rather than fall back silently
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # On SIGTERM uvicorn stops accepting and waits for open requests; bound the
+        # wait so the worker exits before gunicorn kills it
+        self.config.timeout_graceful_shutdown = self.cfg.graceful_timeout
+
+
+def after_fork() -> None:
+    """Reset what a forked worker inherited from the master; see the module docstring."""
+    from src import logging_config
+    from src.database import async_engine, engine, replicas
+
+    engines = [engine, async_engine.sync_engine]
+    for replica in replicas.replicas:
+        engines.extend([replica.engine, replica.async_engine.sync_engine])
+    for each in engines:
+        each.dispose(close=False)
+    logging_config.after_fork()
@@ -0,0 +1,43 @@
+import pytest
+
+from src.database.base import Base
+from src.database import models  # noqa: F401  (registers the tables on Base.metadata)
+
+
+def _leading_columns(table):
+    """Names of the columns that lead an index or the primary key of `table`."""
+    leading = set()
+    for index in table.indexes:
+        expressions = list(index.expressions)
+        if not expressions:
+            continue
+        # Unwrap ordering modifiers such as payment_date.desc()
+        first = getattr(expressions[0], "element", expressions[0])
+        name = getattr(first, "name", None)
+        if name:
+            leading.add(name)
+    pk_columns = list(table.primary_key.columns)
+    if pk_columns:
+        leading.add(pk_columns[0].name)
+    return leading
+
+
+def _foreign_key_columns():
+    for table in Base.metadata.sorted_tables:
+        for fk in table.foreign_keys:
+            yield table, fk.parent
+
+
+class TestForeignKeyIndexes:
+    """Every foreign key column should lead at least one index."""
+
+    @pytest.mark.parametrize(
+        "table,column",
+        list(_foreign_key_columns()),
+        ids=lambda value: getattr(value, "name", str(value)),
+    )
+    def test_foreign_key_is_indexed(self, table, column):
+        assert column.name in _leading_columns(table), (
+            f"{table.name}.{column.name} is a foreign key without an index; "
+            f"add index=True or an Index() whose first column is {column.name}"
+        )
@@ -0,0 +1,136 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import Request
+from sqlalchemy.orm import Session
+
+from src.database import replicas
+from src.database.models import User
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """A single SQLite replica, always checked when it isn't usable."""
+    replica = replicas.Replica(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(replicas, "replicas", [replica])
+    monkeypatch.setattr(replicas, "CHECK_INTERVAL", 0)
+    monkeypatch.setattr(replicas._last_write, "value", 0.0)
+    yield replica
+    replica.engine.dispose()
+
+
+class TestReplicaRouting:
+    """Tests for choosing between replicas and the primary."""
+
+    def test_no_replicas_reads_from_primary(self, monkeypatch):
+        monkeypatch.setattr(replicas, "replicas", [])
+
+        assert replicas.choose() is None
+
+    def test_caught_up_replica_is_chosen(self, replica):
+        assert replicas.choose() is replica
+        assert replica.lag == 0.0
+
+    def test_commit_sends_reads_to_primary_until_replayed(self, replica, db_session, monkeypatch):
+        """Test read-your-writes: a replica last measured before a commit isn't used."""
+        assert replicas.choose() is replica
+        db_session.add(User(username="replica-user", password="secret", email="r@example.com"))
+        db_session.commit()
+
+        # The last measurement predates the commit, and a new one isn't due yet
+        monkeypatch.setattr(replicas, "CHECK_INTERVAL", 3600)
+        assert replicas.choose() is None
+
+        monkeypatch.setattr(replicas, "CHECK_INTERVAL", 0)
+        assert replicas.choose() is replica
+
+    def test_other_clients_writes_keep_reads_on_replicas(self, replica, db_session, monkeypatch):
+        """Test that only the client that wrote waits for the replica to replay its write."""
+        assert replicas.choose() is replica
+        db_session.add(User(username="replica-user", password="secret", email="r@example.com"))
+        db_session.commit()
+        written_at = replicas._last_write.value
+        monkeypatch.setattr(replicas, "CHECK_INTERVAL", 3600)
+
+        assert replicas.choose(since=0.0) is replica
+        assert replicas.choose(since=written_at) is None
+
+    def test_write_time_is_handed_back_and_read(self, client):
+        """Test that a response to a write carries its time, and a request sending it is read."""
+        response = client.post("/payment-sources/", json={"name": "Replica account", "source_type": "bank_account"})
+        assert response.status_code == 200
+        written_at = response.headers[replicas.WRITE_HEADER]
+        assert response.cookies[replicas.WRITE_COOKIE] == written_at
+        assert replicas.WRITE_HEADER not in client.get("/payment-sources/").headers
+
+        request = Request({"type": "http", "headers": [(b"x-last-write", written_at.encode())]})
+        assert replicas.written_since(request) == float(written_at)
+        assert replicas.written_since(Request({"type": "http", "headers": []})) == 0.0
+
+    def test_commit_in_another_worker_sends_reads_to_primary(self, replica, monkeypatch):
+        """Test read-your-writes across worker processes forked from this one."""
+        assert replicas.choose() is replica
+
+        pid = os.fork()
+        if pid == 0:
+            session = Session()
+            session.info[replicas._WROTE] = True
+            replicas._record_write(session)
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+        monkeypatch.setattr(replicas, "CHECK_INTERVAL", 3600)
+        assert replicas.choose() is None
+
+    def test_lagging_replica_falls_back_to_primary(self, replica, monkeypatch):
+        monkeypatch.setattr(replicas, "MAX_LAG", 5)
+
+        def lagging():
+            replica.lag = 30.0
+            replica.checked_at = replicas.time.monotonic()
+            replica.checked_wall = replicas.time.time()
+
+        monkeypatch.setattr(replica, "check", lagging)
+
+        assert replicas.choose() is None
+
+    def test_unreachable_replica_falls_back_to_primary(self, replica, monkeypatch):
+        def broken(*args, **kwargs):
+            raise ConnectionError("replica down")
+
+        monkeypatch.setattr(replica.engine.dialect, "name", "postgresql")
+        monkeypatch.setattr(replica.engine, "connect", broken)
+
+        assert replicas.choose() is None
+        assert replica.lag is None
+
+    def test_replicas_are_used_round_robin(self, replica, tmp_path, monkeypatch):
+        other = replicas.Replica(f"sqlite:///{tmp_path / 'other.db'}")
+        monkeypatch.setattr(replicas, "replicas", [replica, other])
+
+        chosen = {replicas.choose() for _ in range(4)}
+
+        assert chosen == {replica, other}
+        other.engine.dispose()
+
+    def test_reads_of_one_request_share_a_replica(self, replica, tmp_path, monkeypatch):
+        """Test that a sync and an async read dependency of a request land on the same replica."""
+        other = replicas.Replica(f"sqlite:///{tmp_path / 'other.db'}")
+        monkeypatch.setattr(replicas, "replicas", [replica, other])
+        request = Request({"type": "http", "headers": []})
+
+        async def async_engine():
+            dependency = replicas.get_async_read_db(request)
+            db = await dependency.__anext__()
+            bind = db.bind
+            await dependency.aclose()
+            return bind
+
+        for _ in range(3):
+            dependency = replicas.get_read_db(request)
+            db = next(dependency)
+            assert db.bind is request.state.replica.engine
+            dependency.close()
+            assert asyncio.run(async_engine()) is request.state.replica.async_engine
+        other.engine.dispose()
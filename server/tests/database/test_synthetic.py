@@ -0,0 +1,55 @@
+from sqlalchemy import func, select
+
+from src.database import balances, synthetic
+from src.database.models import Invoice, Loan, LoanRepayment, Payment, PaymentSource, Property, Purchase, User
+from src.database.views import AcquisitionCostSummary
+
+
+def _snapshot(db):
+    return [
+        db.execute(select(Invoice.amount, Invoice.status, Invoice.paid_amount).order_by(Invoice.id)).all(),
+        db.execute(select(Payment.payment_date, Payment.amount, Payment.source_id).order_by(Payment.id)).all(),
+        db.execute(select(LoanRepayment.payment_date, LoanRepayment.principal_amount).order_by(LoanRepayment.id)).all(),
+    ]
+
+
+class TestSyntheticData:
+    """Tests for the seeded synthetic portfolio generator."""
+
+    def test_generates_requested_portfolio(self, db_session):
+        counts = synthetic.generate(db_session, users=2, properties=3, invoices=4, payments_per_invoice=2, batch_size=5)
+        db_session.commit()
+
+        assert counts["users"] == 2
+        assert counts["purchases"] == 3 * 2
+        assert counts["invoices"] == 3 * 2 * 4
+        assert db_session.scalar(select(func.count()).select_from(Payment)) == counts["payments"] > 0
+        assert db_session.scalar(select(func.count()).select_from(AcquisitionCostSummary)) == 6
+        # Every loan has its own payment source next to each user's bank account
+        assert counts["payment_sources"] == 2 + counts["loans"]
+        assert db_session.scalar(select(func.count()).select_from(Purchase)) == 6
+
+    def test_stored_totals_match_rows(self, db_session):
+        synthetic.generate(db_session, users=2, properties=3, invoices=4, payments_per_invoice=2)
+        db_session.commit()
+
+        assert balances.refresh_invoice_paid_amounts(db_session) == 0
+        assert balances.refresh_loan_totals(db_session) == 0
+
+    def test_same_seed_same_data(self, db_session):
+        synthetic.generate(db_session, users=1, properties=4, seed=7)
+        first = _snapshot(db_session)
+        for model in (LoanRepayment, Payment, Invoice, PaymentSource, Loan, Purchase, Property, User):
+            db_session.query(model).delete()
+        db_session.query(AcquisitionCostSummary).delete()
+
+        synthetic.generate(db_session, users=1, properties=4, seed=7)
+
+        assert _snapshot(db_session) == first
+
+    def test_ids_continue_after_existing_rows(self, db_session):
+        synthetic.generate(db_session, users=1, properties=1, seed=1)
+        synthetic.generate(db_session, users=1, properties=1, seed=1)
+        db_session.commit()
+
+        assert db_session.scalars(select(User.username).order_by(User.id)).all() == ["synthetic-1", "synthetic-2"]
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from src.database import versions
+from src.database.models import CollectionChange, CollectionVersion
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A database with just the version tables, and a counter row for payments."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'versions.db'}", connect_args={"timeout": 30})
+    tables = [CollectionVersion.__table__, CollectionChange.__table__]
+    CollectionVersion.metadata.create_all(engine, tables=tables)
+    with engine.begin() as connection:
+        connection.execute(insert(CollectionVersion.__table__), [{"name": "payments", "version": 0}])
+    yield engine
+    engine.dispose()
+
+
+def _write(engine, *tables: str) -> None:
+    with Session(engine) as session:
+        session.execute(select(1))
+        versions.mark(session, *tables)
+        session.commit()
+
+
+def _version(engine, *tables: str) -> tuple:
+    with engine.connect() as connection:
+        return tuple(connection.execute(versions.version_query(tables)).one())
+
+
+class TestCollectionVersions:
+    """Tests for the per-table change counters behind ETags."""
+
+    def test_every_committed_write_changes_the_version(self, engine):
+        _write(engine, "payments")
+        _write(engine, "payments", "invoices")
+
+        assert _version(engine, "payments")[:2] == (1, 2)
+        assert _version(engine, "invoices")[:2] == (0, 1)
+        assert _version(engine, "payments", "invoices")[:2] == (1, 3)
+
+    def test_rolled_back_write_leaves_the_version(self, engine):
+        with Session(engine) as session:
+            session.execute(select(1))
+            versions.mark(session, "payments")
+            session.rollback()
+
+        assert _version(engine, "payments")[1] == 0
+
+    def test_folding_keeps_the_version(self, engine):
+        for _ in range(3):
+            _write(engine, "payments")
+        before = _version(engine, "payments")
+
+        with Session(engine) as session:
+            versions.fold(session, ["payments"])
+            session.commit()
+
+        assert _version(engine, "payments") == before
+        with engine.connect() as connection:
+            assert connection.execute(select(CollectionChange.id)).all() == []
+
+    def test_concurrent_writers_each_count(self, engine, monkeypatch):
+        """Test that writers to the same tables, some of them folding, all land in the version."""
+        monkeypatch.setattr(versions, "FOLD_EVERY", 3)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: _write(engine, *(["payments", "invoices"] if i % 2 else ["payments"])), range(40)))
+
+        assert _version(engine, "payments")[1] == 40
+        assert _version(engine, "invoices")[1] == 20
@@ -0,0 +1,109 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from src.finance.amortization import add_months, amortize, amortize_in_chunks, by_calendar_month, month_index
+
+
+def _reference(tranches, annual_rate, tenure):
+    """Month-by-month schedule that recomputes the EMI after every disbursement."""
+    rate = annual_rate / 1200
+    drawn = {}
+    for month, amount in tranches:
+        drawn[month] = drawn.get(month, 0) + amount
+    balance = emi = 0.0
+    rows = []
+    for month in range(tenure + 1):
+        interest = principal = paid = 0.0
+        if month >= 1 and balance > 0:
+            interest = balance * rate
+            paid = emi
+            principal = emi - interest
+            balance -= principal
+        if month in drawn:
+            balance += drawn[month]
+            left = tenure - month
+            emi = balance * rate * (1 + rate) ** left / ((1 + rate) ** left - 1) if rate else balance / left
+        rows.append((paid, principal, interest, balance))
+    return np.array(rows)
+
+
+def _columns(result, loan, tenure):
+    names = ("emi", "principal", "interest", "closing_balance")
+    return np.stack([result[name][loan, : tenure + 1] for name in names], axis=1)
+
+
+def test_single_disbursement_matches_emi_formula():
+    """Test that a loan drawn at sanction pays the textbook EMI and ends at zero."""
+    result = amortize(np.array([0]), np.array([0]), np.array([1_000_000.0]), np.array([8.5]), np.array([240]))
+
+    assert result["emi"][0, 1] == pytest.approx(8678.23, abs=0.01)
+    assert result["closing_balance"][0, 240] == pytest.approx(0, abs=1e-6)
+    assert result["principal"][0].sum() == pytest.approx(1_000_000)
+
+
+def test_tranches_match_recomputed_emi():
+    """Test that a batch of loans with tranches matches month-by-month recomputation."""
+    loans = [
+        ([(0, 300_000.0), (5, 200_000.0), (14, 500_000.0)], 9.1, 180),
+        ([(2, 100_000.0), (2, 50_000.0), (30, 70_000.0)], 0.0, 60),
+        ([(0, 2_500_000.0)], 7.5, 360),
+    ]
+    index, start, amount = [], [], []
+    for i, (tranches, _, _) in enumerate(loans):
+        for month, value in tranches:
+            index.append(i)
+            start.append(month)
+            amount.append(value)
+    result = amortize(
+        np.array(index),
+        np.array(start),
+        np.array(amount),
+        np.array([rate for _, rate, _ in loans]),
+        np.array([tenure for _, _, tenure in loans]),
+    )
+
+    for i, (tranches, rate, tenure) in enumerate(loans):
+        np.testing.assert_allclose(_columns(result, i, tenure), _reference(tranches, rate, tenure), atol=1e-6)
+        # Months past a loan's own tenure are empty
+        assert not result["emi"][i, tenure + 1 :].any()
+
+
+def test_calendar_months_add_up_loans():
+    """Test that the portfolio view is the loans' schedules shifted onto calendar months."""
+    result = amortize(np.array([0, 1]), np.array([0, 0]), np.array([100.0, 200.0]), np.array([12.0, 12.0]), np.array([12, 6]))
+
+    monthly = by_calendar_month(result, np.array([0, 3]), np.array([12, 6]))
+
+    assert len(monthly["emi"]) == 13
+    assert monthly["emi"].sum() == pytest.approx(result["emi"].sum())
+    assert monthly["disbursement"][3] == pytest.approx(200.0)
+
+
+def test_chunks_match_a_single_pass():
+    """Test that amortizing runs of loans gives the same schedules as all loans at once."""
+    rng = np.random.default_rng(0)
+    tenure = rng.integers(1, 240, 50)
+    rates = rng.uniform(0, 12, 50)
+    loan_index = rng.integers(0, 50, 400)
+    start_month = rng.integers(0, 36, 400)
+    amount = rng.uniform(1e4, 1e6, 400)
+    whole = amortize(loan_index, start_month, amount, rates, tenure)
+
+    chunks = list(amortize_in_chunks(loan_index, start_month, amount, rates, tenure, max_cells=2000))
+
+    assert len(chunks) > 1
+    assert chunks[0][0] == 0
+    for start, columns in chunks:
+        loans, horizon = columns["emi"].shape
+        for name, values in columns.items():
+            np.testing.assert_allclose(values, whole[name][start : start + loans, :horizon], atol=1e-6)
+    assert sum(len(columns["emi"]) for _, columns in chunks) == 50
+
+
+def test_month_helpers():
+    """Test calendar month arithmetic used to place tranches and due dates."""
+    assert add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+    assert add_months(date(2024, 11, 15), 14) == date(2026, 1, 15)
+    assert month_index([date(2025, 3, 1), date(2024, 12, 31)], [date(2024, 12, 5)] * 2).tolist() == [3, 0]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from src.finance.returns import xirr
+
+
+def test_single_period_return():
+    """Test that doubling money in a year is a 100% return."""
+    rates = xirr(np.array([0, 0]), np.array([-100.0, 200.0]), np.array([0.0, 1.0]), 1)
+
+    assert rates[0] == pytest.approx(1.0)
+
+
+def test_matches_npv_root():
+    """Test that the solved rate discounts an irregular series to zero."""
+    amounts = np.array([-1_000_000.0, -250_000.0, -400_000.0, 50_000.0, 2_100_000.0])
+    years = np.array([0.0, 0.4, 1.3, 2.0, 3.7])
+
+    rate = xirr(np.zeros(5, dtype=np.int64), amounts, years, 1)[0]
+
+    assert np.sum(amounts / (1.0 + rate) ** years) == pytest.approx(0.0, abs=1e-3)
+
+
+def test_loss_and_gain_in_one_batch():
+    """Test that series are solved independently, including negative returns."""
+    index = np.array([0, 0, 1, 1, 2, 2])
+    amounts = np.array([-100.0, 110.0, -100.0, 80.0, -100.0, 100.0])
+    years = np.array([0.0, 1.0, 0.0, 2.0, 0.0, 0.5])
+
+    rates = xirr(index, amounts, years, 3)
+
+    assert rates[0] == pytest.approx(0.10)
+    assert rates[1] == pytest.approx(0.8 ** 0.5 - 1.0)
+    assert rates[2] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_unsolvable_series_is_nan():
+    """Test that a series with only outflows, or no flows at all, has no rate."""
+    rates = xirr(np.array([0, 0, 2, 2]), np.array([-100.0, -50.0, -100.0, 121.0]), np.array([0.0, 1.0, 0.0, 2.0]), 3)
+
+    assert np.isnan(rates[0])
+    assert np.isnan(rates[1])
+    assert rates[2] == pytest.approx(0.10)
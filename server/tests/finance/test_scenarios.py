@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from src.finance.amortization import amortize
+from src.finance.scenarios import scenario_grid, simulate
+
+
+def _loan(amount=2_500_000.0, rate=7.5, tenure=360, tranches=None):
+    tranches = tranches or [(0, amount)]
+    schedule = amortize(
+        np.zeros(len(tranches), dtype=np.int64),
+        np.array([month for month, _ in tranches]),
+        np.array([value for _, value in tranches]),
+        np.array([rate]),
+        np.array([tenure]),
+    )
+    return schedule
+
+
+def _run(schedule, rate, tenure, rows):
+    """Simulate (month, prepayment, rate shift, reduce_emi) rows against one loan."""
+    count = len(rows)
+    month, prepayment, shift, reduce_emi = (np.array(column) for column in zip(*rows))
+    return simulate(
+        np.repeat(schedule["disbursement"], count, axis=0),
+        np.full(count, rate),
+        np.full(count, tenure),
+        month,
+        prepayment,
+        shift,
+        reduce_emi,
+    )
+
+
+def test_baseline_reproduces_schedule():
+    """Test that an unchanged scenario matches the amortization schedule, tranches included."""
+    schedule = _loan(tranches=[(0, 1_000_000.0), (6, 500_000.0), (18, 750_000.0)], rate=8.4, tenure=240)
+
+    result = _run(schedule, 8.4, 240, [(0, 0.0, 0.0, False)])
+
+    assert result["total_interest"][0] == pytest.approx(schedule["interest"].sum())
+    assert result["emi"][0] == pytest.approx(schedule["emi"][0, 240])
+    assert result["tenure"][0] == 240
+
+
+def test_prepayment_modes():
+    """Test that prepaying shortens the tenure or lowers the EMI, saving interest either way."""
+    schedule = _loan()
+
+    result = _run(
+        schedule, 7.5, 360, [(0, 0.0, 0.0, False), (12, 500_000.0, 0.0, False), (12, 500_000.0, 0.0, True)]
+    )
+
+    baseline, shorter, cheaper = result["total_interest"]
+    assert shorter < cheaper < baseline
+    assert result["tenure"][1] < 360
+    assert result["tenure"][2] == 360
+    assert result["emi"][1] == pytest.approx(result["emi"][0])
+    assert result["emi"][2] < result["emi"][0]
+
+
+def test_rate_changes():
+    """Test rate shifts in both modes, including one the EMI can no longer keep up with."""
+    schedule = _loan()
+
+    result = _run(
+        schedule,
+        7.5,
+        360,
+        [(0, 0.0, 0.0, False), (24, 0.0, 0.5, False), (24, 0.0, 0.5, True), (24, 0.0, -0.5, False), (24, 0.0, 5.0, False)],
+    )
+
+    assert result["tenure"][1] > 360
+    assert result["tenure"][2] == 360 and result["emi"][2] > result["emi"][0]
+    assert result["tenure"][3] < 360
+    assert result["tenure"][4] == -1
+
+
+def test_scenario_grid():
+    """Test the scenario cross product and its validation."""
+    grid = scenario_grid([6, 12], [0, 100_000], [0, 50, -50], ["reduce_tenure", "reduce_emi"])
+
+    assert len(grid) == 24
+    assert grid[0] == (6, 0, 0, "reduce_tenure")
+    with pytest.raises(ValueError):
+        scenario_grid([0], [0], [0], ["reduce_tenure"])
+    with pytest.raises(ValueError):
+        scenario_grid([1], [0], [0], ["skip_emi"])
+    # Rejected from the dimensions alone, without building the product
+    with pytest.raises(ValueError):
+        scenario_grid(list(range(1, 601)), [0] * 1000, [0] * 1000, ["reduce_tenure"])
@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from ..test_utils import (
+    create_test_user,
+    create_test_purchase,
+    create_test_loan,
+    create_test_invoice,
+    create_test_payment_source,
+    create_test_payment,
+    create_test_loan_repayment,
+)
+
+
+class TestDashboardRoutes:
+    """Tests for the single-query dashboard."""
+
+    def test_dashboard_sections(self, client, db_session):
+        """Test that every section is aggregated per purchase and in total."""
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        purchase.current_rate = Decimal("250")
+        db_session.commit()
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        invoice.due_date = date.today() - timedelta(days=1)
+        db_session.commit()
+        source = create_test_payment_source(db_session, user_id=user.id)
+        payment = create_test_payment(db_session, invoice.id, source.id, user.id)
+        loan = create_test_loan(db_session, purchase_id=purchase.id, user_id=user.id)
+        loan.disbursed_to_date = Decimal("1000000")
+        db_session.commit()
+        create_test_loan_repayment(db_session, loan_id=loan.id)
+        idle = create_test_purchase(db_session, property_id=purchase.property_id, user_id=user.id)
+
+        response = client.get("/dashboard")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["purchase_count"] == 2
+        row, empty = data["purchases"]
+        assert row["purchase_id"] == purchase.id
+        assert Decimal(row["purchase"]["current_value"]) == Decimal("325000")
+        assert row["invoices"]["count"] == 1
+        assert Decimal(row["invoices"]["outstanding"]) == invoice.amount - payment.amount
+        assert row["invoices"]["overdue"] == 1
+        assert row["payments"]["count"] == 1
+        assert Decimal(row["payments"]["amount"]) == payment.amount
+        assert row["payments"]["last_payment_date"] == payment.payment_date.isoformat()
+        assert row["loans"]["count"] == 1
+        # Paid out so far, not the sanctioned disbursement
+        assert Decimal(row["loans"]["disbursed"]) == loan.disbursed_to_date
+        assert Decimal(row["loans"]["principal_paid"]) == Decimal("15000")
+        assert Decimal(row["acquisition_cost"]["builder_payment"]) == payment.amount
+
+        # A purchase with nothing recorded yet reads as zeros
+        assert empty["purchase_id"] == idle.id
+        assert empty["invoices"]["count"] == 0
+        assert Decimal(empty["loans"]["sanctioned"]) == 0
+        assert empty["payments"]["last_payment_date"] is None
+
+        totals = data["totals"]
+        assert Decimal(totals["purchase"]["total_cost"]) == purchase.total_cost + idle.total_cost
+        assert Decimal(totals["loans"]["sanctioned"]) == loan.sanction_amount
+        assert totals["payments"]["last_payment_date"] == payment.payment_date.isoformat()
+
+    def test_dashboard_is_one_query(self, client, db_session):
+        """Test that the dashboard's single statement is all Server-Timing reports."""
+        create_test_purchase(db_session)
+
+        response = client.get("/dashboard/")
+
+        assert response.status_code == 200
+        assert "timings" not in response.json()
+        server_timing = response.headers["Server-Timing"]
+        assert server_timing.startswith("db;dur=")
+        assert server_timing.endswith('desc="1 queries"')
+
+    def test_dashboard_filters_by_user(self, client, db_session):
+        """Test that user_id limits the dashboard to that user's purchases."""
+        purchase = create_test_purchase(db_session)
+
+        assert client.get(f"/dashboard?user_id={purchase.user_id}").json()["purchase_count"] == 1
+        data = client.get(f"/dashboard?user_id={purchase.user_id + 1}").json()
+        assert data["purchase_count"] == 0
+        assert data["purchases"] == []
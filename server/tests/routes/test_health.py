@@ -0,0 +1,21 @@
+class TestHealthRoutes:
+    """Tests for the health and diagnostics routes."""
+
+    def test_health_check(self, client):
+        """Test the basic health check."""
+        response = client.get("/health")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "healthy"}
+
+    def test_pool_health_check(self, client, db_session):
+        """Test the connection pool diagnostics."""
+        response = client.get("/health/pool")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data) == {"sync", "async", "replicas"}
+        assert data["replicas"] == []
+        for stats in (data["sync"], data["async"]):
+            assert "pool" in stats
+            assert "status" in stats
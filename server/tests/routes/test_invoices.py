@@ -3,8 +3,10 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 from ..test_utils import (
+    create_test_user,
     create_test_purchase,
     create_test_invoice,
+    create_test_payment_source,
     create_test_payment
 )
 
@@ -281,4 +283,156 @@ class TestInvoicesV2Routes:
         assert data["description"] == invoice.description
         
         # Check that paid_amount reflects the payment
-        assert float(data["paid_amount"]) >= float(payment.amount) 
\ No newline at end of file
+        assert float(data["paid_amount"]) >= float(payment.amount) 
+
+class TestInvoicePaidAmount:
+    """Tests for the stored invoice paid amount and status."""
+
+    def test_paid_amount_follows_payments(self, client, db_session):
+        """Test that payment create/update/delete keep paid_amount and status current."""
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        payment_source = create_test_payment_source(db_session, user_id=user.id)
+
+        payment_data = {
+            "invoice_id": invoice.id,
+            "payment_date": str(date.today()),
+            "amount": "200000",
+            "source_id": payment_source.id,
+            "payment_mode": "online",
+        }
+        response = client.post("/payments/", json=payment_data)
+        assert response.status_code == 200
+        payment_id = response.json()["id"]
+
+        data = client.get(f"/invoices/{invoice.id}").json()
+        assert Decimal(data["paid_amount"]) == Decimal("200000")
+        assert data["status"] == "partially_paid"
+
+        response = client.put(f"/payments/{payment_id}", json={"amount": str(invoice.amount)})
+        assert response.status_code == 200
+
+        data = client.get(f"/invoices/{invoice.id}").json()
+        assert Decimal(data["paid_amount"]) == invoice.amount
+        assert data["status"] == "paid"
+
+        response = client.delete(f"/payments/{payment_id}")
+        assert response.status_code == 200
+
+        data = client.get("/invoices/", params={"purchase_id": purchase.id}).json()
+        assert Decimal(data[0]["paid_amount"]) == 0
+        assert data[0]["status"] == "pending"
+
+
+class TestInvoiceValidation:
+    """Tests for the balance and invoice number checks on invoice and payment writes."""
+
+    def _invoice_data(self, purchase_id, **overrides):
+        data = {
+            "purchase_id": purchase_id,
+            "invoice_number": "INV-100",
+            "invoice_date": str(date.today()),
+            "amount": "1000000",
+            "status": "pending",
+        }
+        data.update(overrides)
+        return data
+
+    def test_create_invoice_checks_purchase_balance(self, client, db_session):
+        """Test that invoices can't exceed the purchase cost or reuse a number."""
+        purchase = create_test_purchase(db_session)
+
+        response = client.post("/invoices/", json=self._invoice_data(purchase.id))
+        assert response.status_code == 200
+
+        response = client.post("/invoices/", json=self._invoice_data(purchase.id))
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invoice number already exists"
+
+        remaining = purchase.total_sale_cost - Decimal("1000000")
+        response = client.post(
+            "/invoices/",
+            json=self._invoice_data(purchase.id, invoice_number="INV-101", amount=str(remaining + 1)),
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invoice amount exceeds balance of purchase cost"
+
+    def test_update_invoice_excludes_itself_from_balance(self, client, db_session):
+        """Test that an invoice's own amount doesn't count against its update."""
+        purchase = create_test_purchase(db_session)
+        invoice_id = client.post("/invoices/", json=self._invoice_data(purchase.id)).json()["id"]
+
+        response = client.put(
+            f"/invoices/{invoice_id}", json={"amount": str(purchase.total_sale_cost)}
+        )
+        assert response.status_code == 200
+        assert Decimal(response.json()["amount"]) == purchase.total_sale_cost
+
+    def test_payment_cannot_exceed_invoice_balance(self, client, db_session):
+        """Test that a payment larger than the unpaid balance is rejected."""
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        payment_source = create_test_payment_source(db_session, user_id=user.id)
+        create_test_payment(
+            db_session, invoice_id=invoice.id, source_id=payment_source.id, user_id=user.id
+        )
+        db_session.refresh(invoice)
+
+        payment_data = {
+            "invoice_id": invoice.id,
+            "payment_date": str(date.today()),
+            "amount": str(invoice.amount - invoice.paid_amount + 1),
+            "source_id": payment_source.id,
+            "payment_mode": "online",
+        }
+        response = client.post("/payments/", json=payment_data)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Payment amount exceeds invoice's balance amount"
+
+
+class TestInvoicesConditionalGet:
+    """Tests for ETag validation of the invoice list."""
+
+    def test_payment_changes_invoice_etag(self, client, db_session):
+        """Test that a payment, which updates the invoice's paid amount, changes its ETag."""
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        payment_source = create_test_payment_source(db_session, user_id=user.id)
+
+        etag = client.get(f"/invoices/{invoice.id}").headers["ETag"]
+        assert client.get(f"/invoices/{invoice.id}", headers={"If-None-Match": etag}).status_code == 304
+
+        create_test_payment(
+            db_session, invoice_id=invoice.id, source_id=payment_source.id, user_id=user.id
+        )
+
+        response = client.get(f"/invoices/{invoice.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert Decimal(response.json()["paid_amount"]) > 0
+
+
+class TestInvoicesSparseFieldsets:
+    """Tests for `fields=` on the invoice routes."""
+
+    def test_fields_on_list_and_detail(self, client, db_session):
+        """Test that only the requested invoice fields are returned."""
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+
+        response = client.get("/invoices/", params={"fields": "invoice_number,paid_amount"})
+        assert response.status_code == 200
+        data = response.json()
+        assert [list(item) for item in data] == [["invoice_number", "paid_amount"]]
+        assert data[0]["invoice_number"] == invoice.invoice_number
+        assert Decimal(data[0]["paid_amount"]) == 0
+
+        response = client.get(f"/invoices/{invoice.id}", params={"fields": "property_name"})
+        assert response.status_code == 200
+        assert list(response.json()) == ["property_name"]
+
+        response = client.get("/invoices/", params={"fields": ","})
+        assert response.status_code == 400
@@ -2,11 +2,16 @@ import pytest
 from datetime import date, timedelta
 from decimal import Decimal
 
+from src.database import balances
 from ..test_utils import (
     create_test_user,
     create_test_property,
     create_test_purchase,
-    create_test_loan
+    create_test_loan,
+    create_test_invoice,
+    create_test_payment_source,
+    create_test_payment,
+    create_test_loan_repayment
 )
 
 
@@ -206,4 +211,181 @@ class TestLoansV2Routes:
         assert data["other_charges"] == float(loan.other_charges)
         assert data["loan_sanction_charges"] == float(loan.loan_sanction_charges)
         assert data["interest_rate"] == float(loan.interest_rate)
-        assert data["tenure_months"] == loan.tenure_months 
\ No newline at end of file
+        assert data["tenure_months"] == loan.tenure_months 
+
+class TestLoanTotals:
+    """Tests for the disbursed and repaid totals stored on loans."""
+
+    def _create_loan_with_source(self, db_session):
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        loan = create_test_loan(db_session, purchase_id=purchase.id, user_id=user.id)
+        source = create_test_payment_source(db_session, user_id=user.id, loan_id=loan.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        return loan, source, invoice
+
+    def test_disbursed_total_follows_payments(self, client, db_session):
+        """Test that payments from a loan's source update its disbursed total."""
+        loan, source, invoice = self._create_loan_with_source(db_session)
+
+        payment_data = {
+            "invoice_id": invoice.id,
+            "payment_date": str(date.today()),
+            "amount": "100000",
+            "source_id": source.id,
+            "payment_mode": "online",
+        }
+        response = client.post("/payments/", json=payment_data)
+        assert response.status_code == 200
+        payment_id = response.json()["id"]
+
+        data = client.get(f"/loans/{loan.id}").json()
+        assert Decimal(data["total_disbursed_amount"]) == Decimal("100000")
+
+        response = client.put(f"/payments/{payment_id}", json={"amount": "150000"})
+        assert response.status_code == 200
+        data = client.get("/loans/").json()
+        assert Decimal(data[0]["total_disbursed_amount"]) == Decimal("150000")
+
+        response = client.delete(f"/payments/{payment_id}")
+        assert response.status_code == 200
+        data = client.get(f"/loans/{loan.id}").json()
+        assert Decimal(data["total_disbursed_amount"]) == 0
+
+    def test_principal_repaid_follows_repayments(self, client, db_session):
+        """Test that repayment writes update the loan's repaid principal."""
+        loan, source, _ = self._create_loan_with_source(db_session)
+        repayment = create_test_loan_repayment(db_session, loan_id=loan.id, source_id=source.id)
+
+        response = client.put(
+            f"/repayments/{repayment.id}", json={"principal_amount": "20000"}
+        )
+        assert response.status_code == 200
+        db_session.refresh(loan)
+        assert loan.principal_repaid == Decimal("20000")
+
+        response = client.delete(f"/repayments/{repayment.id}")
+        assert response.status_code == 200
+        db_session.refresh(loan)
+        assert loan.principal_repaid == 0
+
+    def test_reconcile_loan_totals(self, db_session):
+        """Test that reconciliation rebuilds drifted totals from the raw rows."""
+        loan, source, invoice = self._create_loan_with_source(db_session)
+        payment = create_test_payment(
+            db_session, invoice_id=invoice.id, source_id=source.id, user_id=loan.user_id
+        )
+        loan.disbursed_to_date = Decimal("1")
+        db_session.commit()
+
+        assert balances.refresh_loan_totals(db_session) == 1
+        db_session.commit()
+        db_session.refresh(loan)
+        assert loan.disbursed_to_date == payment.amount
+        assert balances.refresh_loan_totals(db_session) == 0
+
+
+class TestLoanSchedule:
+    """Tests for the loan amortization schedule routes."""
+
+    def _create_disbursed_loan(self, db_session):
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        loan = create_test_loan(db_session, purchase_id=purchase.id, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        source = create_test_payment_source(db_session, user_id=user.id, loan_id=loan.id)
+        create_test_payment(db_session, invoice_id=invoice.id, source_id=source.id, user_id=user.id)
+        return loan
+
+    def test_get_loan_schedule(self, client, db_session):
+        """Test that the schedule repays exactly the disbursed tranches over the tenure."""
+        loan = self._create_disbursed_loan(db_session)
+
+        response = client.get(f"/loans/{loan.id}/schedule")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["loan_id"] == loan.id
+        assert Decimal(data["disbursed_amount"]) == Decimal("250000")
+        schedule = data["schedule"]
+        assert len(schedule) == loan.tenure_months + 1
+        assert sum(Decimal(m["disbursement"]) for m in schedule) == Decimal("250000")
+        assert abs(sum(Decimal(m["principal"]) for m in schedule) - Decimal("250000")) < 1
+        assert Decimal(schedule[-1]["closing_balance"]) == 0
+        assert Decimal(data["total_payment"]) > Decimal("250000")
+
+    def test_schedule_with_undisbursed_sanction(self, client, db_session):
+        """Test projecting the rest of the sanction as drawn."""
+        loan = self._create_disbursed_loan(db_session)
+
+        response = client.get(f"/loans/{loan.id}/schedule", params={"include_undisbursed": True})
+
+        assert response.status_code == 200
+        schedule = response.json()["schedule"]
+        assert sum(Decimal(m["disbursement"]) for m in schedule) == loan.sanction_amount
+
+    def test_get_loan_schedule_not_found(self, client, db_session):
+        """Test the schedule of a loan that doesn't exist."""
+        response = client.get("/loans/999999/schedule")
+        assert response.status_code == 404
+
+    def test_get_portfolio_schedule(self, client, db_session):
+        """Test the combined schedule of all active loans."""
+        loan = self._create_disbursed_loan(db_session)
+
+        response = client.get("/loans/schedule")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["loan_id"] for item in data["loans"]] == [loan.id]
+        single = client.get(f"/loans/{loan.id}/schedule").json()
+        assert data["loans"][0]["total_interest"] == single["total_interest"]
+        assert sum(Decimal(m["emi"]) for m in data["months"]) == sum(
+            Decimal(m["emi"]) for m in single["schedule"]
+        )
+
+
+class TestLoanScenarios:
+    """Tests for the prepayment and rate-change simulation route."""
+
+    def test_simulate_scenarios(self, client, db_session):
+        """Test that every combination is simulated against every loan."""
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        loan = create_test_loan(db_session, purchase_id=purchase.id, user_id=user.id)
+
+        response = client.post(
+            "/loans/simulate/",
+            json={
+                "loan_ids": [loan.id],
+                "months": [12],
+                "prepayments": ["0", "500000"],
+                "rate_shifts_bps": [0, 50],
+                "modes": ["reduce_tenure", "reduce_emi"],
+                "include_undisbursed": True,
+            },
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["baselines"][0]["tenure_months"] == loan.tenure_months
+        assert len(data["scenarios"]) == 8
+        unchanged = [s for s in data["scenarios"] if Decimal(s["prepayment"]) == 0 and s["rate_shift_bps"] == 0]
+        assert all(Decimal(s["interest_saved"]) == 0 for s in unchanged)
+        prepaid = next(
+            s for s in data["scenarios"]
+            if Decimal(s["prepayment"]) > 0 and s["rate_shift_bps"] == 0 and s["mode"] == "reduce_tenure"
+        )
+        assert Decimal(prepaid["interest_saved"]) > 0
+        assert prepaid["months_saved"] > 0
+
+    def test_simulate_unknown_loan(self, client, db_session):
+        """Test that unknown loans and invalid grids are rejected."""
+        response = client.post("/loans/simulate/", json={"loan_ids": [999999]})
+        assert response.status_code == 404
+
+        response = client.post("/loans/simulate/", json={"loan_ids": [1], "months": [0]})
+        assert response.status_code == 400
+
+        response = client.post("/loans/simulate/", json={"loan_ids": [1], "prepayments": ["0"] * 10_001})
+        assert response.status_code == 422
@@ -4,6 +4,7 @@ from decimal import Decimal
 
 from ..test_utils import (
     create_test_user,
+    create_test_purchase,
     create_test_payment_source,
     create_test_invoice,
     create_test_payment
@@ -176,4 +177,282 @@ class TestPaymentsV2Routes:
         assert data["transaction_reference"] == payment.transaction_reference
         assert data["receipt_date"] is not None
         assert data["receipt_number"] == payment.receipt_number
-        assert data["notes"] == payment.notes 
\ No newline at end of file
+        assert data["notes"] == payment.notes
+
+
+class TestPaymentsPagination:
+    """Tests for keyset pagination and streaming on the payments list."""
+
+    def _create_payments(self, db_session, count):
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        payment_source = create_test_payment_source(db_session, user_id=user.id)
+        return [
+            create_test_payment(
+                db_session,
+                invoice_id=invoice.id,
+                source_id=payment_source.id,
+                user_id=user.id,
+            )
+            for _ in range(count)
+        ]
+
+    def test_get_payments_paginated(self, client, db_session):
+        """Test paging through payments with limit and after."""
+        payments = self._create_payments(db_session, 3)
+        expected_ids = sorted((p.id for p in payments), reverse=True)
+
+        # First page
+        response = client.get("/payments/", params={"limit": 2})
+        assert response.status_code == 200
+        first_page = response.json()
+        assert [p["id"] for p in first_page] == expected_ids[:2]
+        cursor = response.headers["X-Next-Cursor"]
+
+        # Second (last) page
+        response = client.get("/payments/", params={"limit": 2, "after": cursor})
+        assert response.status_code == 200
+        assert [p["id"] for p in response.json()] == expected_ids[2:]
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_get_payments_invalid_cursor(self, client, db_session):
+        """Test that a malformed cursor is rejected."""
+        response = client.get("/payments/", params={"limit": 2, "after": "not-a-cursor"})
+        assert response.status_code == 400
+
+    def test_get_payments_stream(self, client, db_session):
+        """Test streaming the payments list as a JSON array."""
+        payments = self._create_payments(db_session, 3)
+
+        response = client.get("/payments/", params={"stream": True})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [p["id"] for p in data] == sorted((p.id for p in payments), reverse=True)
+        assert "property_name" in data[0]
+
+
+class TestPaymentImport:
+    """Tests for bulk importing payments."""
+
+    def _setup(self, db_session):
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        payment_source = create_test_payment_source(db_session, user_id=user.id)
+        return invoice, payment_source
+
+    def test_import_payments_csv(self, client, db_session):
+        """Test that valid CSV rows are imported and invalid ones reported by row."""
+        invoice, payment_source = self._setup(db_session)
+        body = (
+            "invoice_id,payment_date,amount,source_id,payment_mode,transaction_reference\n"
+            f"{invoice.id},2024-01-10,100000,{payment_source.id},online,TXN-1\n"
+            f"{invoice.id},2024-01-11,-5,{payment_source.id},online,\n"
+            f"999,2024-01-12,100,{payment_source.id},online,\n"
+            f"{invoice.id},2024-01-13,150000,{payment_source.id},cheque,\n"
+            f"{invoice.id},2024-01-14,300000,{payment_source.id},online,\n"
+        )
+
+        response = client.post(
+            "/payments/import", content=body, headers={"Content-Type": "text/csv"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["errors"] == [
+            {"row": 2, "error": "Payment amount must be greater than 0"},
+            {"row": 3, "error": "Invoice not found"},
+            {"row": 5, "error": "Payment amount exceeds invoice's balance amount"},
+        ]
+
+        db_session.expire_all()
+        assert len(invoice.payments) == 2
+        assert invoice.paid_amount == Decimal("250000")
+        assert invoice.status == "partially_paid"
+        assert {p.purchase_id for p in invoice.payments} == {invoice.purchase_id}
+
+    def test_import_payments_json(self, client, db_session):
+        """Test importing a JSON array, and that a dry run writes nothing."""
+        invoice, payment_source = self._setup(db_session)
+        body = (
+            f'[{{"invoice_id": {invoice.id}, "payment_date": "2024-01-10", "amount": 500000,'
+            f' "source_id": {payment_source.id}, "payment_mode": "online"}},'
+            f' {{"invoice_id": {invoice.id}, "amount": 10}}]'
+        )
+
+        response = client.post(
+            "/payments/import?dry_run=true",
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 200
+        assert response.json()["imported"] == 1
+        db_session.expire_all()
+        assert invoice.payments == []
+
+        response = client.post(
+            "/payments/import", content=body, headers={"Content-Type": "application/json"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 1
+        assert data["errors"] == [
+            {"row": 2, "error": "Missing required field(s): payment_date, source_id, payment_mode"}
+        ]
+        db_session.expire_all()
+        assert invoice.status == "paid"
+
+    def test_import_payments_malformed_json(self, client, db_session):
+        """Test that an unreadable file is rejected."""
+        response = client.post(
+            "/payments/import?format=json", content='[{"invoice_id": 1,', headers={}
+        )
+        assert response.status_code == 400
+
+
+class TestPaymentsConditionalGet:
+    """Tests for ETag validation of the payment list."""
+
+    def test_unchanged_list_returns_304(self, client, db_session):
+        """Test that a matching If-None-Match is answered with 304 until payments change."""
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        payment_source = create_test_payment_source(db_session, user_id=user.id)
+        create_test_payment(
+            db_session, invoice_id=invoice.id, source_id=payment_source.id, user_id=user.id
+        )
+
+        response = client.get("/payments/")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert "Last-Modified" in response.headers
+
+        response = client.get("/payments/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        # A filtered list is a different representation
+        filtered = client.get(f"/payments/?invoice_id={invoice.id}", headers={"If-None-Match": etag})
+        assert filtered.status_code == 200
+
+        payment_data = {
+            "invoice_id": invoice.id,
+            "payment_date": str(date.today()),
+            "amount": "1000",
+            "source_id": payment_source.id,
+            "payment_mode": "online",
+        }
+        assert client.post("/payments/", json=payment_data).status_code == 200
+
+        response = client.get("/payments/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert len(response.json()) == 2
+
+
+class TestPaymentsSerialization:
+    """Tests for the orjson fast path on the payment list."""
+
+    def test_list_matches_schema_encoding(self, client, db_session):
+        """Test that the fast path returns what the response_model would, with its headers."""
+        from typing import List
+        from pydantic import TypeAdapter
+        from src import schemas
+
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        payment_source = create_test_payment_source(db_session, user_id=user.id)
+        for _ in range(3):
+            create_test_payment(
+                db_session, invoice_id=invoice.id, source_id=payment_source.id, user_id=user.id
+            )
+
+        response = client.get("/payments/", params={"limit": 2})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert "ETag" in response.headers
+        assert "X-Next-Cursor" in response.headers
+        data = response.json()
+        adapter = TypeAdapter(List[schemas.PaymentPublic])
+        assert adapter.dump_python(adapter.validate_python(data), mode="json") == data
+        assert isinstance(data[0]["amount"], str)
+
+
+class TestPaymentsSparseFieldsets:
+    """Tests for `fields=` on the payment list and detail routes."""
+
+    def _create_payments(self, db_session, count):
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        payment_source = create_test_payment_source(db_session, user_id=user.id)
+        return [
+            create_test_payment(
+                db_session, invoice_id=invoice.id, source_id=payment_source.id, user_id=user.id
+            )
+            for _ in range(count)
+        ]
+
+    def test_list_returns_only_requested_fields(self, client, db_session):
+        """Test that the list returns just the requested fields, in schema order."""
+        payments = self._create_payments(db_session, 2)
+
+        response = client.get("/payments/", params={"fields": "property_name,amount,id"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [list(item) for item in data] == [["id", "amount", "property_name"]] * 2
+        assert {item["id"] for item in data} == {p.id for p in payments}
+
+    def test_paginated_list_with_fields(self, client, db_session):
+        """Test that keyset cursors still work when the keyset columns aren't requested."""
+        payments = self._create_payments(db_session, 3)
+        expected_ids = sorted((p.id for p in payments), reverse=True)
+
+        response = client.get("/payments/", params={"fields": "amount", "limit": 2})
+        assert response.status_code == 200
+        assert [list(item) for item in response.json()] == [["amount"]] * 2
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = client.get("/payments/", params={"fields": "id", "limit": 2, "after": cursor})
+        assert [item["id"] for item in response.json()] == expected_ids[2:]
+
+    def test_stream_with_fields(self, client, db_session):
+        """Test that the streamed list honours fields too."""
+        self._create_payments(db_session, 2)
+
+        response = client.get("/payments/", params={"fields": "id,notes", "stream": True})
+
+        assert response.status_code == 400  # notes is a detail field, not a list field
+
+        response = client.get("/payments/", params={"fields": "id,source_name", "stream": True})
+        assert response.status_code == 200
+        assert [list(item) for item in response.json()] == [["id", "source_name"]] * 2
+
+    def test_detail_with_fields(self, client, db_session):
+        """Test that the detail route accepts detail-only fields."""
+        payment = self._create_payments(db_session, 1)[0]
+
+        response = client.get(f"/payments/{payment.id}", params={"fields": "notes,invoice_number"})
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"invoice_number", "notes"}
+        assert "ETag" in response.headers
+
+        full = client.get(f"/payments/{payment.id}").json()
+        assert full["id"] == payment.id
+        assert "transaction_reference" in full
+
+    def test_unknown_field_is_rejected(self, client, db_session):
+        """Test that unknown field names are a client error."""
+        response = client.get("/payments/", params={"fields": "id,password"})
+
+        assert response.status_code == 400
+        assert "password" in response.json()["detail"]
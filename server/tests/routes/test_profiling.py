@@ -0,0 +1,76 @@
+import logging
+
+import pytest
+
+from src.profiling import query_budget
+
+from ..test_utils import (
+    create_test_loan,
+    create_test_payment_source,
+)
+
+
+class TestQueryProfiling:
+    """Tests for per-request query counts, Server-Timing and query budgets."""
+
+    def test_server_timing_reports_queries(self, client, db_session):
+        """Test that the database time and statement count are sent back."""
+        loan = create_test_loan(db_session)
+
+        response = client.get(f"/loans/{loan.id}")
+
+        assert response.status_code == 200
+        assert 'desc="2 queries"' in response.headers["Server-Timing"]
+        assert "db;dur=" in response.headers["Server-Timing"]
+
+    def test_requests_without_queries(self, client):
+        response = client.get("/health")
+
+        assert response.headers["Server-Timing"] == 'db;dur=0.0;desc="0 queries"'
+
+    def test_repeated_statement_is_logged(self, client, db_session, caplog):
+        """Test that a statement run once per row is reported as a likely N+1."""
+        loan = create_test_loan(db_session)
+        for _ in range(5):
+            create_test_payment_source(db_session, user_id=loan.user_id, loan_id=loan.id)
+
+        with caplog.at_level(logging.INFO):
+            response = client.delete(f"/loans/{loan.id}")
+
+        assert response.status_code == 200
+        warnings = [record for record in caplog.records if record.levelno == logging.WARNING]
+        # The explicit payments lookup per source, plus the cascades deleting each source
+        repeated = {record.db_statement: record.db_statement_count for record in warnings}
+        assert any("WHERE payments.source_id" in statement for statement in repeated)
+        assert set(repeated.values()) == {5}
+        access = [record for record in caplog.records if record.name == "src.access"]
+        assert access[0].db_queries >= 5
+
+    def test_query_budget_fails_over_budget(self, client, db_session):
+        loan = create_test_loan(db_session)
+
+        with pytest.raises(AssertionError, match="2 queries run, budget is 1"):
+            with query_budget(1):
+                client.get(f"/loans/{loan.id}")
+
+
+class TestQueryBudgets:
+    """Queries each endpoint is allowed, counting the conditional GET lookup."""
+
+    def test_dashboard_is_one_query(self, client, db_session):
+        create_test_loan(db_session)
+
+        with query_budget(1):
+            assert client.get("/dashboard").status_code == 200
+
+    def test_loan_detail(self, client, db_session):
+        loan = create_test_loan(db_session)
+
+        with query_budget(2):
+            assert client.get(f"/loans/{loan.id}").status_code == 200
+
+    def test_purchase_detail(self, client, db_session):
+        loan = create_test_loan(db_session)
+
+        with query_budget(2):
+            assert client.get(f"/purchases/{loan.purchase_id}").status_code == 200
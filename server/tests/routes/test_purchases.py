@@ -6,7 +6,9 @@ from ..test_utils import (
     create_test_user,
     create_test_property,
     create_test_purchase,
-    create_test_invoice
+    create_test_invoice,
+    create_test_payment_source,
+    create_test_payment,
 )
 
 
@@ -318,4 +320,80 @@ class TestPurchasesV2Routes:
         # Check for invoices list
         assert "invoices" in data
         assert isinstance(data["invoices"], list)
-        assert len(data["invoices"]) >= 2 
\ No newline at end of file
+        assert len(data["invoices"]) >= 2 
+
+class TestPurchaseReturns:
+    """Tests for the purchase XIRR routes."""
+
+    def _valued_purchase(self, db_session, current_rate="250"):
+        purchase = create_test_purchase(db_session)
+        purchase.current_rate = Decimal(current_rate)
+        db_session.commit()
+        db_session.refresh(purchase)
+        return purchase
+
+    def test_purchase_returns(self, client, db_session):
+        """Test a single payment valued a year later at 1300 sq ft x 250."""
+        purchase = self._valued_purchase(db_session)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        source = create_test_payment_source(db_session, user_id=purchase.user_id)
+        payment = create_test_payment(db_session, invoice.id, source.id, purchase.user_id)
+        as_of = payment.payment_date + timedelta(days=365)
+
+        response = client.get(f"/purchases/{purchase.id}/returns?as_of={as_of.isoformat()}")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["purchase_id"] == purchase.id
+        assert Decimal(data["invested"]) == Decimal("250000")
+        assert Decimal(data["current_value"]) == Decimal("325000")
+        assert Decimal(data["outstanding_loan"]) == 0
+        assert data["first_cashflow_date"] == payment.payment_date.isoformat()
+        assert float(data["xirr"]) == pytest.approx(30.0, abs=1e-3)
+
+    def test_portfolio_returns(self, client, db_session):
+        """Test that the portfolio combines valued purchases and leaves unvalued ones out."""
+        purchase = self._valued_purchase(db_session)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        source = create_test_payment_source(db_session, user_id=purchase.user_id)
+        payment = create_test_payment(db_session, invoice.id, source.id, purchase.user_id)
+        unvalued = create_test_purchase(db_session, property_id=purchase.property_id, user_id=purchase.user_id)
+        as_of = payment.payment_date + timedelta(days=365)
+
+        response = client.get(f"/purchases/returns?as_of={as_of.isoformat()}")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["as_of"] == as_of.isoformat()
+        by_id = {row["purchase_id"]: row for row in data["purchases"]}
+        assert float(by_id[purchase.id]["xirr"]) == pytest.approx(30.0, abs=1e-3)
+        assert by_id[unvalued.id]["xirr"] is None
+        assert float(data["portfolio"]["xirr"]) == pytest.approx(30.0, abs=1e-3)
+
+    def test_returns_refresh_after_revaluation(self, client, db_session):
+        """Test that a cached return is dropped when the purchase is revalued."""
+        purchase = self._valued_purchase(db_session)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        source = create_test_payment_source(db_session, user_id=purchase.user_id)
+        payment = create_test_payment(db_session, invoice.id, source.id, purchase.user_id)
+        url = f"/purchases/{purchase.id}/returns?as_of={(payment.payment_date + timedelta(days=365)).isoformat()}"
+        assert float(client.get(url).json()["xirr"]) == pytest.approx(30.0, abs=1e-3)
+
+        purchase.current_rate = Decimal("200")
+        db_session.commit()
+
+        assert float(client.get(url).json()["xirr"]) == pytest.approx(4.0, abs=1e-3)
+
+    def test_returns_default_to_today_in_the_cache_key(self, client, db_session):
+        """Test that a return valued today by default is cached under today's date."""
+        purchase = self._valued_purchase(db_session)
+        url = f"/purchases/{purchase.id}/returns"
+
+        assert client.get(url).headers["X-Cache"] == "MISS"
+        assert client.get(f"{url}?as_of={date.today().isoformat()}").headers["X-Cache"] == "HIT"
+        assert client.get(f"{url}?as_of={(date.today() - timedelta(days=1)).isoformat()}").headers["X-Cache"] == "MISS"
+
+    def test_returns_not_found_and_bad_date(self, client, db_session):
+        """Test 404 for an unknown purchase and 400 for an unparseable as_of."""
+        assert client.get("/purchases/999999/returns").status_code == 404
+        assert client.get("/purchases/returns?as_of=soon").status_code == 400
@@ -1,8 +1,10 @@
+import io
+
 import pytest
 from datetime import date, timedelta
 from decimal import Decimal
 
-from src.database import models
+from src.database import models, statements
 from ..test_utils import (
     create_test_loan,
     create_test_payment_source,
@@ -290,4 +292,112 @@ class TestRepaymentsV2Routes:
         assert float(data["penalties"]) == float(repayment.penalties)
         assert data["payment_mode"] == repayment.payment_mode
         assert data["transaction_reference"] == repayment.transaction_reference
-        assert data["notes"] == repayment.notes 
\ No newline at end of file
+        assert data["notes"] == repayment.notes 
+
+class TestStatementImport:
+    """Tests for creating repayments from a bank statement."""
+
+    STATEMENT = (
+        "Date,Narration,Chq./Ref.No.,Value Dt,Withdrawal Amt.,Deposit Amt.,Closing Balance\n"
+        '05/02/24,EMI 12345 HOME LOAN,REF003,05/02/24,"30,000.00",,"190,000.00"\n'
+        '05/01/24,EMI 12345 HOME LOAN,REF001,05/01/24,"30,000.00",,"70,000.00"\n'
+        '10/01/24,SALARY,REF002,10/01/24,,"150,000.00","220,000.00"\n'
+        '12/01/24,CARD PAYMENT,REF004,12/01/24,"2,500.00",,"217,500.00"\n'
+        '05/03/24,EMI 12345 HOME LOAN,,05/03/24,"30,000.00",,"160,000.00"\n'
+    )
+
+    def _loan(self, db_session):
+        """A loan with 3,500,000 paid out, which is what interest is charged on."""
+        loan = create_test_loan(db_session)
+        loan.disbursed_to_date = Decimal("3500000")
+        db_session.commit()
+        return loan
+
+    def _import(self, client, loan, payment_source, **params):
+        params = {"loan_id": loan.id, "source_id": payment_source.id, "match": "EMI 12345", **params}
+        return client.post(
+            "/repayments/import-statement",
+            params=params,
+            content=self.STATEMENT,
+            headers={"Content-Type": "text/csv"},
+        )
+
+    def test_import_statement(self, client, db_session):
+        """Test that EMI debits become repayments split on the reducing balance."""
+        loan = self._loan(db_session)
+        payment_source = create_test_payment_source(db_session, user_id=loan.user_id)
+
+        response = self._import(client, loan, payment_source)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["skipped"] == 0
+        assert data["errors"] == [{"row": 5, "error": "Missing transaction reference"}]
+
+        repayments = (
+            db_session.query(models.LoanRepayment)
+            .order_by(models.LoanRepayment.payment_date)
+            .all()
+        )
+        assert [r.transaction_reference for r in repayments] == ["REF001", "REF003"]
+        # 3,500,000 outstanding at 7.5% a year
+        assert repayments[0].interest_amount == Decimal("21875.00")
+        assert repayments[0].principal_amount == Decimal("8125.00")
+        assert repayments[1].interest_amount == Decimal("21824.22")
+        assert repayments[1].principal_amount == Decimal("8175.78")
+
+        db_session.refresh(loan)
+        assert loan.principal_repaid == Decimal("16300.78")
+
+    def test_import_statement_splits_in_date_order_across_batches(self, db_session):
+        """Test that a newest-first statement is split in date order even when it spans batches."""
+        loan = self._loan(db_session)
+        payment_source = create_test_payment_source(db_session, user_id=loan.user_id)
+
+        statements.import_statement(
+            db_session,
+            statements.iter_statement(io.StringIO(self.STATEMENT)),
+            loan.id,
+            payment_source.id,
+            match="EMI 12345",
+            batch_size=1,
+        )
+
+        repayments = {r.transaction_reference: r for r in db_session.query(models.LoanRepayment)}
+        assert repayments["REF001"].interest_amount == Decimal("21875.00")
+        assert repayments["REF003"].interest_amount == Decimal("21824.22")
+
+    def test_import_statement_skips_duplicates(self, client, db_session):
+        """Test that re-importing a statement doesn't create duplicate repayments."""
+        loan = self._loan(db_session)
+        payment_source = create_test_payment_source(db_session, user_id=loan.user_id)
+
+        assert self._import(client, loan, payment_source, dry_run=True).json()["imported"] == 2
+        assert db_session.query(models.LoanRepayment).count() == 0
+
+        assert self._import(client, loan, payment_source).json()["imported"] == 2
+        data = self._import(client, loan, payment_source).json()
+        assert data["imported"] == 0
+        assert data["skipped"] == 2
+        assert db_session.query(models.LoanRepayment).count() == 2
+
+    def test_import_statement_reference_on_another_loan(self, client, db_session):
+        """Test that a reference already used by another loan doesn't skip the line."""
+        loan = self._loan(db_session)
+        payment_source = create_test_payment_source(db_session, user_id=loan.user_id)
+        other = create_test_loan(db_session, purchase_id=loan.purchase_id, user_id=loan.user_id)
+        assert self._import(client, other, payment_source).json()["imported"] == 2
+
+        data = self._import(client, loan, payment_source).json()
+        assert data["imported"] == 2
+        assert data["skipped"] == 0
+
+    def test_import_statement_unknown_loan(self, client, db_session):
+        """Test that importing against a missing loan returns 404."""
+        response = client.post(
+            "/repayments/import-statement",
+            params={"loan_id": 999, "source_id": 1},
+            content=self.STATEMENT,
+        )
+        assert response.status_code == 404
@@ -0,0 +1,148 @@
+from decimal import Decimal
+
+from ..test_utils import (
+    create_test_user,
+    create_test_purchase,
+    create_test_loan,
+    create_test_invoice,
+    create_test_payment_source,
+    create_test_payment,
+    create_test_loan_repayment,
+)
+
+
+class TestSummaryRoutes:
+    """Tests for the acquisition cost and loan summary tables."""
+
+    def _create_purchase(self, db_session):
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        return user, purchase
+
+    def test_acquisition_cost_summary_tracks_payments(self, client, db_session):
+        """Test that the purchase summary follows payment writes."""
+        user, purchase = self._create_purchase(db_session)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        source = create_test_payment_source(db_session, user_id=user.id)
+        payment = create_test_payment(
+            db_session, invoice_id=invoice.id, source_id=source.id, user_id=user.id
+        )
+
+        response = client.get(f"/acquisition-cost/summary/?purchase_id={purchase.id}")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert Decimal(data[0]["total_builder_payment"]) == payment.amount
+        assert Decimal(data[0]["remaining_balance"]) == (
+            purchase.total_sale_cost - payment.amount
+        )
+
+        response = client.delete(f"/payments/{payment.id}")
+        assert response.status_code == 200
+
+        data = client.get(f"/acquisition-cost/summary/?purchase_id={purchase.id}").json()
+        assert Decimal(data[0]["total_builder_payment"]) == 0
+        assert Decimal(data[0]["remaining_balance"]) == purchase.total_sale_cost
+
+    def test_loan_summary_tracks_repayments(self, client, db_session):
+        """Test that the loan summary and purchase summary follow repayment writes."""
+        user, purchase = self._create_purchase(db_session)
+        loan = create_test_loan(db_session, purchase_id=purchase.id, user_id=user.id)
+
+        data = client.get(f"/loans/summary/?loan_id={loan.id}").json()
+        assert len(data) == 1
+        assert data[0]["total_payments"] == 0
+        assert Decimal(data[0]["principal_balance"]) == loan.total_disbursed_amount
+
+        repayment = create_test_loan_repayment(db_session, loan_id=loan.id)
+
+        data = client.get(f"/loans/summary/?loan_id={loan.id}").json()
+        assert data[0]["total_payments"] == 1
+        assert Decimal(data[0]["total_principal_paid"]) == repayment.principal_amount
+        assert Decimal(data[0]["principal_balance"]) == (
+            loan.total_disbursed_amount - repayment.principal_amount
+        )
+
+        data = client.get(f"/acquisition-cost/summary/?purchase_id={purchase.id}").json()
+        assert Decimal(data[0]["total_loan_principal"]) == repayment.principal_amount
+        assert Decimal(data[0]["total_loan_payment"]) == repayment.total_payment
+
+    def test_refresh_overwrites_rows_it_did_not_delete(self, db_session):
+        """Test that a refresh updates a row another transaction wrote in the meantime."""
+        from src.database import summaries
+        from src.database.views import AcquisitionCostSummary
+
+        user, purchase = self._create_purchase(db_session)
+        row = db_session.get(AcquisitionCostSummary, purchase.id)
+        row.remaining_balance = 0
+        db_session.flush()
+
+        summaries.refresh_acquisition_cost_summaries(db_session, [purchase.id])
+        db_session.expire_all()
+
+        row = db_session.get(AcquisitionCostSummary, purchase.id)
+        assert row.remaining_balance == purchase.total_sale_cost
+
+
+class TestSummaryCache:
+    """Tests for caching of the dashboard summary responses."""
+
+    def test_repeat_requests_are_served_from_cache(self, client, db_session):
+        """Test that an unchanged summary is cached and counted as a hit."""
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        url = f"/acquisition-cost/summary/?purchase_id={purchase.id}"
+        before = client.get("/health/cache").json()
+
+        first = client.get(url)
+        second = client.get(url)
+
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.json() == first.json()
+
+        after = client.get("/health/cache").json()
+        assert after["hits"] == before["hits"] + 1
+        assert after["misses"] == before["misses"] + 1
+
+    def test_writes_only_invalidate_affected_entries(self, client, db_session):
+        """Test that a payment retires cached summaries of its own purchase only."""
+        user = create_test_user(db_session)
+        purchase = create_test_purchase(db_session, user_id=user.id)
+        other = create_test_purchase(db_session, user_id=user.id)
+        invoice = create_test_invoice(db_session, purchase_id=purchase.id)
+        source = create_test_payment_source(db_session, user_id=user.id)
+
+        url = f"/acquisition-cost/summary/?purchase_id={purchase.id}"
+        other_url = f"/acquisition-cost/summary/?purchase_id={other.id}"
+        all_url = f"/acquisition-cost/summary/?user_id={user.id}"
+        for cached_url in (url, other_url, all_url):
+            client.get(cached_url)
+
+        payment = create_test_payment(
+            db_session, invoice_id=invoice.id, source_id=source.id, user_id=user.id
+        )
+
+        response = client.get(url)
+        assert response.headers["X-Cache"] == "MISS"
+        assert Decimal(response.json()[0]["total_builder_payment"]) == payment.amount
+        assert client.get(all_url).headers["X-Cache"] == "MISS"
+        assert client.get(other_url).headers["X-Cache"] == "HIT"
+
+    def test_cached_endpoints_read_from_the_primary(self):
+        """Test that no cached endpoint reads from a replica that may lag its generation."""
+        from src.database import get_async_read_db, get_read_db
+        from src.main import app
+
+        cached = [route for route in app.routes if hasattr(getattr(route, "endpoint", None), "__wrapped__")]
+        assert cached
+        for route in cached:
+            calls = {dependency.call for dependency in route.dependant.dependencies}
+            assert not calls & {get_read_db, get_async_read_db}, route.path
+
+    def test_memory_backend_is_off_with_several_workers(self):
+        """Test that a per-process cache isn't used when other workers can't invalidate it."""
+        from src.cache import MemoryBackend, create_backend
+
+        assert isinstance(create_backend("memory", workers=1), MemoryBackend)
+        assert create_backend("memory", workers=2) is None
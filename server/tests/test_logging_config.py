@@ -0,0 +1,67 @@
+import json
+import logging
+
+from src import logging_config
+
+
+def _record(level=logging.INFO, name="src.routes.payments", msg="Found %s rows", args=(3,), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestQueueLogging:
+    """Tests for the queued, lazily formatted logging pipeline."""
+
+    def test_records_are_queued_unformatted(self):
+        """Test that the message is left for the listener thread to render."""
+        handler = logging_config.DeferredQueueHandler(None)
+        record = _record()
+
+        prepared = handler.prepare(record)
+
+        assert prepared is record
+        assert prepared.msg == "Found %s rows"
+        assert prepared.args == (3,)
+
+    def test_debug_records_are_sampled(self):
+        assert logging_config.DebugSampler(0.0).filter(_record(logging.DEBUG)) is False
+        assert logging_config.DebugSampler(1.0).filter(_record(logging.DEBUG)) is True
+        # Only debug records are sampled
+        assert logging_config.DebugSampler(0.0).filter(_record(logging.INFO)) is True
+
+    def test_access_records_are_json(self):
+        record = _record(
+            name=logging_config.ACCESS_LOGGER, method="GET", path="/loans", status=200,
+            duration_ms=1.5, db_queries=2, db_time_ms=0.4,
+        )
+
+        entry = json.loads(logging_config.AccessFormatter().format(record))
+
+        assert entry["method"] == "GET"
+        assert entry["status"] == 200
+        assert entry["db_queries"] == 2
+        assert "time" in entry
+
+    def test_configure_is_idempotent(self):
+        """Test that the app's listener is reused and owns the only queue handler."""
+        listener = logging_config.configure()
+
+        assert logging_config.configure() is listener
+        queue_handlers = [
+            handler for handler in logging.getLogger().handlers
+            if isinstance(handler, logging_config.DeferredQueueHandler)
+        ]
+        assert len(queue_handlers) == 1
+
+    def test_requests_are_access_logged(self, client, caplog):
+        with caplog.at_level(logging.INFO, logger=logging_config.ACCESS_LOGGER):
+            response = client.get("/health")
+
+        assert response.status_code == 200
+        (record,) = [record for record in caplog.records if record.name == logging_config.ACCESS_LOGGER]
+        assert record.method == "GET"
+        assert record.path == "/health"
+        assert record.status == 200
+        assert record.db_queries == 0
+        assert record.duration_ms >= 0
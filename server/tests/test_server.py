@@ -0,0 +1,61 @@
+from src import server
+
+
+def _files(tmp_path, **contents):
+    paths = {}
+    for name, content in contents.items():
+        path = tmp_path / name
+        if content is not None:
+            path.write_text(content)
+        paths[name] = str(path)
+    return paths
+
+
+class TestWorkerSizing:
+    """Tests for sizing the worker pool to the container's CPU quota."""
+
+    def test_cgroup_v2_quota(self, tmp_path):
+        paths = _files(tmp_path, cpu_max="200000 100000\n", v1_quota=None, v1_period=None)
+
+        assert server.cpu_quota(**paths) == 2.0
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        paths = _files(tmp_path, cpu_max="max 100000\n", v1_quota="200000", v1_period="100000")
+
+        assert server.cpu_quota(**paths) is None
+
+    def test_cgroup_v1_quota(self, tmp_path):
+        paths = _files(tmp_path, cpu_max=None, v1_quota="150000\n", v1_period="100000\n")
+
+        assert server.cpu_quota(**paths) == 1.5
+
+    def test_cgroup_v1_unlimited(self, tmp_path):
+        paths = _files(tmp_path, cpu_max=None, v1_quota="-1\n", v1_period="100000\n")
+
+        assert server.cpu_quota(**paths) is None
+
+    def test_fractional_quota_rounds_up(self, monkeypatch):
+        monkeypatch.setattr(server, "cpu_quota", lambda: 1.5)
+
+        assert server.default_workers() == 2
+
+    def test_no_quota_uses_available_cpus(self, monkeypatch):
+        monkeypatch.setattr(server, "cpu_quota", lambda: None)
+
+        assert server.default_workers() >= 1
+
+
+class TestAfterFork:
+    """Tests for resetting inherited state in a forked worker."""
+
+    def test_engine_pools_are_replaced(self, monkeypatch):
+        from src import logging_config
+        from src.database import engine
+
+        # The listener thread is only restarted in a real fork, where the old one is gone
+        monkeypatch.setattr(logging_config, "after_fork", lambda: None)
+        pool = engine.pool
+
+        server.after_fork()
+
+        assert engine.pool is not pool
@@ -1,6 +1,6 @@
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from src.database import models
+from src.database import models, balances
 
 
 def create_test_user(db):
@@ -52,6 +52,9 @@ def create_test_purchase(db, property_id=None, user_id=None):
     purchase = models.Purchase(
         property_id=property_id,
         user_id=user_id,
+        carpet_area=Decimal("1000"),
+        exclusive_area=Decimal("200"),
+        common_area=Decimal("100"),
         base_cost=Decimal("5000000"),
         other_charges=Decimal("200000"),
         ifms=Decimal("50000"),
@@ -149,6 +152,8 @@ def create_test_payment(db, invoice_id=None, source_id=None, user_id=None):
     if not invoice_id:
         invoice = create_test_invoice(db)
         invoice_id = invoice.id
+    else:
+        invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
     
     if not user_id:
         user = create_test_user(db)
@@ -160,6 +165,7 @@ def create_test_payment(db, invoice_id=None, source_id=None, user_id=None):
     
     payment = models.Payment(
         invoice_id=invoice_id,
+        purchase_id=invoice.purchase_id,
         user_id=user_id,
         source_id=source_id,
         payment_date=date.today() - timedelta(days=5),
@@ -171,6 +177,8 @@ def create_test_payment(db, invoice_id=None, source_id=None, user_id=None):
         notes="Test payment"
     )
     db.add(payment)
+    balances.apply_invoice_payment(db, invoice_id, payment.amount)
+    balances.apply_loan_disbursement(db, source_id, payment.amount)
     db.commit()
     db.refresh(payment)
     return payment
@@ -203,6 +211,7 @@ def create_test_loan_repayment(db, loan_id=None, source_id=None):
         notes="Test loan repayment"
     )
     db.add(repayment)
+    balances.apply_loan_repayment(db, loan_id, repayment.principal_amount)
     db.commit()
     db.refresh(repayment)
     return repayment 
\ No newline at end of file